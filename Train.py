@@ -1,25 +1,81 @@
 import json
+import os
 import random
 import copy
 import time
 
 import numpy as np
 
-from main import main,parser,make_board
+import random_agent
+import rebel_agent
+from main import play_game,make_board
+from utils.boards import BoardPool, POOL_FILE
+from utils.classes import HOUSES
+from utils.evaluator import house_banner_score, HOUSE_SIZES
+from utils.model import load_weights, save_weights, WEIGHTS_FILE
 
-Board = make_board()
+# Draw the training boards from the board pool of make_pool.py when there is one, instead of making them
+pool = BoardPool(POOL_FILE) if os.path.exists(POOL_FILE) else None
+
+def new_board():
+    '''
+    This function gets the board of the next training games.
+
+    Returns:
+        cards (Board): the cards on the board
+        companion_cards (dict): dictionary of companion cards
+    '''
+
+    return pool.draw() if pool is not None else make_board()
+
+Board = new_board()
+
+class WeightedAgent:
+    '''
+    This class is the rebel agent playing with the weights of a chromosome, for play_game.
+    '''
+
+    def __init__(self, weight):
+        '''
+        This function initializes the agent.
+
+        Parameters:
+            weight (list): weights of the evaluation function
+        '''
+
+        self.weight = weight
+
+    def get_move(self, cards, player1, player2, companion_cards, choose_companion):
+        '''
+        This function gets the move of the rebel agent with the weights of the chromosome.
+
+        Parameters:
+            cards (Board): the cards on the board
+            player1 (Player): the player
+            player2 (Player): the opponent
+            companion_cards (dict): dictionary of companion cards
+            choose_companion (bool): flag to choose a companion card
+
+        Returns:
+            move (int/list): the move of the player
+        '''
+
+        return rebel_agent.get_move(cards, player1, player2, companion_cards, choose_companion, self.weight)
 
 def evaluate_fitness(chromosome,count):
     global Board
-    board = copy.deepcopy(Board)
+    cards, companion_cards = copy.deepcopy(Board)
     fe = []
-    winner, cards, player1, player2 = main(parser.parse_args(),board,chromosome)
+
+    # Play the game on the board with the agent using the weights of the chromosome, against the random agent
+    winner, player1, player2, _ = play_game(WeightedAgent(list(chromosome)), random_agent, cards, companion_cards,
+                                            'rebel_agent', 'random_agent')
 
     if winner == 1:
         # count = 0
         if chromosome[1] >= 10:
             print("New Board")
-            Board = make_board()
+            Board = new_board()
         else:
             chromosome[0] = min(2*chromosome[1],10)
     else:
@@ -32,17 +88,7 @@ def evaluate_fitness(chromosome,count):
 
 
 
-    score = 0
     banner_weight = 100
-    house_weights_ = {
-        'Stark': chromosome[2],
-        'Greyjoy': chromosome[3],
-        'Lannister': chromosome[4],
-        'Targaryen': chromosome[5],
-        'Baratheon': chromosome[6],
-        'Tyrell': chromosome[7],
-        'Tully': chromosome[8],
-    }
 
     # Retrieve banners from both players
     player1_banners = player1.get_banners()
@@ -51,49 +97,30 @@ def evaluate_fitness(chromosome,count):
 
     fe.extend(list(player1_banners.values()))
     fe.extend(list(player2_banners.values()))
-    # Calculate the scores of the players
-    player1_score = sum(player1_banners.values())
-    player2_score = sum(player2_banners.values())
-
-    # Add the score difference to the total score, scaled by a weight
-    score += (player1_score - player2_score) * banner_weight
-
-    # Define weights for different houses
-    house_weights = {
-        'Stark': 8,
-        'Greyjoy': 7,
-        'Lannister': 6,
-        'Targaryen': 5,
-        'Baratheon': 4,
-        'Tyrell': 3,
-        'Tully': 2
-    }
-    p1 = []
-    p2 = []
-    # Adjust the score based on card counts for each house
-    for house, weight in house_weights.items():
-        if len(player1.cards[house]) > weight / 2:
-            score +=  house_weights_[house]
-            if winner == 2:
-                chromosome[10 - weight] -= 1
-        elif len(player2.cards[house]) > weight / 2:
-            score -=  house_weights_[house]
-            if winner == 2:
-                chromosome[10-weight] += 10
-        elif len(player1.cards[house]) == len(player2.cards[house]) == weight / 2:
-            point = (player2_banners[house] - player1_banners[house])
-            score -=  point * house_weights_[house]
-            if winner == 2:
-                if point < 0:
-                    chromosome[10-weight] -=1
+
+    p1 = player1.get_counts()
+    p2 = player2.get_counts()
+
+    # Score the final board the way the agent evaluates it, with the weights it played with
+    score = house_banner_score(p1, p2, tuple(player1_banners.values()), tuple(player2_banners.values()),
+                               banner_weight, chromosome[2:9])
+
+    # Adjust the weights of the houses the agent lost
+    if winner == 2:
+        for i, size in enumerate(HOUSE_SIZES):
+            if p1[i] > size / 2:
+                chromosome[2 + i] -= 1
+            elif p2[i] > size / 2:
+                chromosome[2 + i] += 10
+            elif p1[i] == p2[i] == size / 2:
+                if player2_banners[HOUSES[i]] - player1_banners[HOUSES[i]] < 0:
+                    chromosome[2 + i] -= 1
                 else:
-                    chromosome[10-weight] += 10
-        p1.append(len(player1.cards[house]))
-        p2.append(len(player2.cards[house]))
+                    chromosome[2 + i] += 10
     fe.extend(p1)
     fe.extend(p2)
     fe.extend(chromosome)
-    fe.append(winner)
+    fe.append(winner or 0)
     fe.append(score)
     # File path to save the array
     file_path = 'training_logs.csv'
@@ -122,3 +149,7 @@ if __name__ == "__main__":
 
     print(weight)
 
+    # Play with the trained weights, keeping the learned model of the weights file
+    model = load_weights(WEIGHTS_FILE)[1] if os.path.exists(WEIGHTS_FILE) else None
+    save_weights(WEIGHTS_FILE, weight, model)
+
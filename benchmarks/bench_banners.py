@@ -0,0 +1,111 @@
+import argparse
+import copy
+import random
+import sys
+import time
+from os import pardir
+from os.path import abspath, join, dirname
+
+# Add the project folder to the path
+sys.path.append(abspath(join(dirname(abspath(__file__)), pardir)))
+
+import random_agent
+from main import make_board, apply_move, get_possible_moves, validate_agent_move, set_banners, update_banners, \
+    get_cards_status
+from utils.classes import Player
+
+parser = argparse.ArgumentParser(description="Compare full and incremental banner updates")
+parser.add_argument('-g', '--games', type=int, help="number of random games to collect positions from", default=50)
+parser.add_argument('-r', '--repeat', type=int, help="number of passes over the positions", default=20)
+parser.add_argument('--seed', type=int, help="random seed", default=0)
+
+
+def collect_positions(games):
+    '''
+    This function plays random games and collects the position after every move.
+
+    Parameters:
+        games (int): number of games to play
+
+    Returns:
+        positions (list): list of (player1, player2, last_house, last_turn) tuples
+    '''
+
+    positions = []
+
+    for _ in range(games):
+        cards, companion_cards = make_board()
+        player1, player2 = Player('random_agent'), Player('random_agent')
+        turn, choose_companion, last_house = 1, False, None
+
+        while get_possible_moves(cards) or (choose_companion and companion_cards):
+            move = random_agent.get_move(cards, player1, player2, companion_cards, choose_companion)
+
+            # Ask again for invalid companion moves, as the game does
+            if choose_companion and not validate_agent_move(cards, companion_cards, move):
+                continue
+
+            mover = turn
+            turn, choose_companion, last_house = apply_move(cards, companion_cards, player1, player2, move, turn,
+                                                            choose_companion, last_house)
+
+            positions.append((copy.deepcopy(player1), copy.deepcopy(player2), last_house, mover))
+
+    return positions
+
+
+def time_function(function, positions, repeat):
+    '''
+    This function times a banner function over the positions.
+
+    Parameters:
+        function (function): function taking (player1, player2, last_house, last_turn)
+        positions (list): list of positions
+        repeat (int): number of passes over the positions
+
+    Returns:
+        seconds (float): time per call in seconds
+    '''
+
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        for player1, player2, last_house, last_turn in positions:
+            function(player1, player2, last_house, last_turn)
+
+    return (time.perf_counter() - start) / (repeat * len(positions))
+
+
+def update_with_status(player1, player2, last_house, last_turn):
+    '''
+    This function updates the banners and builds the status dictionaries, as the display does.
+    '''
+
+    update_banners(player1, player2, last_house, last_turn)
+
+    return get_cards_status(player1, player2)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    positions = collect_positions(args.games)
+
+    # Both versions must give the same banners
+    for player1, player2, last_house, last_turn in positions:
+        full = copy.deepcopy(player1), copy.deepcopy(player2)
+        set_banners(full[0], full[1], last_house, last_turn)
+        update_banners(player1, player2, last_house, last_turn)
+
+        assert full[0].get_banners() == player1.get_banners() and full[1].get_banners() == player2.get_banners()
+
+    full_time = time_function(set_banners, positions, args.repeat)
+    incremental_time = time_function(update_banners, positions, args.repeat)
+    status_time = time_function(update_with_status, positions, args.repeat)
+
+    print(f"Positions: {len(positions)}")
+    print(f"set_banners (full):           {full_time * 1e6:8.3f} us/call")
+    print(f"update_banners (incremental): {incremental_time * 1e6:8.3f} us/call ({full_time / incremental_time:.1f}x)")
+    print(f"update_banners + status:      {status_time * 1e6:8.3f} us/call")
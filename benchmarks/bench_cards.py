@@ -0,0 +1,158 @@
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from os import pardir
+from os.path import abspath, join, dirname
+
+# Add the project folder to the path
+sys.path.append(abspath(join(dirname(abspath(__file__)), pardir)))
+
+from main import make_board, find_varys, house_card_count, get_possible_moves
+from utils.classes import Card, HOUSES
+
+parser = argparse.ArgumentParser(description="Compare the slotted Card with the old dictionary-based Card")
+parser.add_argument('-n', '--cards', type=int, help="number of cards to allocate for the memory test", default=100000)
+parser.add_argument('-b', '--boards', type=int, help="number of boards for the scan test", default=200)
+parser.add_argument('-r', '--repeat', type=int, help="number of passes over the boards", default=50)
+parser.add_argument('--seed', type=int, help="random seed", default=0)
+
+
+class LegacyCard:
+    '''
+    This class is the old Card, with the house and the name as strings in the instance dictionary.
+    '''
+
+    def __init__(self, house, name, location):
+        self.house = house
+        self.name = name
+        self.location = location
+
+    def get_house(self):
+        return self.house
+
+    def get_name(self):
+        return self.name
+
+    def get_location(self):
+        return self.location
+
+
+def legacy_find_varys(cards):
+    '''
+    This function is the old string-based find_varys.
+    '''
+
+    varys = [card for card in cards if card.get_name() == 'Varys']
+
+    return varys[0].get_location()
+
+
+def legacy_house_card_count(cards, house):
+    '''
+    This function is the old string-based house_card_count.
+    '''
+
+    count = 0
+
+    for card in cards:
+        if card.get_house() == house:
+            count += 1
+
+    return count
+
+
+def legacy_get_possible_moves(cards):
+    '''
+    This function is the old string-based get_possible_moves.
+    '''
+
+    varys_location = legacy_find_varys(cards)
+    varys_row, varys_col = varys_location // 6, varys_location % 6
+
+    moves = []
+
+    for card in cards:
+        if card.get_name() == 'Varys':
+            continue
+
+        row, col = card.get_location() // 6, card.get_location() % 6
+
+        if row == varys_row or col == varys_col:
+            moves.append(card.get_location())
+
+    return moves
+
+
+def bytes_per_card(card_class, count):
+    '''
+    This function measures the memory used by one card.
+
+    Parameters:
+        card_class (type): the class of the cards
+        count (int): number of cards to allocate
+
+    Returns:
+        size (float): bytes per card
+    '''
+
+    tracemalloc.start()
+
+    before = tracemalloc.get_traced_memory()[0]
+    cards = [card_class('Stark', 'Arya', i % 36) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+
+    tracemalloc.stop()
+
+    # Do not count the list holding the cards
+    return (after - before - sys.getsizeof(cards)) / len(cards)
+
+
+def time_scans(boards, find, count, moves, repeat):
+    '''
+    This function times the hot scans over the boards.
+
+    Parameters:
+        boards (list): list of boards
+        find (function): find_varys implementation
+        count (function): house_card_count implementation
+        moves (function): get_possible_moves implementation
+        repeat (int): number of passes over the boards
+
+    Returns:
+        seconds (float): time per board in seconds
+    '''
+
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        for cards in boards:
+            find(cards)
+            moves(cards)
+
+            for house in HOUSES:
+                count(cards, house)
+
+    return (time.perf_counter() - start) / (repeat * len(boards))
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    legacy_size = bytes_per_card(LegacyCard, args.cards)
+    slotted_size = bytes_per_card(Card, args.cards)
+
+    boards = [make_board()[0] for _ in range(args.boards)]
+    legacy_boards = [[LegacyCard(card.get_house(), card.get_name(), card.get_location()) for card in cards]
+                     for cards in boards]
+
+    legacy_time = time_scans(legacy_boards, legacy_find_varys, legacy_house_card_count, legacy_get_possible_moves,
+                             args.repeat)
+    slotted_time = time_scans(boards, find_varys, house_card_count, get_possible_moves, args.repeat)
+
+    print(f"Memory per card: legacy {legacy_size:.1f} B, slotted {slotted_size:.1f} B")
+    print(f"Scans per board: legacy {legacy_time * 1e6:.2f} us, slotted {slotted_time * 1e6:.2f} us "
+          f"({legacy_time / slotted_time:.2f}x)")
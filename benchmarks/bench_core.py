@@ -0,0 +1,107 @@
+import argparse
+import contextlib
+import copy
+import io
+import sys
+import time
+from os import pardir
+from os.path import abspath, join, dirname
+
+# Add the project folder to the path
+sys.path.append(abspath(join(dirname(abspath(__file__)), pardir)))
+
+import rebel_agent
+from utils import search_core
+from utils.search_core import state_from_board
+from positions import POSITIONS_FILE, load_positions, position_from_dict
+
+parser = argparse.ArgumentParser(description="Check that the search cores agree and compare their speed")
+parser.add_argument('-p', '--positions', type=str, help="positions file", default=POSITIONS_FILE)
+parser.add_argument('-d', '--depth', type=int, help="depth of the searches", default=5)
+
+
+def run_minimax(state, depth):
+    '''
+    This function searches a position with minimax without the extension, the search the cores reproduce.
+
+    Parameters:
+        state (dict): the game state
+        depth (int): depth of the search
+
+    Returns:
+        score (float): the score of the position for player 1
+        move (int): the best move
+        seconds (float): time of the search
+        nodes (int): number of searched nodes
+    '''
+
+    state = copy.deepcopy(state)
+    budget, rebel_agent.QUIESCENCE_BUDGET = rebel_agent.QUIESCENCE_BUDGET, 0
+    rebel_agent.reset_search_stats(depth)
+
+    start = time.perf_counter()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        score, move = rebel_agent.minimax(state['cards'], state['turn'] == 1, -float("inf"), float("inf"),
+                                          state['player1'], state['player2'], time.time(), depth,
+                                          state['companion_cards'], False, rebel_agent.DEFAULT_WEIGHT)
+
+    seconds = time.perf_counter() - start
+    rebel_agent.QUIESCENCE_BUDGET = budget
+
+    return score, move, seconds, rebel_agent.search_stats['nodes']
+
+
+def run_core(search, state, depth):
+    '''
+    This function searches a position with a search core.
+
+    Parameters:
+        search (function): search function of the core
+        state (dict): the game state
+        depth (int): depth of the search
+
+    Returns:
+        score (float): the score of the position for player 1
+        move (int): the best move
+        seconds (float): time of the search
+        nodes (int): number of searched nodes
+    '''
+
+    arguments = state_from_board(state['cards'], state['player1'], state['player2'])
+
+    start = time.perf_counter()
+    score, move, nodes = search(*arguments, len(state['companion_cards']) != 0, state['turn'], depth,
+                                rebel_agent.DEFAULT_WEIGHT, time.time() + 1e6)
+
+    return score, move, time.perf_counter() - start, nodes
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    searches = [('minimax', run_minimax), ('python core', lambda state, depth:
+                                           run_core(search_core.search, state, depth))]
+
+    if rebel_agent.CORE == 'compiled':
+        searches.append(('compiled core', lambda state, depth: run_core(rebel_agent.core_search, state, depth)))
+
+    else:
+        print("The compiled core is not built (python setup.py build_ext --inplace), only the Python core is checked")
+
+    for position in load_positions(args.positions):
+        # The cores search the card moves, companion choices are left to minimax_right
+        if position['choose_companion']:
+            continue
+
+        state = position_from_dict(position)
+        results = [(name, *function(state, args.depth)) for name, function in searches]
+
+        # Every search must find the same score and move
+        if len({(score, move) for _, score, move, _, _ in results}) != 1:
+            raise AssertionError(f"{position['name']}: the searches disagree: " +
+                                 ", ".join(f"{name} {score} {move}" for name, score, move, _, _ in results))
+
+        for name, score, move, seconds, nodes in results:
+            print(f"{position['name']:<16} {name:<14} score {score:8.1f} move {move!s:>4} {seconds:9.4f} s "
+                  f"{nodes / seconds:12.0f} nodes/s")
@@ -0,0 +1,161 @@
+import argparse
+import random
+import sys
+import time
+from os import pardir
+from os.path import abspath, join, dirname
+
+import numpy as np
+
+# Add the project folder to the path
+sys.path.append(abspath(join(dirname(abspath(__file__)), pardir)))
+
+import random_agent
+from main import apply_move, get_possible_moves, validate_agent_move, calculate_winner, play_game, make_board
+from utils.classes import Player
+from utils.playout import Playouts, make_boards, make_cards, NO_MOVE
+
+parser = argparse.ArgumentParser(description="Check the batched random playouts against the game and time them")
+parser.add_argument('-n', '--games', type=int, help="number of games played at once", default=10000)
+parser.add_argument('-c', '--check', type=int, help="number of games replayed move by move by the game", default=500)
+parser.add_argument('--seed', type=int, help="seed of the boards and moves", default=0)
+parser.add_argument('--duration', type=float, help="seconds of games played one at a time", default=5)
+
+
+def check_games(count, seed):
+    '''
+    This function plays games with the batched playouts and replays their moves with the game, checking every move is
+    valid and the game ends in the same state.
+
+    Parameters:
+        count (int): number of games
+        seed (int): seed of the boards and moves
+
+    Returns:
+        mismatches (int): number of games the replay disagrees with
+    '''
+
+    rng = np.random.default_rng(seed)
+    boards = make_boards(count, rng)
+    playouts = Playouts(boards, rng)
+
+    histories = [[] for _ in range(count)]
+
+    while playouts.step():
+        for game in np.flatnonzero(playouts.last_move[:, 0] != NO_MOVE):
+            histories[game].append(playouts.get_move(game))
+
+    winners = playouts.get_winners()
+    mismatches = 0
+
+    for game in range(count):
+        cards, companion_cards = make_cards(boards[game])
+        player1, player2 = Player('random_agent'), Player('random_agent')
+        turn, choose_companion, last_house = 1, False, None
+        valid = True
+
+        for move in histories[game]:
+            if choose_companion:
+                valid = isinstance(move, list) and validate_agent_move(cards, companion_cards, move)
+            else:
+                valid = move in get_possible_moves(cards)
+
+            if not valid:
+                break
+
+            turn, choose_companion, last_house = apply_move(cards, companion_cards, player1, player2, move, turn,
+                                                            choose_companion, last_house)
+
+        # The game is over when the replay ends, and both end in the same state
+        same = valid and not get_possible_moves(cards) and not choose_companion and \
+            [player1.get_counts(), player2.get_counts()] == playouts.counts[game].tolist() and \
+            [list(player1.get_banners().values()), list(player2.get_banners().values())] == \
+            playouts.banners[game].tolist() and calculate_winner(player1, player2) == winners[game]
+
+        if not same:
+            mismatches += 1
+
+            if mismatches <= 5:
+                print(f"Game {game} differs: {histories[game]}")
+
+    return mismatches
+
+
+def time_batched(count, seed):
+    '''
+    This function times a batch of random playouts.
+
+    Parameters:
+        count (int): number of games
+        seed (int): seed of the boards and moves
+
+    Returns:
+        seconds (float): time of the playouts
+        moves (int): number of moves made
+        winners (np.ndarray): the winner of each game
+    '''
+
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+
+    playouts = Playouts(make_boards(count, rng), rng)
+    winners = playouts.run()
+
+    return time.perf_counter() - start, playouts.moves, winners
+
+
+def time_sequential(duration, seed):
+    '''
+    This function plays random games one at a time with the game for a while.
+
+    Parameters:
+        duration (float): seconds to play for
+        seed (int): seed of the boards and moves
+
+    Returns:
+        seconds (float): time of the games
+        games (int): number of games played
+        winners (list): the winner of each game
+    '''
+
+    random.seed(seed)
+    winners = []
+    start = time.perf_counter()
+
+    while time.perf_counter() - start < duration:
+        cards, companion_cards = make_board()
+        winners.append(play_game(random_agent, random_agent, cards, companion_cards)[0])
+
+    return time.perf_counter() - start, len(winners), winners
+
+
+def main(args):
+    '''
+    This function checks and times the playouts.
+
+    Parameters:
+        args (Namespace): command line arguments
+    '''
+
+    if args.check:
+        mismatches = check_games(args.check, args.seed)
+        print(f"Replayed {args.check} games with the game: {mismatches} differ")
+
+    seconds, moves, winners = time_batched(args.games, args.seed)
+    batched = args.games / seconds * 60
+    print(f"Batched: {args.games} games, {moves} moves in {seconds:.2f} s, {batched:,.0f} playouts per minute, "
+          f"player 1 wins {np.mean(winners == 1):.3f}")
+
+    seconds, games, sequential_winners = time_sequential(args.duration, args.seed)
+    sequential = games / seconds * 60
+    print(f"One at a time: {games} games in {seconds:.2f} s, {sequential:,.0f} playouts per minute, "
+          f"player 1 wins {np.mean(np.array(sequential_winners) == 1):.3f}")
+
+    print(f"Speedup: {batched / sequential:.1f}x")
+
+    if args.check and mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
@@ -0,0 +1,115 @@
+import argparse
+import os
+import sys
+import time
+from os import pardir
+from os.path import abspath, join, dirname
+
+# Add the project folder to the path
+sys.path.append(abspath(join(dirname(abspath(__file__)), pardir)))
+
+import rebel_agent
+from utils.search_core import state_from_board, iterative_search
+from utils.smp import LazySMP, EXECUTORS, is_free_threaded
+from utils.transposition import TranspositionTable, DEFAULT_SIZE_MB
+from positions import POSITIONS_FILE, load_positions, position_from_dict
+
+parser = argparse.ArgumentParser(description="Measure the speedup of Lazy SMP over the search core alone")
+parser.add_argument('-p', '--positions', type=str, help="positions file", default=POSITIONS_FILE)
+parser.add_argument('-d', '--depth', type=int, help="depth of the searches", default=9)
+parser.add_argument('-j', '--cores', type=int, help="most searches at once (the main one and the helpers)",
+                    default=os.cpu_count())
+parser.add_argument('--executor', type=str, choices=EXECUTORS, help="run the helpers as processes or threads, "
+                    "chosen from the build of Python by default", default=None)
+parser.add_argument('--mb', type=float, help="memory of the table in MB", default=DEFAULT_SIZE_MB)
+
+
+def time_positions(positions, depth, table, smp):
+    '''
+    This function searches every position with a fresh table and times the searches.
+
+    Parameters:
+        positions (list): the positions
+        depth (int): depth of the searches
+        table (TranspositionTable): the table of the searches
+        smp (LazySMP): the helpers, None to search alone
+
+    Returns:
+        results (list): seconds, nodes, score and move of each position
+    '''
+
+    results = []
+
+    for position in positions:
+        state = position_from_dict(position)
+        arguments = (*state_from_board(state['cards'], state['player1'], state['player2']),
+                     len(state['companion_cards']) != 0, state['turn'], depth, rebel_agent.DEFAULT_WEIGHT,
+                     time.time() + 1e6)
+
+        table.clear()
+        start = time.perf_counter()
+
+        if smp is None:
+            score, move, nodes, _ = iterative_search(*arguments, table)
+        else:
+            score, move, nodes, _ = smp.search(*arguments)
+
+        results.append((time.perf_counter() - start, nodes, score, move))
+
+    return results
+
+
+def main(args):
+    '''
+    This function measures the speedup curve of Lazy SMP from one core to the given number.
+
+    Parameters:
+        args (Namespace): command line arguments
+    '''
+
+    # The cores search the card moves, companion choices are left to minimax_right
+    positions = [position for position in load_positions(args.positions) if not position['choose_companion']]
+    executor = args.executor or ('thread' if is_free_threaded() else 'process')
+
+    print(f"Lazy SMP to depth {args.depth} on {len(positions)} positions, helpers on the {executor} executor, "
+          f"{os.cpu_count()} cores")
+
+    table = TranspositionTable(args.mb)
+    baseline = None
+
+    try:
+        for cores in range(1, args.cores + 1):
+            smp = LazySMP(cores - 1, table, executor) if cores > 1 else None
+
+            try:
+                # Warm the helpers up, a process pool starts its processes on the first search
+                if smp is not None:
+                    time_positions(positions[:1], 1, table, smp)
+
+                results = time_positions(positions, args.depth, table, smp)
+
+            finally:
+                if smp is not None:
+                    smp.close()
+
+            if baseline is None:
+                baseline = results
+
+            seconds = sum(result[0] for result in results)
+            nodes = sum(result[1] for result in results)
+            base_seconds = sum(result[0] for result in baseline)
+            same = sum(result[2:] == base[2:] for result, base in zip(results, baseline))
+
+            print(f"{cores:2d} cores: {seconds:7.2f} s, {nodes:9d} nodes, {nodes / seconds:9,.0f} nodes/s, "
+                  f"speedup {base_seconds / seconds:5.2f}x, same score and move as one core on {same}/{len(results)}")
+
+            for position, (result, base) in zip(positions, zip(results, baseline)):
+                print(f"    {position['name']:<16} {result[0]:7.3f} s ({base[0] / result[0]:5.2f}x), "
+                      f"nodes {result[1]:8d}, score {result[2]:8.1f}, move {result[3]!s:>4}")
+
+    finally:
+        table.close()
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
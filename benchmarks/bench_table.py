@@ -0,0 +1,57 @@
+import argparse
+import sys
+import time
+from os import pardir
+from os.path import abspath, join, dirname
+
+# Add the project folder to the path
+sys.path.append(abspath(join(dirname(abspath(__file__)), pardir)))
+
+import rebel_agent
+from utils import search_core
+from utils.search_core import state_from_board
+from utils.transposition import TranspositionTable, DEFAULT_SIZE_MB
+from positions import POSITIONS_FILE, load_positions, position_from_dict
+
+parser = argparse.ArgumentParser(description="Compare the Python search core with and without a transposition table")
+parser.add_argument('-p', '--positions', type=str, help="positions file", default=POSITIONS_FILE)
+parser.add_argument('-d', '--depth', type=int, help="depth of the searches", default=6)
+parser.add_argument('--mb', type=float, help="memory of the table in MB", default=DEFAULT_SIZE_MB)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    table = TranspositionTable(args.mb)
+
+    try:
+        for position in load_positions(args.positions):
+            # The cores search the card moves, companion choices are left to minimax_right
+            if position['choose_companion']:
+                continue
+
+            state = position_from_dict(position)
+            arguments = (*state_from_board(state['cards'], state['player1'], state['player2']),
+                         len(state['companion_cards']) != 0, state['turn'], args.depth, rebel_agent.DEFAULT_WEIGHT,
+                         time.time() + 1e6)
+
+            start = time.perf_counter()
+            score, move, nodes = search_core.search(*arguments)
+            seconds = time.perf_counter() - start
+
+            # Iterative deepening with a fresh table, then the same search again, as another process would find it
+            table.clear()
+            start = time.perf_counter()
+            table_score, table_move, table_nodes, _ = search_core.iterative_search(*arguments, table)
+            table_seconds = time.perf_counter() - start
+
+            _, _, again_nodes, _ = search_core.iterative_search(*arguments, table)
+            stats = table.get_stats()
+
+            print(f"{position['name']:<16} score {score:8.1f}/{table_score:<8.1f} move {move!s:>4}/{table_move!s:<4} "
+                  f"nodes {nodes:8d} -> {table_nodes:8d} (speedup {seconds / table_seconds:5.2f}x), "
+                  f"again {again_nodes:6d}, hit rate {stats['hit_rate']:.1%}, occupancy {stats['occupancy']:.2%}, "
+                  f"collisions {stats['collisions']}, replacements {stats['replacements']}")
+
+    finally:
+        table.close()
@@ -0,0 +1,217 @@
+import argparse
+import copy
+import itertools
+import random
+import sys
+import time
+from os import pardir
+from os.path import abspath, join, dirname
+
+# Add the project folder to the path
+sys.path.append(abspath(join(dirname(abspath(__file__)), pardir)))
+
+import random_agent
+from main import make_board, apply_move, get_possible_moves, validate_agent_move, calculate_winner
+from utils.classes import Player, HOUSES
+from utils.terminal import is_terminal
+
+parser = argparse.ArgumentParser(description="Compare the banner mask winner and terminal check with the old ones")
+parser.add_argument('-g', '--games', type=int, help="number of random games to collect positions from", default=50)
+parser.add_argument('-r', '--repeat', type=int, help="number of passes over the positions", default=20)
+parser.add_argument('--seed', type=int, help="random seed", default=0)
+
+
+def legacy_calculate_winner(player1, player2):
+    '''
+    This function is the old calculate_winner, a chain of comparisons of the banner dictionaries.
+
+    Parameters:
+        player1 (Player): player 1
+        player2 (Player): player 2
+
+    Returns:
+        winner (int): 1 if player 1 wins, 2 if player 2 wins
+    '''
+
+    player1_banners = player1.get_banners()
+    player2_banners = player2.get_banners()
+
+    # Calculate the scores of the players
+    player1_score = sum(player1_banners.values())
+    player2_score = sum(player2_banners.values())
+
+    if player1_score > player2_score:
+        return 1
+
+    elif player2_score > player1_score:
+        return 2
+
+    # If the scores are the same, whoever has the banner of the house with the most cards wins
+    else:
+        if player1_banners['Stark'] > player2_banners['Stark']:
+            return 1
+
+        elif player2_banners['Stark'] > player1_banners['Stark']:
+            return 2
+
+        elif player1_banners['Greyjoy'] > player2_banners['Greyjoy']:
+            return 1
+
+        elif player2_banners['Greyjoy'] > player1_banners['Greyjoy']:
+            return 2
+
+        elif player1_banners['Lannister'] > player2_banners['Lannister']:
+            return 1
+
+        elif player2_banners['Lannister'] > player1_banners['Lannister']:
+            return 2
+
+        elif player1_banners['Targaryen'] > player2_banners['Targaryen']:
+            return 1
+
+        elif player2_banners['Targaryen'] > player1_banners['Targaryen']:
+            return 2
+
+        elif player1_banners['Baratheon'] > player2_banners['Baratheon']:
+            return 1
+
+        elif player2_banners['Baratheon'] > player1_banners['Baratheon']:
+            return 2
+
+        elif player1_banners['Tyrell'] > player2_banners['Tyrell']:
+            return 1
+
+        elif player2_banners['Tyrell'] > player1_banners['Tyrell']:
+            return 2
+
+        elif player1_banners['Tully'] > player2_banners['Tully']:
+            return 1
+
+        elif player2_banners['Tully'] > player1_banners['Tully']:
+            return 2
+
+
+def legacy_is_terminal(cards, companion_cards, choose_companion):
+    '''
+    This function is the old terminal check of the game loop, which lists the moves.
+    '''
+
+    return not get_possible_moves(cards) and (not choose_companion or len(companion_cards) == 0)
+
+
+def collect_positions(games):
+    '''
+    This function plays random games and collects the position after every move.
+
+    Parameters:
+        games (int): number of games to play
+
+    Returns:
+        positions (list): list of (cards, companion_cards, player1, player2, choose_companion) tuples
+    '''
+
+    positions = []
+
+    for _ in range(games):
+        cards, companion_cards = make_board()
+        player1, player2 = Player('random_agent'), Player('random_agent')
+        turn, choose_companion, last_house = 1, False, None
+
+        while not is_terminal(cards, companion_cards, choose_companion):
+            move = random_agent.get_move(cards, player1, player2, companion_cards, choose_companion)
+
+            # Ask again for invalid companion moves, as the game does
+            if choose_companion and not validate_agent_move(cards, companion_cards, move):
+                continue
+
+            turn, choose_companion, last_house = apply_move(cards, companion_cards, player1, player2, move, turn,
+                                                            choose_companion, last_house)
+
+            positions.append(copy.deepcopy((cards, companion_cards, player1, player2, choose_companion)))
+
+    return positions
+
+
+def all_banners():
+    '''
+    This function makes players with every combination of banners, each house held by player 1, player 2, both or
+    neither.
+
+    Returns:
+        players (list): list of (player1, player2) pairs
+    '''
+
+    players = []
+
+    for holders in itertools.product(range(4), repeat=len(HOUSES)):
+        player1, player2 = Player('player1'), Player('player2')
+
+        for house, holder in zip(HOUSES, holders):
+            if holder & 1:
+                player1.get_house_banner(house)
+
+            if holder & 2:
+                player2.get_house_banner(house)
+
+        players.append((player1, player2))
+
+    return players
+
+
+def time_calls(function, arguments, repeat):
+    '''
+    This function times a function over a list of arguments.
+
+    Parameters:
+        function (function): the function
+        arguments (list): tuples of arguments
+        repeat (int): number of passes over the arguments
+
+    Returns:
+        seconds (float): time per call in seconds
+    '''
+
+    start = time.perf_counter()
+
+    for _ in range(repeat):
+        for argument in arguments:
+            function(*argument)
+
+    return (time.perf_counter() - start) / (repeat * len(arguments))
+
+
+def main(args):
+    '''
+    This function checks that the new functions agree with the old ones and compares their speed.
+
+    Parameters:
+        args (Namespace): command line arguments
+    '''
+
+    random.seed(args.seed)
+
+    players = all_banners()
+    winner_mismatches = sum(calculate_winner(*pair) != legacy_calculate_winner(*pair) for pair in players)
+    print(f"Winner: {len(players)} banner combinations, {winner_mismatches} mismatches")
+
+    positions = collect_positions(args.games)
+    terminal_mismatches = sum(is_terminal(cards, companions, choose) != legacy_is_terminal(cards, companions, choose)
+                              for cards, companions, _, _, choose in positions)
+    print(f"Terminal: {len(positions)} positions, {terminal_mismatches} mismatches")
+
+    pairs = [(player1, player2) for _, _, player1, player2, _ in positions]
+    states = [(cards, companions, choose) for cards, companions, _, _, choose in positions]
+
+    for name, new, old, arguments in (('calculate_winner', calculate_winner, legacy_calculate_winner, pairs),
+                                      ('is_terminal', is_terminal, legacy_is_terminal, states)):
+        old_seconds = time_calls(old, arguments, args.repeat)
+        new_seconds = time_calls(new, arguments, args.repeat)
+        print(f"{name}: old {old_seconds * 1e9:.0f} ns, new {new_seconds * 1e9:.0f} ns, "
+              f"speedup {old_seconds / new_seconds:.1f}x")
+
+    if winner_mismatches or terminal_mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
@@ -0,0 +1,65 @@
+import argparse
+import json
+import sys
+
+parser = argparse.ArgumentParser(description="Compare two benchmark result files and flag slowdowns")
+parser.add_argument('base', type=str, help="result file of the old commit")
+parser.add_argument('new', type=str, help="result file of the new commit")
+parser.add_argument('-t', '--threshold', type=float, help="relative change counted as a slowdown", default=0.10)
+
+
+def compare(base, new, threshold):
+    '''
+    This function compares the metrics of two result files.
+
+    Parameters:
+        base (dict): results of the old commit
+        new (dict): results of the new commit
+        threshold (float): relative change counted as a slowdown
+
+    Returns:
+        rows (list): list of (metric, old value, new value, speedup, slower) tuples
+    '''
+
+    rows = []
+
+    for metric, old in base['metrics'].items():
+        if metric not in new['metrics'] or old['value'] == 0 or new['metrics'][metric]['value'] == 0:
+            continue
+
+        value = new['metrics'][metric]['value']
+
+        # Speedup is above 1 when the new commit is faster
+        if old['better'] == 'higher':
+            speedup = value / old['value']
+
+        else:
+            speedup = old['value'] / value
+
+        rows.append((metric, old['value'], value, speedup, speedup < 1 - threshold))
+
+    return rows
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    with open(args.base, 'r') as file:
+        base = json.load(file)
+
+    with open(args.new, 'r') as file:
+        new = json.load(file)
+
+    rows = compare(base, new, args.threshold)
+
+    print(f"{'metric':<40} {base['commit']:>14} {new['commit']:>14} {'speedup':>8}")
+
+    for metric, old_value, new_value, speedup, slower in rows:
+        print(f"{metric:<40} {old_value:14.4f} {new_value:14.4f} {speedup:7.2f}x" + ("  SLOWER" if slower else ""))
+
+    slowdowns = sum(1 for row in rows if row[4])
+
+    print(f"{slowdowns} of {len(rows)} metrics are more than {args.threshold:.0%} slower")
+
+    # Fail when there is a slowdown, so the comparison can be used in scripts
+    sys.exit(1 if slowdowns else 0)
@@ -0,0 +1,92 @@
+import argparse
+import json
+import random
+import sys
+from os import pardir
+from os.path import abspath, join, dirname
+
+# Add the project folder to the path
+sys.path.append(abspath(join(dirname(abspath(__file__)), pardir)))
+
+import random_agent
+from main import make_board, apply_move, get_possible_moves, validate_agent_move
+from utils.classes import Player
+from utils.snapshot import pack_state, write_snapshots
+from positions import POSITIONS_FILE, position_to_dict, position_from_dict
+
+parser = argparse.ArgumentParser(description="Make the curated benchmark positions")
+parser.add_argument('--seeds', type=int, nargs='+', help="seeds of the games to take positions from", default=[2, 4])
+parser.add_argument('-o', '--output', type=str, help="positions file (.json, or .snap for a snapshot file)",
+                    default=POSITIONS_FILE)
+
+# Phases of the game, as the number of cards left on the board when the position is taken
+PHASES = {'early': 33, 'mid': 22, 'end': 12}
+
+
+def take_positions(seed):
+    '''
+    This function plays a random game and takes one position of each phase, and one companion choice.
+
+    Parameters:
+        seed (int): seed of the game
+
+    Returns:
+        positions (list): list of position dictionaries
+    '''
+
+    random.seed(seed)
+
+    cards, companion_cards = make_board()
+    player1, player2 = Player('player1'), Player('player2')
+    turn, choose_companion, last_house = 1, False, None
+
+    positions = []
+    taken = set()  # Phases already taken
+
+    while get_possible_moves(cards) or (choose_companion and companion_cards):
+        if choose_companion:
+            phase = 'companion'
+
+        else:
+            # The latest phase the number of cards left has reached
+            phase = None
+
+            for name, cards_left in PHASES.items():
+                if len(cards) <= cards_left:
+                    phase = name
+
+        # Take the first position of each phase
+        if phase is not None and phase not in taken:
+            positions.append(position_to_dict(f'{phase}-{seed}', phase, cards, companion_cards, player1, player2,
+                                              turn, choose_companion, last_house))
+            taken.add(phase)
+
+        move = random_agent.get_move(cards, player1, player2, companion_cards, choose_companion)
+
+        # Ask again for invalid companion moves, as the game does
+        if choose_companion and not validate_agent_move(cards, companion_cards, move):
+            continue
+
+        turn, choose_companion, last_house = apply_move(cards, companion_cards, player1, player2, move, turn,
+                                                        choose_companion, last_house)
+
+    return positions
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    positions = []
+
+    for seed in args.seeds:
+        positions.extend(take_positions(seed))
+
+    if args.output.endswith('.snap'):
+        # Snapshot files keep only the states, the names are the indexes
+        write_snapshots(args.output, (pack_state(**position_from_dict(position)) for position in positions))
+
+    else:
+        with open(args.output, 'w') as file:
+            json.dump(positions, file, indent=4)
+
+    print(f"Saved {len(positions)} positions to {args.output}")
@@ -0,0 +1,107 @@
+import json
+import sys
+from os import pardir
+from os.path import abspath, join, dirname
+
+# Add the project folder to the path
+sys.path.append(abspath(join(dirname(abspath(__file__)), pardir)))
+
+from main import path
+from utils.classes import Card, Player, Board, HOUSES
+from utils.snapshot import SnapshotFile
+
+POSITIONS_FILE = join(dirname(abspath(__file__)), "positions.json")  # Curated benchmark positions
+
+
+def position_to_dict(name, phase, cards, companion_cards, player1, player2, turn, choose_companion, last_house):
+    '''
+    This function turns a game position into a dictionary that can be saved as JSON.
+
+    Parameters:
+        name (str): name of the position
+        phase (str): phase of the game (early, mid or end)
+        cards (Board): the cards on the board
+        companion_cards (dict): dictionary of companion cards
+        player1 (Player): player 1
+        player2 (Player): player 2
+        turn (int): the player to move
+        choose_companion (bool): whether the player to move must choose a companion card
+        last_house (str): house of the last chosen card
+
+    Returns:
+        position (dict): the position
+    '''
+
+    return {
+        'name': name,
+        'phase': phase,
+        'cards': [{'house': card.get_house(), 'name': card.get_name(), 'location': card.get_location()}
+                  for card in cards],
+        'companion_cards': list(companion_cards.keys()),
+        'player1': {'counts': list(player1.get_counts()), 'banners': [player1.get_banners()[house] for house in HOUSES]},
+        'player2': {'counts': list(player2.get_counts()), 'banners': [player2.get_banners()[house] for house in HOUSES]},
+        'turn': turn,
+        'choose_companion': choose_companion,
+        'last_house': last_house
+    }
+
+
+def position_from_dict(position):
+    '''
+    This function makes the game state of a saved position.
+
+    Parameters:
+        position (dict): the position
+
+    Returns:
+        state (dict): cards, companion_cards, player1, player2, turn, choose_companion and last_house
+    '''
+
+    cards = Board(Card(card['house'], card['name'], card['location']) for card in position['cards'])
+
+    # Take the remaining companion cards from the characters file
+    with open(join(path, "assets", "characters.json"), 'r') as file:
+        companions = json.load(file)['Companion']
+
+    companion_cards = {name: companions[name] for name in position['companion_cards']}
+
+    players = []
+
+    for key in ('player1', 'player2'):
+        player = Player(key)
+        player.set_counts(position[key]['counts'])
+
+        for house, banner in zip(HOUSES, position[key]['banners']):
+            if banner:
+                player.get_house_banner(house)
+
+        players.append(player)
+
+    return {
+        'cards': cards,
+        'companion_cards': companion_cards,
+        'player1': players[0],
+        'player2': players[1],
+        'turn': position['turn'],
+        'choose_companion': position['choose_companion'],
+        'last_house': position['last_house']
+    }
+
+
+def load_positions(filename=POSITIONS_FILE):
+    '''
+    This function loads the saved positions, from a JSON file or a snapshot file.
+
+    Parameters:
+        filename (str): the positions file
+
+    Returns:
+        positions (list): list of position dictionaries
+    '''
+
+    if filename.endswith('.snap'):
+        with SnapshotFile(filename) as file:
+            return [position_to_dict(f'snapshot-{i}', None, **file[i]) for i in range(len(file))]
+
+    with open(filename, 'r') as file:
+        return json.load(file)
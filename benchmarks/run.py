@@ -0,0 +1,265 @@
+import argparse
+import contextlib
+import copy
+import importlib
+import io
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from os import pardir, makedirs
+from os.path import abspath, join, dirname
+
+# Add the project folder to the path
+sys.path.append(abspath(join(dirname(abspath(__file__)), pardir)))
+
+import rebel_agent
+from main import path, make_board, make_move, update_banners, get_possible_moves, play_game
+from utils.boards import BoardPool
+from utils.evaluator import get_evaluator
+from utils.search_core import state_from_board
+from positions import POSITIONS_FILE, load_positions, position_from_dict
+
+RESULTS_PATH = join(dirname(abspath(__file__)), "results")  # Folder of the result files
+
+parser = argparse.ArgumentParser(description="Run the benchmark suite on the curated positions")
+parser.add_argument('-p', '--positions', type=str, help="positions file", default=POSITIONS_FILE)
+parser.add_argument('-d', '--depth', type=int, help="deepest search depth to time", default=4)
+parser.add_argument('--duration', type=float, help="seconds to run each throughput test", default=0.5)
+parser.add_argument('--agents', type=str, nargs='*', help="AI files to time full games of (against random_agent)",
+                    default=['random_agent', 'rebel_agent'])
+parser.add_argument('-s', '--search', type=str, choices=rebel_agent.SEARCHES, help="search of the rebel agent",
+                    default=rebel_agent.SEARCH)
+parser.add_argument('-g', '--games', type=int, help="number of full games per agent", default=1)
+parser.add_argument('--seed', type=int, help="random seed", default=0)
+parser.add_argument('--pool', type=str, help="board pool file to take the boards of the full games from, from the "
+                    "seed on", default=None)
+parser.add_argument('-o', '--output', type=str, help="result file (default: results/<commit>.json)", default=None)
+
+
+def get_commit():
+    '''
+    This function gets the current git commit of the project.
+
+    Returns:
+        commit (str): short hash of the commit, or 'unknown'
+    '''
+
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=path, capture_output=True, text=True,
+                              check=True).stdout.strip()
+
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def throughput(function, duration):
+    '''
+    This function calls a function repeatedly for a while.
+
+    Parameters:
+        function (function): function without arguments
+        duration (float): seconds to run
+
+    Returns:
+        rate (float): calls per second
+    '''
+
+    calls = 0
+    start = time.perf_counter()
+
+    while True:
+        # Check the time every 100 calls
+        for _ in range(100):
+            function()
+
+        calls += 100
+        elapsed = time.perf_counter() - start
+
+        if elapsed >= duration:
+            return calls / elapsed
+
+
+def search(state, depth):
+    '''
+    This function runs the rebel agent's search on a position.
+
+    Parameters:
+        state (dict): the game state
+        depth (int): depth of the search
+
+    Returns:
+        seconds (float): time of the search
+        nodes (int): number of searched nodes
+        extension_nodes (int): number of nodes searched past the depth limit
+    '''
+
+    # The search changes the state it is given, as get_move does
+    state = copy.deepcopy(state)
+
+    if rebel_agent.SEARCH == 'pvs':
+        start = time.perf_counter()
+
+        # Iterative deepening is part of the search, so the time includes the shallower iterations
+        with contextlib.redirect_stdout(io.StringIO()):
+            rebel_agent.iterative_pvs(state['cards'], state['turn'], state['player1'], state['player2'],
+                                      state['companion_cards'], state['choose_companion'], depth, time.time(),
+                                      rebel_agent.DEFAULT_WEIGHT)
+
+        return time.perf_counter() - start, rebel_agent.search_stats['nodes'], \
+            rebel_agent.search_stats['extension_nodes']
+
+    if rebel_agent.SEARCH == 'core' and not state['choose_companion']:
+        start = time.perf_counter()
+        _, _, nodes = rebel_agent.core_search(*state_from_board(state['cards'], state['player1'], state['player2']),
+                                              len(state['companion_cards']) != 0, state['turn'], depth,
+                                              rebel_agent.DEFAULT_WEIGHT, time.time() + rebel_agent.TIME_LIMIT)
+
+        return time.perf_counter() - start, nodes, 0
+
+    maxplayer = state['turn'] == 1
+    minimax = rebel_agent.minimax_right if state['choose_companion'] else rebel_agent.minimax
+
+    rebel_agent.reset_search_stats(depth)
+    start = time.perf_counter()
+
+    # Hide the prints of the search
+    with contextlib.redirect_stdout(io.StringIO()):
+        minimax(state['cards'], maxplayer, -float("inf"), float("inf"), state['player1'], state['player2'], time.time(),
+                depth, state['companion_cards'], False, rebel_agent.DEFAULT_WEIGHT)
+
+    return time.perf_counter() - start, rebel_agent.search_stats['nodes'], rebel_agent.search_stats['extension_nodes']
+
+
+def measure_position(position, args):
+    '''
+    This function measures the metrics of one position.
+
+    Parameters:
+        position (dict): the position
+        args (Namespace): command line arguments
+
+    Returns:
+        metrics (dict): metrics of the position
+    '''
+
+    state = position_from_dict(position)
+    cards, player1, player2 = state['cards'], state['player1'], state['player2']
+
+    metrics = {}
+
+    random.seed(args.seed)
+
+    metrics['movegen_per_sec'] = throughput(lambda: get_possible_moves(cards), args.duration), 'higher'
+
+    moves = get_possible_moves(cards)
+
+    if moves:
+        def expand():
+            # Make a child position of every move, as the search does
+            for move in moves:
+                cards_copy, player1_copy, player2_copy = copy.deepcopy((cards, player1, player2))
+                selected_house = make_move(cards_copy, move, player1_copy if state['turn'] == 1 else player2_copy)
+                update_banners(player1_copy, player2_copy, selected_house, state['turn'])
+
+        metrics['children_per_sec'] = throughput(expand, args.duration) * len(moves), 'higher'
+
+    metrics['evaluate_per_sec'] = throughput(
+        lambda: rebel_agent.evaluate_board(cards, player1, player2, state['companion_cards'], state['choose_companion'],
+                                           rebel_agent.DEFAULT_WEIGHT), args.duration), 'higher'
+
+    total_seconds, total_nodes, total_extension_nodes = 0, 0, 0
+
+    # Count the cache hits of the searches only
+    evaluator = get_evaluator(rebel_agent.DEFAULT_WEIGHT)
+    evaluator.clear()
+
+    for depth in range(1, args.depth + 1):
+        random.seed(args.seed)
+
+        seconds, nodes, extension_nodes = search(state, depth)
+        metrics[f'time_to_depth_{depth}'] = seconds, 'lower'
+
+        total_seconds += seconds
+        total_nodes += nodes
+        total_extension_nodes += extension_nodes
+
+    metrics['nodes_per_sec'] = total_nodes / total_seconds, 'higher'
+    metrics['extension_share'] = total_extension_nodes / total_nodes, 'lower'
+    metrics['eval_hit_rate'] = evaluator.get_stats()['hit_rate'], 'higher'
+
+    return metrics
+
+
+def measure_games(agent_name, args):
+    '''
+    This function times full games of an agent against the random agent.
+
+    Parameters:
+        agent_name (str): name of the AI file
+        args (Namespace): command line arguments
+
+    Returns:
+        seconds (float): average wall time of a game
+    '''
+
+    agent = importlib.import_module(agent_name)
+    opponent = importlib.import_module('random_agent')
+
+    pool = BoardPool(args.pool, args.seed) if args.pool else None
+    total = 0
+
+    for game in range(args.games):
+        random.seed(args.seed + game)
+        cards, companion_cards = pool.draw() if pool is not None else make_board()
+
+        start = time.perf_counter()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            play_game(agent, opponent, cards, companion_cards, agent_name, 'random_agent')
+
+        total += time.perf_counter() - start
+
+    return total / args.games
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    commit = get_commit()
+
+    rebel_agent.SEARCH = args.search
+
+    results = {
+        'commit': commit,
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'settings': {'depth': args.depth, 'duration': args.duration, 'games': args.games, 'seed': args.seed,
+                     'search': args.search},
+        'metrics': {}
+    }
+
+    for position in load_positions(args.positions):
+        for metric, (value, better) in measure_position(position, args).items():
+            results['metrics'][position['name'] + '/' + metric] = {'value': value, 'better': better}
+            print(f"{position['name'] + '/' + metric:<40} {value:14.4f}")
+
+    for agent_name in args.agents:
+        value = measure_games(agent_name, args)
+        results['metrics']['game/' + agent_name] = {'value': value, 'better': 'lower'}
+        print(f"{'game/' + agent_name:<40} {value:14.4f}")
+
+    output = args.output
+
+    if output is None:
+        makedirs(RESULTS_PATH, exist_ok=True)
+        output = join(RESULTS_PATH, commit + '.json')
+
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=4)
+
+    print(f"Saved the results to {output}")
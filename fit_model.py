@@ -0,0 +1,254 @@
+import argparse
+import csv
+import glob
+import os
+import time
+
+import numpy as np
+
+from main import apply_move, path
+from rebel_agent import DEFAULT_WEIGHT
+from utils.classes import HOUSES
+from utils.evaluator import HOUSE_SIZES
+from utils.model import make_features, extract_features, LinearModel, save_weights, load_weights, WEIGHTS_FILE, \
+    FEATURES
+from utils.record import read_games
+from utils.snapshot import unpack_state
+
+parser = argparse.ArgumentParser(description="Fit the learned evaluation of A Game of Thrones: Hand of the King")
+parser.add_argument('--records', type=str, nargs='*', help="record files of played games (main.py -r), every position "
+                    "of the games is fitted", default=sorted(glob.glob(os.path.join(path, "records", "*.rec"))))
+parser.add_argument('--logs', type=str, nargs='*', help="training logs of Train.py, only the final positions of the "
+                    "games", default=[])
+parser.add_argument('-o', '--output', type=str, help="weights file to write", default=WEIGHTS_FILE)
+parser.add_argument('--l2', type=float, help="L2 penalty of the coefficients", default=1.0)
+parser.add_argument('--test', type=float, help="share of the positions held out to test the model", default=0.2)
+parser.add_argument('--seed', type=int, help="seed of the held out split", default=0)
+parser.add_argument('--iterations', type=int, help="most Newton steps of the fit", default=50)
+parser.add_argument('--logged-weight', action='store_true',
+                    help="save the weights of the last logged game instead of the ones of the weights file")
+
+LOG_COLUMNS = 7 * 4 + 9 + 2  # Banners and counts of both players, the weights, the winner and the score
+
+# Features that only vary before the end of a game. In final positions Varys has no moves, there are no companion
+# choices and the cards on the board are the ones nobody took, so they are left out of fits to final positions alone
+FINAL_CONSTANT = tuple(['mobility', 'companions_left'] + [f'board_{house}' for house in HOUSES])
+
+
+def read_logs(filename):
+    '''
+    This function reads the final positions of the games of a training log.
+
+    Parameters:
+        filename (str): the training log
+
+    Returns:
+        features (list): the feature vector of each game
+        wins (list): 1 if player 1 won the game, 0 otherwise
+        weight (list/None): the weights of the last game, None if the log is empty
+    '''
+
+    features, wins, weight = [], [], None
+
+    with open(filename, newline='') as file:
+        for row in csv.reader(file):
+            if len(row) != LOG_COLUMNS:
+                continue
+
+            values = [int(float(value)) for value in row]
+            banners1, banners2, counts1, counts2 = values[0:7], values[7:14], values[14:21], values[21:28]
+
+            # The log only keeps the counts and banners, the game is over so Varys has no moves and the cards left on
+            # the board are the ones nobody took (less the ones Jaqen removed)
+            board_counts = [size - count1 - count2 for size, count1, count2 in zip(HOUSE_SIZES, counts1, counts2)]
+
+            features.append(make_features(counts1, counts2, banners1, banners2, 0, False, board_counts))
+            wins.append(1 if values[37] == 1 else 0)
+            weight = values[28:37]
+
+    return features, wins, weight
+
+
+def read_records(filename):
+    '''
+    This function replays the games of a record file and takes the position after every move.
+
+    Parameters:
+        filename (str): the record file
+
+    Returns:
+        features (list): the feature vector of each position
+        wins (list): 1 if player 1 won the game of the position, 0 otherwise
+    '''
+
+    features, wins = [], []
+
+    for game in read_games(filename):
+        if game['winner'] is None:
+            continue
+
+        state = unpack_state(game['start'], game['player1'], game['player2'])
+        cards, companion_cards, player1, player2 = state['cards'], state['companion_cards'], state['player1'], \
+            state['player2']
+        turn, choose_companion, last_house = state['turn'], state['choose_companion'], state['last_house']
+
+        for _, move in game['moves']:
+            turn, choose_companion, last_house = apply_move(cards, companion_cards, player1, player2, move, turn,
+                                                            choose_companion, last_house)
+
+            features.append(extract_features(cards, player1, player2, companion_cards))
+            wins.append(1 if game['winner'] == 1 else 0)
+
+    return features, wins
+
+
+def mirror(features):
+    '''
+    This function swaps the players of feature vectors, so the data does not favor either player.
+
+    Parameters:
+        features (np.ndarray): feature vectors, one row each
+
+    Returns:
+        mirrored (np.ndarray): the feature vectors seen by the other player
+    '''
+
+    mirrored = features.copy()
+    mirrored[:, 0:7], mirrored[:, 7:14] = features[:, 7:14], features[:, 0:7]
+    mirrored[:, 14:21], mirrored[:, 21:28] = features[:, 21:28], features[:, 14:21]
+
+    return mirrored
+
+
+def fit(features, wins, l2, iterations, dropped=()):
+    '''
+    This function fits a logistic regression of the wins with Newton's method.
+
+    Parameters:
+        features (np.ndarray): feature vectors, one row each
+        wins (np.ndarray): 1 for a win of player 1, 0 otherwise
+        l2 (float): L2 penalty of the coefficients (the bias is not penalized)
+        iterations (int): most Newton steps
+        dropped (tuple): names of the features left out of the fit, their coefficients are 0
+
+    Returns:
+        model (LinearModel): the fitted model
+    '''
+
+    columns = [i for i, name in enumerate(FEATURES) if name not in dropped]
+    inputs = np.hstack([features[:, columns], np.ones((len(features), 1))])
+    penalty = np.full(inputs.shape[1], l2)
+    penalty[-1] = 0
+    params = np.zeros(inputs.shape[1])
+
+    for _ in range(iterations):
+        probabilities = 1 / (1 + np.exp(-inputs @ params))
+
+        gradient = inputs.T @ (probabilities - wins) + penalty * params
+        hessian = (inputs.T * (probabilities * (1 - probabilities))) @ inputs + np.diag(penalty) + 1e-9 * np.eye(
+            len(params))
+
+        step = np.linalg.solve(hessian, gradient)
+        params -= step
+
+        if np.abs(step).max() < 1e-8:
+            break
+
+    coefficients = np.zeros(len(FEATURES))
+    coefficients[columns] = params[:-1]
+
+    return LinearModel(coefficients, params[-1])
+
+
+def measure(model, features, wins):
+    '''
+    This function measures how well a model predicts the winners.
+
+    Parameters:
+        model (LinearModel): the model
+        features (np.ndarray): feature vectors, one row each
+        wins (np.ndarray): 1 for a win of player 1, 0 otherwise
+
+    Returns:
+        accuracy (float): share of the positions with the winner predicted
+        log_loss (float): mean negative log-likelihood of the winners
+    '''
+
+    probabilities = np.clip(model.win_probability(features), 1e-12, 1 - 1e-12)
+    accuracy = float(np.mean((probabilities > 0.5) == (wins == 1)))
+    log_loss = float(-np.mean(wins * np.log(probabilities) + (1 - wins) * np.log(1 - probabilities)))
+
+    return accuracy, log_loss
+
+
+def main(args):
+    '''
+    This function fits the model to the logged games and writes the weights file.
+
+    Parameters:
+        args (Namespace): command line arguments
+    '''
+
+    features, wins, weight = [], [], None
+    positions = 0  # Positions of the record files, the logs only have final positions
+
+    for filename in args.logs:
+        log_features, log_wins, log_weight = read_logs(filename)
+        features += log_features
+        wins += log_wins
+        weight = log_weight or weight
+
+    for filename in args.records:
+        record_features, record_wins = read_records(filename)
+        features += record_features
+        wins += record_wins
+        positions += len(record_features)
+
+    if not features:
+        print("No positions to fit, record games with python main.py -r <name> or give training logs with --logs.")
+        return
+
+    # A model of final positions alone can not rank the positions of a game the search evaluates
+    dropped = () if positions else FINAL_CONSTANT
+
+    if dropped:
+        print("Warning: only the final positions of training logs, the model can not rank the positions before the end "
+              "of a game. Fitting without " + ", ".join(dropped) + ".")
+
+    features, wins = np.array(features), np.array(wins, dtype=float)
+
+    # Hold out a share of the positions to test the model
+    order = np.random.default_rng(args.seed).permutation(len(features))
+    held_out = int(len(features) * args.test)
+    test, train = order[:held_out], order[held_out:]
+
+    start = time.perf_counter()
+    model = fit(np.vstack([features[train], mirror(features[train])]),
+                np.concatenate([wins[train], 1 - wins[train]]), args.l2, args.iterations, dropped)
+    seconds = time.perf_counter() - start
+
+    info = {'positions': len(features), 'record_positions': positions, 'l2': args.l2, 'seconds': seconds}
+    info['train_accuracy'], info['train_log_loss'] = measure(model, features[train], wins[train])
+
+    if held_out:
+        info['test_accuracy'], info['test_log_loss'] = measure(model, features[test], wins[test])
+
+    # Keep the weights already in the file, or take the ones of the last logged game (the latest of Train.py)
+    if not args.logged_weight or weight is None:
+        weight = load_weights(args.output)[0] if os.path.exists(args.output) else DEFAULT_WEIGHT
+
+    save_weights(args.output, weight, model, info)
+
+    print(f"Fitted {len(FEATURES) - len(dropped)} features to {len(features)} positions in {seconds * 1000:.1f} ms")
+
+    for key, value in info.items():
+        print(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}")
+
+    for name, coefficient in sorted(zip(FEATURES, model.coefficients), key=lambda item: -abs(item[1]))[:len(HOUSES)]:
+        print(f"{name:24} {coefficient:+.3f}")
+
+    print(f"Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
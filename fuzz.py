@@ -0,0 +1,551 @@
+import argparse
+import copy
+import json
+import sys
+import time
+
+import numpy as np
+
+from main import apply_move, get_possible_moves, validate_agent_move, set_banners, calculate_winner
+from utils.classes import Player, HOUSES, HOUSE_NAMES
+from utils.playout import Playouts, make_boards, make_cards, encode_move, COMPANIONS, LOCATIONS
+from utils.search_core import Searcher, state_from_board, LINE_MASKS, NO_HOUSE, EMPTY
+
+parser = argparse.ArgumentParser(description="Fuzz the game engines of A Game of Thrones: Hand of the King against the "
+                                             "rules of the game")
+parser.add_argument('-e', '--engines', type=str, nargs='+', help="engines to check against the game",
+                    default=['playout', 'core'])
+parser.add_argument('-n', '--games', type=int, help="number of random games", default=1000)
+parser.add_argument('--seed', type=int, help="seed of the first game", default=0)
+parser.add_argument('-o', '--output', type=str, help="file to save the reproducer of a divergence to",
+                    default='fuzz_failure.json')
+parser.add_argument('--replay', type=str, help="reproducer file to run again instead of fuzzing", default=None)
+
+
+class ReferenceEngine:
+    '''
+    This class is the game itself, the functions of main.py on Board and Player objects, which the other engines
+    must match.
+    '''
+
+    def __init__(self, board):
+        '''
+        This function sets up a game.
+
+        Parameters:
+            board (np.ndarray): house code at each location (NO_HOUSE for Varys, EMPTY for none)
+        '''
+
+        self.cards, self.companion_cards = make_cards(board)
+        self.player1, self.player2 = Player('player1'), Player('player2')
+        self.turn, self.choose_companion, self.last_house = 1, False, None
+
+    def apply(self, move, reference=None):
+        '''
+        This function makes a move, as the game does.
+
+        Parameters:
+            move (int/list): the move
+            reference (ReferenceEngine): unused, the reference is this game
+        '''
+
+        turn = self.turn
+        self.turn, self.choose_companion, self.last_house = apply_move(self.cards, self.companion_cards, self.player1,
+                                                                       self.player2, move, self.turn,
+                                                                       self.choose_companion, self.last_house)
+        self.last_turn = turn
+
+    def is_over(self):
+        '''
+        This function checks if the game is over, as play_game does.
+
+        Returns:
+            over (bool): True if the player to move has no moves left
+        '''
+
+        return not get_possible_moves(self.cards) and not (self.choose_companion and self.companion_cards)
+
+    def random_move(self, rng):
+        '''
+        This function picks a random legal move, every card and every companion choice with some chance.
+
+        Parameters:
+            rng (np.random.Generator): the random generator
+
+        Returns:
+            move (int/list): the move
+        '''
+
+        if not self.choose_companion:
+            return int(rng.choice(get_possible_moves(self.cards)))
+
+        companion = str(rng.choice(list(self.companion_cards)))
+        choices = self.companion_cards[companion]['Choice']
+
+        # Ramsay may swap Varys too, the others choose among the other cards
+        locations = [card.get_location() for card in self.cards if companion == 'Ramsay' or card.house_code != NO_HOUSE]
+        move = [companion] + [int(location) for location in rng.choice(locations, min(choices, 2), replace=False)]
+
+        if companion == 'Jaqen':
+            move.append(str(rng.choice([other for other in self.companion_cards if other != 'Jaqen'])))
+
+        return move
+
+    def get_state(self):
+        '''
+        This function gets the full state of the game.
+
+        Returns:
+            state (dict): houses, counts, banners, companions, turn, choose_companion, moves and winner
+        '''
+
+        houses, counts1, counts2, banners1, banners2 = state_from_board(self.cards, self.player1, self.player2)
+
+        return {
+            'houses': houses,
+            'counts': [counts1, counts2],
+            'banners': [[int(banner) for banner in banners1], [int(banner) for banner in banners2]],
+            'companions': sorted(self.companion_cards),
+            'turn': self.turn,
+            'choose_companion': self.choose_companion,
+            'moves': sorted(get_possible_moves(self.cards)),
+            'winner': calculate_winner(self.player1, self.player2)
+        }
+
+    def check(self):
+        '''
+        This function checks that the banners kept move by move are the banners set_banners gives.
+
+        Returns:
+            errors (list): the failed checks
+        '''
+
+        if self.last_house is None:
+            return []
+
+        player1, player2 = copy.deepcopy((self.player1, self.player2))
+        set_banners(player1, player2, self.last_house, self.last_turn)
+
+        if player1.get_banners() != self.player1.get_banners() or player2.get_banners() != self.player2.get_banners():
+            return ['set_banners']
+
+        return []
+
+
+class PlayoutEngine:
+    '''
+    This class checks the batched random playouts of utils/playout.py, with one game.
+    '''
+
+    def __init__(self, board):
+        '''
+        This function sets up a game.
+
+        Parameters:
+            board (np.ndarray): house code at each location (NO_HOUSE for Varys, EMPTY for none)
+        '''
+
+        self.playouts = Playouts(board[None], np.random.default_rng(0))
+        self.game = np.zeros(1, dtype=np.intp)
+
+    def apply(self, move, reference):
+        '''
+        This function makes a move.
+
+        Parameters:
+            move (int/list): the move
+            reference (ReferenceEngine): the game, after the move
+        '''
+
+        if self.playouts.choose_companion[0]:
+            self.playouts.make_companion_moves(self.game, np.array([encode_move(move)]))
+        else:
+            self.playouts.make_moves(self.game, np.array([move]))
+
+    def get_state(self):
+        '''
+        This function gets the full state of the game.
+
+        Returns:
+            state (dict): houses, counts, banners, companions, turn, choose_companion, moves and winner
+        '''
+
+        playouts = self.playouts
+
+        return {
+            'houses': playouts.boards[0].tolist(),
+            'counts': playouts.counts[0].tolist(),
+            'banners': playouts.banners[0].astype(int).tolist(),
+            'companions': sorted(COMPANIONS[i] for i in np.flatnonzero(playouts.companions[0])),
+            'turn': int(playouts.turn[0]) + 1,
+            'choose_companion': bool(playouts.choose_companion[0]),
+            'moves': np.flatnonzero(playouts.get_legal_moves()[0]).tolist(),
+            'winner': int(playouts.get_winners()[0]) or None
+        }
+
+    def check(self):
+        '''
+        This function has no checks of its own.
+
+        Returns:
+            errors (list): the failed checks
+        '''
+
+        return []
+
+
+class CoreEngine:
+    '''
+    This class checks the make and unmake moves of the search core of utils/search_core.py. The core only makes card
+    moves, so it is set up again from the game after companion moves, and it does not keep the turn or the companion
+    cards, only whether some are left. Like minimax, it starts a companion choice when a move empties a house while
+    companion cards are left, before the game drops the ones that cannot be used, so its choices are not compared.
+    '''
+
+    def __init__(self, board):
+        '''
+        This function sets up a game.
+
+        Parameters:
+            board (np.ndarray): house code at each location (NO_HOUSE for Varys, EMPTY for none)
+        '''
+
+        empty = [0] * len(HOUSES)
+        self.searcher = Searcher(board.tolist(), empty, empty, empty, empty, True, [0] * 9, float("inf"))
+        self.turn = 1
+        self.errors = []
+
+    def load(self, reference):
+        '''
+        This function sets the core up again from the state of the game.
+
+        Parameters:
+            reference (ReferenceEngine): the game
+        '''
+
+        self.searcher = Searcher(*state_from_board(reference.cards, reference.player1, reference.player2),
+                                 len(reference.companion_cards) != 0, [0] * 9, float("inf"))
+        self.turn = reference.turn
+
+    def get_houses(self):
+        '''
+        This function gets the house code at each location from the masks of the core.
+
+        Returns:
+            houses (list): house code at each location (NO_HOUSE for Varys, EMPTY for none)
+        '''
+
+        houses = [EMPTY] * LOCATIONS
+
+        for house, mask in enumerate(self.searcher.masks):
+            for location in range(LOCATIONS):
+                if mask >> location & 1:
+                    houses[location] = house
+
+        return houses
+
+    def apply(self, move, reference):
+        '''
+        This function makes a card move, and checks that taking it back restores the position.
+
+        Parameters:
+            move (int/list): the move
+            reference (ReferenceEngine): the game, after the move
+        '''
+
+        if isinstance(move, list):
+            self.load(reference)
+            return
+
+        before = self.get_state()
+        undo, _ = self.searcher.make_move(move, self.turn)
+        self.searcher.unmake_move(undo, self.turn)
+
+        if self.get_state() != before:
+            self.errors.append('unmake_move')
+
+        self.searcher.make_move(move, self.turn)
+
+        # The core keeps neither the turn nor the companion cards, so it takes them from the game
+        self.turn = reference.turn
+        self.searcher.companions_left = len(reference.companion_cards) != 0
+
+    def get_state(self):
+        '''
+        This function gets the part of the state the core keeps.
+
+        Returns:
+            state (dict): houses, counts, banners and moves
+        '''
+
+        searcher = self.searcher
+        moves = searcher.get_occupied() & LINE_MASKS[searcher.varys]
+
+        return {
+            'houses': self.get_houses(),
+            'counts': [list(counts) for counts in searcher.counts],
+            'banners': [[int(banner) for banner in banners] for banners in searcher.banners],
+            'moves': [location for location in range(LOCATIONS) if moves >> location & 1]
+        }
+
+    def check(self):
+        '''
+        This function reports the failed checks of the moves made so far.
+
+        Returns:
+            errors (list): the failed checks
+        '''
+
+        return self.errors
+
+
+ENGINES = {'playout': PlayoutEngine, 'core': CoreEngine}  # Engines checked against the game
+
+
+def compare(expected, actual):
+    '''
+    This function compares the state of the game with the state of an engine, on the parts the engine keeps.
+
+    Parameters:
+        expected (dict): the state of the game
+        actual (dict): the state of the engine
+
+    Returns:
+        fields (list): the parts of the states that differ
+    '''
+
+    return [field for field in actual if actual[field] != expected[field]]
+
+
+def play(engine_class, board, moves=None, rng=None):
+    '''
+    This function plays a game with the game and an engine in lockstep, comparing their states after every move.
+
+    Parameters:
+        engine_class (class): the engine
+        board (np.ndarray): the starting board
+        moves (list): the moves to make, None for random moves until the game is over
+        rng (np.random.Generator): the random generator of the moves
+
+    Returns:
+        moves (list): the moves made, up to the first divergence
+        divergence (dict/None): the move and the parts of the states that differ, None if the engine agrees
+    '''
+
+    reference, engine = ReferenceEngine(board), engine_class(board)
+    made = []
+
+    fields = compare(reference.get_state(), engine.get_state())
+
+    if fields:
+        return made, {'move': None, 'fields': fields}
+
+    while True:
+        if moves is None:
+            if reference.is_over():
+                break
+
+            move = reference.random_move(rng)
+
+        elif len(made) < len(moves):
+            move = moves[len(made)]
+
+        else:
+            break
+
+        made.append(move)
+        reference.apply(move)
+        engine.apply(move, reference)
+
+        fields = compare(reference.get_state(), engine.get_state()) + reference.check() + engine.check()
+
+        if fields:
+            return made, {'move': len(made) - 1, 'fields': fields}
+
+    return made, None
+
+
+def is_legal(board, moves):
+    '''
+    This function checks that the game can make a list of moves from a board.
+
+    Parameters:
+        board (np.ndarray): the starting board
+        moves (list): the moves
+
+    Returns:
+        legal (bool): True if every move is legal
+    '''
+
+    reference = ReferenceEngine(board)
+
+    for move in moves:
+        if reference.choose_companion:
+            # Jaqen's companion card must be left too
+            legal = isinstance(move, list) and validate_agent_move(reference.cards, reference.companion_cards, move) \
+                and (move[0] != 'Jaqen' or move[-1] in reference.companion_cards)
+        else:
+            legal = not isinstance(move, list) and move in get_possible_moves(reference.cards)
+
+        if not legal:
+            return False
+
+        reference.apply(move)
+
+    return True
+
+
+def shrink(engine_class, board, moves):
+    '''
+    This function shrinks a divergence: it drops moves and cards for as long as the game still allows the moves and
+    the engine still diverges.
+
+    Parameters:
+        engine_class (class): the engine
+        board (np.ndarray): the starting board
+        moves (list): the moves up to the divergence
+
+    Returns:
+        board (np.ndarray): the smallest board found
+        moves (list): the fewest moves found
+        divergence (dict): the divergence of the smallest case
+    '''
+
+    def diverges(candidate_board, candidate_moves):
+        if not is_legal(candidate_board, candidate_moves):
+            return None
+
+        made, divergence = play(engine_class, candidate_board, candidate_moves)
+
+        # Only a divergence at the last move keeps the case as small as its moves
+        return divergence if divergence is not None and len(made) == len(candidate_moves) else None
+
+    divergence = diverges(board, moves)
+    shrunk = True
+
+    while shrunk:
+        shrunk = False
+
+        # Drop moves, the companion moves and the card moves of the start
+        for i in range(len(moves) - 1):
+            candidate = moves[:i] + moves[i + 1:]
+            result = diverges(board, candidate)
+
+            if result is not None:
+                moves, divergence, shrunk = candidate, result, True
+                break
+
+        if shrunk:
+            continue
+
+        # Drop cards, but not Varys
+        for location in range(LOCATIONS):
+            if board[location] in (EMPTY, NO_HOUSE):
+                continue
+
+            candidate = board.copy()
+            candidate[location] = EMPTY
+            result = diverges(candidate, moves)
+
+            if result is not None:
+                board, divergence, shrunk = candidate, result, True
+
+    return board, moves, divergence
+
+
+def draw(board):
+    '''
+    This function draws a board as text, with the first two letters of the house of each card.
+
+    Parameters:
+        board (np.ndarray): house code at each location (NO_HOUSE for Varys, EMPTY for none)
+
+    Returns:
+        text (str): the board, one row per line
+    '''
+
+    names = ['..' if house == EMPTY else 'Va' if house == NO_HOUSE else HOUSE_NAMES[house][:2] for house in board]
+
+    return '\n'.join(' '.join(names[row * 6:row * 6 + 6]) for row in range(6))
+
+
+def report(engine_name, board, moves, divergence, output):
+    '''
+    This function prints a divergence and saves its reproducer.
+
+    Parameters:
+        engine_name (str): name of the engine
+        board (np.ndarray): the starting board
+        moves (list): the moves
+        divergence (dict): the divergence
+        output (str): the reproducer file
+    '''
+
+    reference, engine = ReferenceEngine(board), ENGINES[engine_name](board)
+
+    for move in moves:
+        reference.apply(move)
+        engine.apply(move, reference)
+
+    expected, actual = reference.get_state(), engine.get_state()
+
+    print(f"{engine_name} diverges at move {divergence['move']} of {moves}: {', '.join(divergence['fields'])}")
+    print(draw(board))
+
+    for field in divergence['fields']:
+        if field in actual:
+            print(f"{field}: game {expected[field]}, {engine_name} {actual[field]}")
+
+    with open(output, 'w') as file:
+        json.dump({'engine': engine_name, 'board': board.tolist(), 'moves': moves}, file)
+
+    print(f"Saved the reproducer to {output}")
+
+
+def main(args):
+    '''
+    This function fuzzes the engines, or runs a saved reproducer again.
+
+    Parameters:
+        args (Namespace): command line arguments
+    '''
+
+    if args.replay is not None:
+        with open(args.replay) as file:
+            case = json.load(file)
+
+        board = np.array(case['board'], dtype=np.int8)
+        made, divergence = play(ENGINES[case['engine']], board, case['moves'])
+
+        if divergence is None:
+            print(f"{case['engine']} agrees with the game")
+        else:
+            report(case['engine'], board, made, divergence, args.replay)
+            sys.exit(1)
+
+        return
+
+    for engine_name in args.engines:
+        start = time.perf_counter()
+        total = 0
+
+        for game in range(args.games):
+            rng = np.random.default_rng([args.seed, game])
+            board = make_boards(1, rng)[0]
+
+            moves, divergence = play(ENGINES[engine_name], board, rng=rng)
+            total += len(moves)
+
+            if divergence is not None:
+                print(f"Game {game} diverges, shrinking it")
+                board, moves, divergence = shrink(ENGINES[engine_name], board, moves)
+                report(engine_name, board, moves, divergence, args.output)
+                sys.exit(1)
+
+        seconds = time.perf_counter() - start
+        print(f"{engine_name}: {args.games} games, {total} moves checked in {seconds:.1f} s "
+              f"({total / seconds:,.0f} moves per second), no divergence")
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
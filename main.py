@@ -1,11 +1,13 @@
 import argparse
+import asyncio
+import functools
 import importlib
-import concurrent.futures
 import random
 import utils.pygraphics as pygraphics
 from os import name as os_name
 from os import system as os_system
-from os.path import abspath, join, dirname
+from os import makedirs
+from os.path import abspath, join, dirname, exists
 import sys
 import json
 import copy
@@ -14,7 +16,14 @@ import copy
 sys.path.append(join(dirname(abspath(__file__)), "utils"))
 
 # Import the utils
-from utils.classes import Card, Player
+from utils.classes import Card, Player, Board, HOUSES, VARYS
+from utils.agent_worker import AgentWorker
+from utils.snapshot import pack_state, save_snapshot, unpack_state, SnapshotFile
+from utils.record import append_game
+from utils.frames import FRAME_STORAGES
+from utils.transposition import TranspositionTable
+from utils.terminal import get_winner, is_terminal
+from utils.boards import BoardPool
 
 # Set the path of the file
 path = dirname(abspath(__file__))
@@ -24,10 +33,26 @@ TIMEOUT = 10  # Time limit for the AI agent
 parser = argparse.ArgumentParser(description="A Game of Thrones: Hand of the King")
 parser.add_argument('--player1', metavar='p1', type=str, help="either human or an AI file", default='rebel_agent')
 parser.add_argument('--player2', metavar='p2', type=str, help="either human or an AI file", default='random_agent')
-parser.add_argument('-l', '--load', type=str, help="file containing starting board setup (for repeatability)",
+parser.add_argument('-l', '--load', type=str,
+                    help="file containing starting board setup (for repeatability) or game snapshot (to resume)",
                     default=None)
+parser.add_argument('-i', '--index', type=int, help="position to resume from in a snapshot file", default=0)
 parser.add_argument('-s', '--save', type=str, help="file to save board setup to", default=None)
+parser.add_argument('--snapshot', type=str, help="file to save the game state to after every move", default=None)
 parser.add_argument('-v', '--video', type=str, help="name of the video file to save", default=None)
+parser.add_argument('--seed', type=int, help="seed of the random board (for repeatability)", default=None)
+parser.add_argument('--pool', type=str, help="board pool file of make_pool.py to draw the board from (the seed picks "
+                    "the board)", default=None)
+parser.add_argument('-p', '--pace', type=str, choices=pygraphics.PACING_MODES,
+                    help="realtime shows the game at viewing speed, fast without waiting, record only makes the video",
+                    default='realtime')
+parser.add_argument('--frames', type=str, choices=FRAME_STORAGES,
+                    help="how the video frames are kept: raw, palette (256 colors) or delta (compressed changes)",
+                    default='delta')
+parser.add_argument('--table', type=float, help="MB of the transposition table of each AI worker whose agent searches "
+                    "with one (rebel_agent with SEARCH = 'core' on the Python core), 0 for none", default=0)
+parser.add_argument('-r', '--record', type=str, help="name of the record file to add the game to (none by default)",
+                    default=None)
 
 
 def make_board():
@@ -35,7 +60,7 @@ def make_board():
     This function creates a random board for the game.
 
     Returns:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
         companion_cards (dict): dictionary of companion cards
     '''
 
@@ -48,7 +73,7 @@ def make_board():
     # Remove the companion cards from the dictionary
     del characters['Companion']
 
-    cards = []  # List to hold the cards
+    cards = Board()  # Board to hold the cards
 
     for i in range(36):
         # Get a random character
@@ -72,7 +97,7 @@ def save_board(cards, filename='board'):
     This function saves the board to a file.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
         filename (str): name of the file to save the board to
     '''
 
@@ -94,14 +119,14 @@ def load_board(filename='board'):
         filename (str): name of the file to load the board from
 
     Returns:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
         companion_cards (dict): dictionary of companion cards
     '''
 
     with open(join(path, "boards", filename + ".json"), 'r') as file:
         cards = json.load(file)
 
-    cards = [Card(card['house'], card['name'], card['location']) for card in cards]
+    cards = Board(Card(card['house'], card['name'], card['location']) for card in cards)
 
     with open(join(path, "assets", "characters.json"), 'r') as file:
         characters = json.load(file)
@@ -111,22 +136,55 @@ def load_board(filename='board'):
     return cards, companion_cards
 
 
+def save_game(filename, cards, companion_cards, player1, player2, turn, choose_companion, selected_house):
+    '''
+    This function saves the state of the game to a snapshot file.
+
+    Parameters:
+        filename (str): name of the file to save the game to
+        cards (Board): the cards on the board
+        companion_cards (dict): dictionary of companion cards
+        player1 (Player): player 1
+        player2 (Player): player 2
+        turn (int): the player to move
+        choose_companion (bool): whether the player to move must choose a companion card
+        selected_house (str): house of the last chosen card
+    '''
+
+    save_snapshot(join(path, "boards", filename + ".snap"), cards, companion_cards, player1, player2, turn,
+                  choose_companion, selected_house)
+
+
+def load_game(filename, index=0, player1_agent='player1', player2_agent='player2'):
+    '''
+    This function loads the state of a game from a snapshot file.
+
+    Parameters:
+        filename (str): name of the file to load the game from
+        index (int): position of the game in the file
+        player1_agent (str): agent of player 1
+        player2_agent (str): agent of player 2
+
+    Returns:
+        state (dict): cards, companion_cards, player1, player2, turn, choose_companion and last_house
+    '''
+
+    with SnapshotFile(join(path, "boards", filename + ".snap")) as file:
+        return unpack_state(file.get_record(index), player1_agent, player2_agent)
+
+
 def find_varys(cards):
     '''
     This function finds the location of Varys on the board.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
 
     Returns:
         varys_location (int): location of Varys
     '''
 
-    varys = [card for card in cards if card.get_name() == 'Varys']
-
-    varys_location = varys[0].get_location()
-
-    return varys_location
+    return cards.get_varys_location()
 
 
 def get_possible_moves(cards):
@@ -134,31 +192,14 @@ def get_possible_moves(cards):
     This function gets the possible moves for the player.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
 
     Returns:
         moves (list): list of possible moves
     '''
 
-    # Get the location of Varys
-    varys_location = find_varys(cards)
-
-    # Get the row and column of Varys
-    varys_row, varys_col = varys_location // 6, varys_location % 6
-
-    moves = []
-
     # Get the cards in the same row or column as Varys
-    for card in cards:
-        if card.get_name() == 'Varys':
-            continue
-
-        row, col = card.get_location() // 6, card.get_location() % 6
-
-        if row == varys_row or col == varys_col:
-            moves.append(card.get_location())
-
-    return moves
+    return cards.get_varys_moves()
 
 
 def calculate_winner(player1, player2):
@@ -173,62 +214,9 @@ def calculate_winner(player1, player2):
         winner (int): 1 if player 1 wins, 2 if player 2 wins
     '''
 
-    player1_banners = player1.get_banners()
-    player2_banners = player2.get_banners()
-
-    # Calculate the scores of the players
-    player1_score = sum(player1_banners.values())
-    player2_score = sum(player2_banners.values())
-
-    if player1_score > player2_score:
-        return 1
-
-    elif player2_score > player1_score:
-        return 2
-
-    # If the scores are the same, whoever has the banner of the house with the most cards wins
-    else:
-        if player1_banners['Stark'] > player2_banners['Stark']:
-            return 1
-
-        elif player2_banners['Stark'] > player1_banners['Stark']:
-            return 2
-
-        elif player1_banners['Greyjoy'] > player2_banners['Greyjoy']:
-            return 1
-
-        elif player2_banners['Greyjoy'] > player1_banners['Greyjoy']:
-            return 2
-
-        elif player1_banners['Lannister'] > player2_banners['Lannister']:
-            return 1
-
-        elif player2_banners['Lannister'] > player1_banners['Lannister']:
-            return 2
-
-        elif player1_banners['Targaryen'] > player2_banners['Targaryen']:
-            return 1
-
-        elif player2_banners['Targaryen'] > player1_banners['Targaryen']:
-            return 2
-
-        elif player1_banners['Baratheon'] > player2_banners['Baratheon']:
-            return 1
-
-        elif player2_banners['Baratheon'] > player1_banners['Baratheon']:
-            return 2
-
-        elif player1_banners['Tyrell'] > player2_banners['Tyrell']:
-            return 1
-
-        elif player2_banners['Tyrell'] > player1_banners['Tyrell']:
-            return 2
-
-        elif player1_banners['Tully'] > player2_banners['Tully']:
-            return 1
-
-        elif player2_banners['Tully'] > player1_banners['Tully']:
-            return 2
+    # The player with more banners wins, a tie goes to the player with the banner of the house with the most cards
+    # that only one of them has, counted on the banner masks of the players
+    return get_winner(player1, player2)
 
 
 def find_card(cards, location):
@@ -236,16 +224,14 @@ def find_card(cards, location):
     This function finds the card at the location.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
         location (int): location of the card
 
     Returns:
         card (Card): card at the location
     '''
 
-    for card in cards:
-        if card.get_location() == location:
-            return card
+    return cards.get_card(location)
 
 
 def house_card_count(cards, house):
@@ -253,20 +239,14 @@ def house_card_count(cards, house):
     This function counts the number of cards of a house.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
         house (str): house of the cards
 
     Returns:
         count (int): number of cards of the house
     '''
 
-    count = 0
-
-    for card in cards:
-        if card.get_house() == house:
-            count += 1
-
-    return count
+    return cards.get_house_count(house)
 
 
 def make_move(cards, move, player):
@@ -274,7 +254,7 @@ def make_move(cards, move, player):
     This function makes a move for the player.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
         move (int): location of the card
         player (Player): player making the move
 
@@ -283,64 +263,29 @@ def make_move(cards, move, player):
     '''
 
     # Get the location of Varys
-    varys_location = find_varys(cards)
-
-    # Find the row and column of Varys
-    varys_row, varys_col = varys_location // 6, varys_location % 6
-
-    # Get the row and column of the move
-    move_row, move_col = move // 6, move % 6
+    varys_location = cards.get_varys_location()
 
     # Find the selected card
-    selected_card = find_card(cards, move)
+    selected_card = cards.get_card(move)
 
-    removing_cards = []
+    # Step between the locations of the line from Varys to the selected card
+    step = 1 if varys_location // 6 == move // 6 else 6
 
-    # Find the cards that should be removed
-    for i in range(len(cards)):
-        if cards[i].get_name() == 'Varys':
-            varys_index = i
-            continue
-
-        # If the card is between Varys and the selected card and has the same house as the selected card
-        if varys_row == move_row and varys_col < move_col:
-            if cards[i].get_location() // 6 == varys_row and varys_col < cards[i].get_location() % 6 < move_col and \
-                    cards[i].get_house() == selected_card.get_house():
-                removing_cards.append(cards[i])
-
-                # Add the card to the player's cards
-                player.add_card(cards[i])
-
-        elif varys_row == move_row and varys_col > move_col:
-            if cards[i].get_location() // 6 == varys_row and move_col < cards[i].get_location() % 6 < varys_col and \
-                    cards[i].get_house() == selected_card.get_house():
-                removing_cards.append(cards[i])
-
-                # Add the card to the player's cards
-                player.add_card(cards[i])
-
-        elif varys_col == move_col and varys_row < move_row:
-            if cards[i].get_location() % 6 == varys_col and varys_row < cards[i].get_location() // 6 < move_row and \
-                    cards[i].get_house() == selected_card.get_house():
-                removing_cards.append(cards[i])
+    removing_cards = []
 
-                # Add the card to the player's cards
-                player.add_card(cards[i])
+    # Find the cards between Varys and the selected card that have the same house as the selected card
+    for location in range(min(varys_location, move) + step, max(varys_location, move), step):
+        card = cards.get_card(location)
 
-        elif varys_col == move_col and varys_row > move_row:
-            if cards[i].get_location() % 6 == varys_col and move_row < cards[i].get_location() // 6 < varys_row and \
-                    cards[i].get_house() == selected_card.get_house():
-                removing_cards.append(cards[i])
+        if card is not None and card.house_code == selected_card.house_code:
+            removing_cards.append(card)
 
-                # Add the card to the player's cards
-                player.add_card(cards[i])
+            # Add the card to the player's cards
+            player.add_card(card)
 
     # Add the selected card to the player's cards
     player.add_card(selected_card)
 
-    # Set the location of Varys
-    cards[varys_index].set_location(move)
-
     # Remove the cards
     for card in removing_cards:
         cards.remove(card)
@@ -348,6 +293,9 @@ def make_move(cards, move, player):
     # Remove the selected card
     cards.remove(selected_card)
 
+    # Set the location of Varys
+    cards.move_varys(move)
+
     # Return the selected card's house
     return selected_card.get_house()
 
@@ -357,7 +305,7 @@ def make_companion_move(cards, companion_cards, move, player):
     This function makes the move of the companion card.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
         companion_cards (dict): dictionary of companion cards
         move (int): location of the card
         player (Player): player making the move
@@ -400,14 +348,8 @@ def make_companion_move(cards, companion_cards, move, player):
         first_card = move[1]
         second_card = move[2]
 
-        # Find the selected cards
-        first_card = find_card(cards, first_card)
-        second_card = find_card(cards, second_card)
-
         # Swap the locations of the cards
-        temp_location = first_card.get_location()
-        first_card.set_location(second_card.get_location())
-        second_card.set_location(temp_location)
+        cards.swap(first_card, second_card)
 
     elif selected_companion == 'Sandor':
         selected_card = move[1]
@@ -442,18 +384,15 @@ def remove_unusable_companion_cards(cards, companion_cards):
     This function removes the companion cards that cannot be used.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
         companion_cards (dict): dictionary of companion cards
     '''
 
-    # Get the possible moves for the player
-    moves = get_possible_moves(cards)
-
     if 'Ramsay' in companion_cards.keys() and len(cards) < 2:  # Ramsay needs at least two cards to swap
         del companion_cards['Ramsay']
 
-    if 'Melisandre' in companion_cards.keys() and len(
-            moves) == 0:  # If there are no moves left, there is no point in using Melisandre
+    if 'Melisandre' in companion_cards.keys() and \
+            cards.get_mobility() == 0:  # If there are no moves left, there is no point in using Melisandre
         del companion_cards['Melisandre']
 
     for companion in list(companion_cards.keys()):
@@ -480,9 +419,9 @@ def set_banners(player1, player2, last_house, last_turn):
         player2_status (dict): status of the cards for player 2
     '''
 
-    # Get the cards of the players
-    player1_cards = player1.get_cards()
-    player2_cards = player2.get_cards()
+    # Get the number of cards of the players
+    player1_cards = player1.get_counts()
+    player2_cards = player2.get_counts()
 
     # Get the banners of the players
     player1_banners = player1.get_banners()
@@ -492,16 +431,16 @@ def set_banners(player1, player2, last_house, last_turn):
     player1_status = {}
     player2_status = {}
 
-    for house in player1_cards.keys():
+    for index, house in enumerate(HOUSES):
         # Flag to keep track of the selected player
         selected_player = None
 
         # The player with the more cards of a house gets the banner
-        if len(player1_cards[house]) > len(player2_cards[house]):
+        if player1_cards[index] > player2_cards[index]:
             # Give the banner to player 1
             selected_player = 1
 
-        elif len(player2_cards[house]) > len(player1_cards[house]):
+        elif player2_cards[index] > player1_cards[index]:
             # Give the banner to player 2
             selected_player = 2
 
@@ -530,13 +469,13 @@ def set_banners(player1, player2, last_house, last_turn):
             player2.remove_house_banner(house)
 
             # Set the status of the cards
-            if len(player1_cards[house]) != 0:
-                player1_status[house] = len(player1_cards[house]), 'Green'
+            if player1_cards[index] != 0:
+                player1_status[house] = player1_cards[index], 'Green'
 
             else:
-                player1_status[house] = len(player1_cards[house]), 'White'
+                player1_status[house] = player1_cards[index], 'White'
 
-            player2_status[house] = len(player2_cards[house]), 'White'
+            player2_status[house] = player2_cards[index], 'White'
 
         elif selected_player == 2:
             # Give the banner to player 2
@@ -544,21 +483,161 @@ def set_banners(player1, player2, last_house, last_turn):
             player2.get_house_banner(house)
 
             # Set the status of the cards
-            if len(player2_cards[house]) != 0:
-                player2_status[house] = len(player2_cards[house]), 'Green'
+            if player2_cards[index] != 0:
+                player2_status[house] = player2_cards[index], 'Green'
 
             else:
-                player2_status[house] = len(player2_cards[house]), 'White'
+                player2_status[house] = player2_cards[index], 'White'
 
-            player1_status[house] = len(player1_cards[house]), 'White'
+            player1_status[house] = player1_cards[index], 'White'
 
         else:  # If no player has the banner
-            player2_status[house] = len(player2_cards[house]), 'White'
-            player1_status[house] = len(player1_cards[house]), 'White'
+            player2_status[house] = player2_cards[index], 'White'
+            player1_status[house] = player1_cards[index], 'White'
 
     return player1_status, player2_status
 
 
+def update_banners(player1, player2, last_house, last_turn):
+    '''
+    This function updates the banner of the house affected by the last move.
+
+    Only the cards of the last chosen house change hands (Jon and Gendry also add cards to their house),
+    so the banners of the other houses stay the same as set_banners would set them.
+
+    Parameters:
+        player1 (Player): player 1
+        player2 (Player): player 2
+        last_house (str/None): house of the last chosen card
+        last_turn (int): last turn of the player
+    '''
+
+    # Ramsay, Sandor, Jaqen and Melisandre do not change the number of cards of the players
+    if last_house is None:
+        return
+
+    player1_count = player1.get_card_count(last_house)
+    player2_count = player2.get_card_count(last_house)
+
+    # The player with the more cards of a house gets the banner
+    if player1_count > player2_count:
+        selected_player = 1
+
+    elif player2_count > player1_count:
+        selected_player = 2
+
+    # If the number of cards is the same, the player who chose the last card of that house gets the banner
+    else:
+        selected_player = last_turn
+
+    if selected_player == 1:
+        # Give the banner to player 1
+        player1.get_house_banner(last_house)
+        player2.remove_house_banner(last_house)
+
+    else:
+        # Give the banner to player 2
+        player1.remove_house_banner(last_house)
+        player2.get_house_banner(last_house)
+
+
+def get_cards_status(player1, player2):
+    '''
+    This function builds the status of the cards of the players for the display.
+
+    Parameters:
+        player1 (Player): player 1
+        player2 (Player): player 2
+
+    Returns:
+        player1_status (dict): status of the cards for player 1
+        player2_status (dict): status of the cards for player 2
+    '''
+
+    statuses = []
+
+    for player in (player1, player2):
+        counts = player.get_counts()
+        banners = player.get_banners()
+
+        status = {}
+
+        for index, house in enumerate(HOUSES):
+            # A house is green if the player has its banner and at least one of its cards
+            if banners[house] and counts[index] != 0:
+                status[house] = counts[index], 'Green'
+
+            else:
+                status[house] = counts[index], 'White'
+
+        statuses.append(status)
+
+    return statuses[0], statuses[1]
+
+
+def apply_move(cards, companion_cards, player1, player2, move, turn, choose_companion, last_house):
+    '''
+    This function applies a validated move to the game state.
+
+    Parameters:
+        cards (Board): the cards on the board
+        companion_cards (dict): dictionary of companion cards
+        player1 (Player): player 1
+        player2 (Player): player 2
+        move (int/list): the move to apply (a location, or a companion move list)
+        turn (int): the player making the move
+        choose_companion (bool): whether the move is a companion card choice
+        last_house (str): house of the last chosen card
+
+    Returns:
+        turn (int): the player to move next
+        choose_companion (bool): whether the next move is a companion card choice
+        last_house (str): house of the last chosen card
+    '''
+
+    if choose_companion:
+        # Remove the companion card from the list
+        del companion_cards[move[0]]
+
+        # Make the companion move
+        is_house = make_companion_move(cards, companion_cards, move, player1 if turn == 1 else player2)
+
+        # Remove the companion cards that cannot be used
+        remove_unusable_companion_cards(cards, companion_cards)
+
+        # Set the banners for the players
+        update_banners(player1, player2, is_house if is_house is not None else last_house, turn)
+
+        # Melisandre gives the player another turn
+        if move[0] != 'Melisandre':
+            # Change the turn
+            turn = 2 if turn == 1 else 1
+
+        choose_companion = False  # Reset the flag
+
+    else:
+        # Make the move
+        last_house = make_move(cards, move, player1 if turn == 1 else player2)
+
+        # Remove the companion cards that cannot be used
+        remove_unusable_companion_cards(cards, companion_cards)
+
+        # Set the banners for the players
+        update_banners(player1, player2, last_house, turn)
+
+        # If there are no cards of the house and there are companion cards left
+        if house_card_count(cards, last_house) == 0 and len(companion_cards) != 0:
+            choose_companion = True  # Player must choose a companion card
+
+        else:
+            # Change the turn
+            turn = 2 if turn == 1 else 1
+
+            choose_companion = False  # Reset the flag
+
+    return turn, choose_companion, last_house
+
+
 def clear_screen():
     '''
     This function clears the screen.
@@ -626,7 +705,7 @@ def validate_agent_move(cards, companion_cards, given_move):
     This function validates the move of the AI agent.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
         companion_cards (dict): dictionary of remaining companion cards
         given_move (int): move from the AI agent
 
@@ -655,10 +734,10 @@ def validate_agent_move(cards, companion_cards, given_move):
     locations = []
 
     for card in cards:
-        if card.get_name() == 'Varys' and given_move[0] == 'Ramsay':
+        if card.name_code == VARYS and given_move[0] == 'Ramsay':
             locations.append(card.get_location())
 
-        elif card.get_name() != 'Varys':
+        elif card.name_code != VARYS:
             locations.append(card.get_location())
 
     loop_size = len(given_move) if given_move[0] != 'Jaqen' else len(given_move) - 1
@@ -676,55 +755,169 @@ def validate_agent_move(cards, companion_cards, given_move):
     return True  # All checks passed
 
 
-def try_get_move(agent, cards, player1, player2, companion_cards, choose_companion):
+def make_record(start, player1_name, player2_name, seed, history, winner):
     '''
-    This function tries to get the move from the AI agent.
+    This function makes the record of a game.
 
     Parameters:
-        agent (module): AI agent
-        cards (list): list of Card objects
+        start (bytes): the packed starting state of the game
+        player1_name (str): agent name of player 1
+        player2_name (str): agent name of player 2
+        seed (int/None): seed the board was made from
+        history (list): moves made in the game as (turn, move) pairs
+        winner (int/None): 1 if player 1 wins, 2 if player 2 wins
+
+    Returns:
+        record (dict): the record of the game
+    '''
+
+    return {'start': start, 'player1': player1_name, 'player2': player2_name, 'seed': seed, 'moves': history,
+            'winner': winner}
+
+
+def play_game(player1_agent, player2_agent, cards, companion_cards, player1_name='player1', player2_name='player2',
+              record_file=None, seed=None):
+    '''
+    This function plays a game between two AI agents without graphics or time limits.
+
+    Parameters:
+        player1_agent (module): AI agent of player 1
+        player2_agent (module): AI agent of player 2
+        cards (Board): the cards on the board
+        companion_cards (dict): dictionary of companion cards
+        player1_name (str): agent name of player 1
+        player2_name (str): agent name of player 2
+        record_file (str/None): record file to add the game to
+        seed (int/None): seed the board was made from
+
+    Returns:
+        winner (int): 1 if player 1 wins, 2 if player 2 wins
         player1 (Player): player 1
         player2 (Player): player 2
-        companion_cards (dict): dictionary of companion cards
-        choose_companion (bool): flag to choose a companion card
+        history (list): moves made in the game as (turn, move) pairs
+    '''
+
+    # Set up the players
+    player1 = Player(player1_name)
+    player2 = Player(player2_name)
+
+    turn = 1  # 1: player 1's turn, 2: player 2's turn
+    choose_companion = False  # Choose Companion flag
+    selected_house = None  # House of the last chosen card
+    history = []  # Moves made in the game
+
+    # Keep the starting state for the record
+    start = pack_state(cards, companion_cards, player1, player2, turn, choose_companion, selected_house)
+
+    # Play until the player to move has no moves left to make
+    while not is_terminal(cards, companion_cards, choose_companion):
+        agent = player1_agent if turn == 1 else player2_agent
+
+        # Get the move from the AI agent
+        move = agent.get_move(copy.deepcopy(cards), copy.deepcopy(player1), copy.deepcopy(player2),
+                              copy.deepcopy(companion_cards), choose_companion)
+
+        # If the move is None, change the turn
+        if move is None:
+            turn = 2 if turn == 1 else 1
+
+            continue
+
+        # Ask again for invalid moves, as the game does
+        if choose_companion:
+            if not validate_agent_move(cards, companion_cards, move):
+                continue
+
+        elif move not in get_possible_moves(cards):
+            continue
+
+        # Record the move
+        history.append((turn, move))
+
+        # Make the move
+        turn, choose_companion, selected_house = apply_move(cards, companion_cards, player1, player2, move, turn,
+                                                            choose_companion, selected_house)
+
+    winner = calculate_winner(player1, player2)
+
+    if record_file is not None:
+        append_game(record_file, make_record(start, player1_name, player2_name, seed, history, winner))
+
+    return winner, player1, player2, history
+
+
+def make_table(name, agent, size_mb):
+    '''
+    This function makes the transposition table of an AI worker, for agents that search with one.
+
+    Parameters:
+        name (str): name of the AI file
+        agent (module): AI agent, None for a human player
+        size_mb (float): MB of the table, 0 for none
 
     Returns:
-        move (int/list): move from the AI agent
+        table (TranspositionTable/None): the table of the worker, None if it gets none
     '''
 
-    # Try to get the move from the AI agent in TIMEOUT seconds
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future = executor.submit(agent.get_move, copy.deepcopy(cards), copy.deepcopy(player1),
-                                 copy.deepcopy(player2), copy.deepcopy(companion_cards), choose_companion)
+    if size_mb <= 0 or agent is None:
+        return None
 
-        try:
-            move = future.result(timeout=TIMEOUT)
+    # Agents without uses_table use the table whenever they can attach to it
+    if not hasattr(agent, 'attach_table') or not getattr(agent, 'uses_table', lambda: True)():
+        print(f"{name} does not search with a transposition table, --table is ignored for it.")
 
-        except concurrent.futures.TimeoutError:
-            move = None
+        return None
 
-    return move
+    return TranspositionTable(size_mb)
 
 
-def main(args):
+async def run_game(args):
     '''
-    This function runs the game.
+    This function runs the game, with the window's events, rendering and frame recording in tasks of their own.
 
     Parameters:
         args (Namespace): command line arguments
     '''
 
+    # Without a window there is nothing to click on
+    if args.pace == 'record' and 'human' in (args.player1, args.player2):
+        print("Record-only pacing needs two AI players.")
+        return
+
+    state = None  # State of a resumed game
+    seed = None  # Seed of the board
+
     if args.load:
         try:
-            # Load the board from the file
-            cards, companion_cards = load_board(args.load)
+            # Resume the game from a snapshot, or load the starting board
+            if exists(join(path, "boards", args.load + ".snap")):
+                state = load_game(args.load, args.index, args.player1, args.player2)
+                cards, companion_cards = state['cards'], state['companion_cards']
+
+            else:
+                cards, companion_cards = load_board(args.load)
 
         except FileNotFoundError:
             print("File not found. Creating a new board.")
             cards, companion_cards = make_board()
 
+        except (ValueError, IndexError) as error:
+            print(f"Error loading snapshot: {error}. Creating a new board.")
+            state = None
+            cards, companion_cards = make_board()
+
+    elif args.pool:
+        # Draw the board from a pool of ready boards
+        pool = BoardPool(args.pool)
+        index = args.seed if args.seed is not None else random.randrange(len(pool))
+        cards, companion_cards = pool.get_board(index % len(pool))
+
     else:
         # Create a new board
+        if args.seed is not None:
+            seed = args.seed
+            random.seed(seed)
+
         cards, companion_cards = make_board()
 
     if args.save:
@@ -736,8 +929,13 @@ def main(args):
             print("Error saving board.")
 
     # Set up the graphics
+    pygraphics.set_pacing(args.pace)
+    pygraphics.set_frame_storage(args.frames)
     board = pygraphics.init_board()
 
+    # Start pumping the window's events, refreshing the display and recording the frames
+    tasks = pygraphics.start_tasks()
+
     # Clear the screen
     clear_screen()
 
@@ -745,7 +943,7 @@ def main(args):
     pygraphics.draw_board(board, cards, companion_cards, '0', None)
 
     # Show the initial board for 2 seconds
-    pygraphics.show_board(2)
+    await pygraphics.show_board_async(2)
 
     # Check if the players are human or AI
     if args.player1 == 'human':
@@ -780,33 +978,66 @@ def main(args):
             print("AI file does not have the get_move function.")
             return
 
-    # Set up the players
-    player1 = Player(args.player1)
-    player2 = Player(args.player2)
+    if state is None:
+        # Set up the players
+        player1 = Player(args.player1)
+        player2 = Player(args.player2)
 
-    # Set up the turn
-    turn = 1  # 1: player 1's turn, 2: player 2's turn
+        # Set up the turn
+        turn = 1  # 1: player 1's turn, 2: player 2's turn
+
+        # Set Choose Companion flag
+        choose_companion = False
+
+        selected_house = None  # House of the last chosen card
+
+    else:
+        # Continue the resumed game
+        player1, player2 = state['player1'], state['player2']
+        turn, choose_companion, selected_house = state['turn'], state['choose_companion'], state['last_house']
 
     # Draw the board
-    pygraphics.draw_board(board, cards, companion_cards, '1')
+    pygraphics.draw_board(board, cards, companion_cards, 'CC' if choose_companion else str(turn), choose_companion)
+
+    history = []  # Moves made in the game as (turn, move) pairs
+
+    # Keep the starting state for the record
+    start = pack_state(cards, companion_cards, player1, player2, turn, choose_companion, selected_house)
+
+    # Give each AI worker whose agent searches with a transposition table one of its own, so an agent never takes the
+    # scores of another evaluation. The table outlives the worker, which attaches to it again after a restart
+    tables = [make_table(name, agent, args.table) for name, agent in ((args.player1, player1_agent),
+                                                                       (args.player2, player2_agent))]
 
-    # Set Choose Companion flag
-    choose_companion = False
+    # Start a worker process for each AI agent
+    table_names = [table.get_name() if table is not None else None for table in tables]
+    player1_worker = AgentWorker(args.player1, table_names[0]) if player1_agent is not None else None
+    player2_worker = AgentWorker(args.player2, table_names[1]) if player2_agent is not None else None
 
     while True:
         # Get the possible moves for the player
         moves = get_possible_moves(cards)
 
         # Check if the player has no moves left to make
-        if (len(moves) == 0 and ((not choose_companion) or (len(companion_cards) == 0))):
+        if is_terminal(cards, companion_cards, choose_companion):
             # Get the winner of the game
             winner = calculate_winner(player1, player2)
 
+            # Add the game to the record file
+            if args.record:
+                try:
+                    makedirs(join(path, "records"), exist_ok=True)
+                    append_game(join(path, "records", args.record + ".rec"),
+                                make_record(start, player1.get_agent(), player2.get_agent(), seed, history, winner))
+
+                except (OSError, ValueError):
+                    print("Error saving record.")
+
             # Display the winner
             pygraphics.display_winner(board, winner, player1.get_agent() if winner == 1 else player2.get_agent())
 
             # Show the board for 5 seconds
-            pygraphics.show_board(5)
+            await pygraphics.show_board_async(5)
 
             break
 
@@ -815,30 +1046,38 @@ def main(args):
             # Check if the player is human or AI
             if player1_agent is None:
                 # Wait for the player to make a move with the mouse
-                move = pygraphics.get_player_move(moves, companion_cards if choose_companion else None)
+                move = await pygraphics.wait_player_move(moves, companion_cards if choose_companion else None)
 
             else:
                 # Get the move from the AI agent
-                move = try_get_move(player1_agent, cards, player1, player2, companion_cards, choose_companion)
+                move = await pygraphics.think(args.player1, functools.partial(
+                    player1_worker.get_move, cards, player1, player2, companion_cards, choose_companion,
+                    selected_house, history, TIMEOUT))
 
                 # If the move is None, change the turn
                 if move is None:
                     turn = 2
 
+                    continue
+
         else:
             # Check if the player is human or AI
             if player2_agent is None:
                 # Wait for the player to make a move with the mouse
-                move = pygraphics.get_player_move(moves, companion_cards if choose_companion else None)
+                move = await pygraphics.wait_player_move(moves, companion_cards if choose_companion else None)
 
             else:
                 # Get the move from the AI agent
-                move = try_get_move(player2_agent, cards, player1, player2, companion_cards, choose_companion)
+                move = await pygraphics.think(args.player2, functools.partial(
+                    player2_worker.get_move, cards, player1, player2, companion_cards, choose_companion,
+                    selected_house, history, TIMEOUT))
 
                 # If the move is None, change the turn
                 if move is None:
                     turn = 1
 
+                    continue
+
         # If the move is companion card
         if choose_companion:
             # Check if the move is valid
@@ -876,7 +1115,7 @@ def main(args):
                                                   companion_selecting_condition)
 
                         # Wait for the player to make a move with the mouse
-                        selected = pygraphics.get_player_move(selectable_cards,
+                        selected = await pygraphics.wait_player_move(selectable_cards,
                                                               selectable_companion_cards if companion_selecting_condition else None)
 
                         if not companion_selecting_condition:
@@ -890,28 +1129,20 @@ def main(args):
                 elif not validate_agent_move(cards, companion_cards, move):
                     continue
 
-                # Remove the companion card from the list
-                del companion_cards[move[0]]
+                # Record the move
+                history.append((turn, list(move)))
 
                 # Make the companion move
-                is_house = make_companion_move(cards, companion_cards, move, player1 if turn == 1 else player2)
-
-                # Remove the companion cards that cannot be used
-                remove_unusable_companion_cards(cards, companion_cards)
-
-                # Set the banners for the players
-                player1_status, player2_status = set_banners(player1, player2,
-                                                             is_house if is_house is not None else selected_house, turn)
+                turn, choose_companion, selected_house = apply_move(
+                    cards, companion_cards, player1, player2, move, turn, choose_companion, selected_house)
 
                 # Print the status of the cards
-                print_cards_status(player1_status, player2_status)
-
-                # Melisandre gives the player another turn
-                if move[0] != 'Melisandre':
-                    # Change the turn
-                    turn = 2 if turn == 1 else 1
+                print_cards_status(*get_cards_status(player1, player2))
 
-                choose_companion = False  # Reset the flag
+                # Save the state of the game
+                if args.snapshot:
+                    save_game(args.snapshot, cards, companion_cards, player1, player2, turn, choose_companion,
+                              selected_house)
 
             # Draw the board
             if turn == 1:
@@ -921,31 +1152,24 @@ def main(args):
                 pygraphics.draw_board(board, cards, companion_cards, '2', choose_companion)
 
             # Show the board for 0.5 seconds
-            pygraphics.show_board(0.5)
+            await pygraphics.show_board_async(0.5)
 
         # Check if the move is valid
         if move in moves:
-            # Make the move
-            selected_house = make_move(cards, move, player1 if turn == 1 else player2)
-
-            # Remove the companion cards that cannot be used
-            remove_unusable_companion_cards(cards, companion_cards)
+            # Record the move
+            history.append((turn, move))
 
-            # Set the banners for the players
-            player1_status, player2_status = set_banners(player1, player2, selected_house, turn)
+            # Make the move
+            turn, choose_companion, selected_house = apply_move(
+                cards, companion_cards, player1, player2, move, turn, choose_companion, selected_house)
 
             # Print the status of the cards
-            print_cards_status(player1_status, player2_status)
-
-            # If there are no cards of the house and there are companion cards left
-            if house_card_count(cards, selected_house) == 0 and len(companion_cards) != 0:
-                choose_companion = True  # Player must choose a companion card
-
-            else:
-                # Change the turn
-                turn = 2 if turn == 1 else 1
+            print_cards_status(*get_cards_status(player1, player2))
 
-                choose_companion = False  # Reset the flag
+            # Save the state of the game
+            if args.snapshot:
+                save_game(args.snapshot, cards, companion_cards, player1, player2, turn, choose_companion,
+                          selected_house)
 
             # Draw the board
             if turn == 1:
@@ -957,7 +1181,21 @@ def main(args):
                                       choose_companion)
 
             # Show the board for 0.5 seconds
-            pygraphics.show_board(0.5)
+            await pygraphics.show_board_async(0.5)
+
+    # Stop the workers
+    for worker in (player1_worker, player2_worker):
+        if worker is not None:
+            worker.close()
+
+    for name, table in zip((args.player1, args.player2), tables):
+        if table is not None:
+            stats = table.get_stats()
+            print(f"Transposition table of {name}: {stats['size_mb']:.1f} MB, {stats['occupancy']:.1%} used")
+            table.close()
+
+    # Record the last frames and stop the tasks
+    await pygraphics.stop_tasks(tasks)
 
     # Close the board
     pygraphics.close_board()
@@ -987,5 +1225,16 @@ def main(args):
         print("Error saving video.")
 
 
+def main(args):
+    '''
+    This function runs the game.
+
+    Parameters:
+        args (Namespace): command line arguments
+    '''
+
+    asyncio.run(run_game(args))
+
+
 if __name__ == "__main__":
     main(parser.parse_args())
\ No newline at end of file
@@ -0,0 +1,73 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from main import make_board
+from utils.classes import HOUSES
+from utils.boards import make_pool, save_pool, BoardPool, POOL_FILE
+
+parser = argparse.ArgumentParser(description="Make a pool of random boards for training and tournaments")
+parser.add_argument('-n', '--boards', type=int, help="number of boards to make", default=100000)
+parser.add_argument('--seed', type=int, help="seed of the boards", default=0)
+parser.add_argument('-o', '--output', type=str, help="pool file to write", default=POOL_FILE)
+parser.add_argument('--duration', type=float, help="seconds to time make_board and the pool for", default=1)
+
+
+def time_draws(draw, duration):
+    '''
+    This function draws boards for a while.
+
+    Parameters:
+        draw (function): makes or draws a board
+        duration (float): seconds to draw for
+
+    Returns:
+        rate (float): boards per second
+    '''
+
+    count = 0
+    start = time.perf_counter()
+
+    while time.perf_counter() - start < duration:
+        draw()
+        count += 1
+
+    return count / (time.perf_counter() - start)
+
+
+def main(args):
+    '''
+    This function makes the pool, writes it and compares drawing from it with making boards.
+
+    Parameters:
+        args (Namespace): command line arguments
+    '''
+
+    start = time.perf_counter()
+    pool = make_pool(args.boards, args.seed)
+    seconds = time.perf_counter() - start
+
+    save_pool(args.output, pool)
+
+    print(f"Made {len(pool['boards'])} boards in {seconds:.2f} s ({args.boards - len(pool['boards'])} symmetric "
+          f"duplicates left out), saved to {args.output}")
+    # Boards by the most cards the best first move takes, and the most cards a first move takes of each house
+    most = np.bincount(pool['captures'].max(1))
+    print("Most cards the first move takes: " + ", ".join(f"{cards} on {count / len(pool['boards']):.1%}"
+                                                         for cards, count in enumerate(most) if count))
+    print("Most cards of each house the first move takes, on average: " +
+          ", ".join(f"{house} {mean:.2f}" for house, mean in zip(HOUSES, pool['captures'].mean(0))))
+
+    if args.duration:
+        random.seed(args.seed)
+        made = time_draws(make_board, args.duration)
+        drawn = time_draws(BoardPool(args.output).draw, args.duration)
+
+        print(f"make_board: {made:,.0f} boards per second, pool: {drawn:,.0f} boards per second "
+              f"({drawn / made:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
@@ -1,57 +1,39 @@
 import random
+from utils.classes import VARYS
 
 def find_varys(cards):
     '''
     This function finds the location of Varys on the board.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
 
     Returns:
         varys_location (int): location of Varys
     '''
 
-    varys = [card for card in cards if card.get_name() == 'Varys']
-
-    varys_location = varys[0].get_location()
-
-    return varys_location
+    return cards.get_varys_location()
 
 def get_valid_moves(cards):
     '''
     This function gets the possible moves for the player.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
 
     Returns:
         moves (list): list of possible moves
     '''
 
-    # Get the location of Varys
-    varys_location = find_varys(cards)
-
-    varys_row, varys_col = varys_location // 6, varys_location % 6
-
-    moves = []
-
-    for card in cards:
-        if card.get_name() == 'Varys':
-            continue
-
-        row, col = card.get_location() // 6, card.get_location() % 6
-
-        if row == varys_row or col == varys_col:
-            moves.append(card.get_location())
-
-    return moves
+    # Get the cards in the same row or column as Varys
+    return cards.get_varys_moves()
 
 def get_valid_ramsay(cards):
     '''
     This function gets the possible moves for Ramsay.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
     
     Returns:
         moves (list): list of possible moves
@@ -69,7 +51,7 @@ def get_valid_jon_sandor_jaqan(cards):
     This function gets the possible moves for Jon Snow, Sandor Clegane, and Jaqen H'ghar.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
     
     Returns:
         moves (list): list of possible moves
@@ -78,7 +60,7 @@ def get_valid_jon_sandor_jaqan(cards):
     moves=[]
 
     for card in cards:
-        if card.get_name() != 'Varys':
+        if card.name_code != VARYS:
             moves.append(card.get_location())
     
     return moves
@@ -88,7 +70,7 @@ def get_move(cards, player1, player2, companion_cards, choose_companion):
     This function gets the move of the player.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
         player1 (Player): the player
         player2 (Player): the opponent
         companion_cards (dict): dictionary of companion cards
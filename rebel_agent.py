@@ -1,8 +1,84 @@
+import atexit
 import copy
+import itertools
+import os
 import random
 import time
-from main import make_move, set_banners, make_companion_move, remove_unusable_companion_cards, house_card_count, \
-    find_card
+from main import make_move, update_banners, make_companion_move, remove_unusable_companion_cards, house_card_count, \
+    find_card, TIMEOUT
+from utils.budget import BudgetPlanner
+from utils.classes import VARYS
+from utils.evaluator import get_evaluator, HOUSE_SIZES
+from utils.model import load_weights, WEIGHTS_FILE
+from utils.search_core import state_from_board, iterative_search
+from utils.smp import LazySMP
+from utils.transposition import TranspositionTable
+
+try:
+    # The compiled search core, built with python setup.py build_ext --inplace
+    from utils._search_core import search as core_search
+    CORE = 'compiled'
+
+except ImportError:
+    from utils.search_core import search as core_search
+    CORE = 'python'
+
+CORE_DEPTH = 11 if CORE == 'compiled' else 7  # Depth of the search core, the compiled one is about 40 times faster
+
+TIME_MARGIN = 0.09  # Seconds of the time limit of the game left for the worker to send the move back
+TIME_LIMIT = TIMEOUT - TIME_MARGIN  # Seconds a search may take, the positions are only evaluated after it
+
+# Transposition table shared with the other processes searching for this agent. The table only applies to the Python
+# core, which then deepens one ply at a time: the compiled core has no table and is still much faster without one, so
+# it is used whenever it is built
+table = None
+
+# Helper searches of Lazy SMP beside the Python core search, 0 searches alone. They share the transposition table of
+# the game, or one of the agent when the game shares none, and start with the first search. Like the table, they are
+# left out when the compiled core is built
+HELPERS = 0
+smp = None
+
+DEFAULT_WEIGHT = [240, 10, 297, 165, 282, 172, 316, 127, 356]  # Trained weights of the evaluation function
+
+# Weights of the evaluation function get_move plays with when it is given none, and the learned model, from the weights
+# file of fit_model.py when there is one
+if os.path.exists(WEIGHTS_FILE):
+    trained_weight, model = load_weights(WEIGHTS_FILE)
+else:
+    trained_weight, model = DEFAULT_WEIGHT, None
+
+EVALUATIONS = ('heuristic', 'model')  # Evaluations of the agent
+# Evaluation of minimax and pvs, 'model' is the learned model of the weights file (the search core always uses the
+# heuristic)
+EVALUATION = 'heuristic'
+
+QUIESCENCE_DEPTH = 2  # Plies searched past the depth limit for companion choices and captures that swing a house
+QUIESCENCE_BUDGET = 20000  # Most nodes a move may spend past the depth limit, 0 turns the extension off
+QUIESCENCE_SHARE = 0.25  # Most nodes past the depth limit for each node of the main search
+QUIESCENCE_MIN = 100  # Nodes past the depth limit allowed before the share applies, so small searches extend too
+QUIESCENCE_WIDTH = 12  # Most companion moves searched for a pending companion choice
+
+SEARCHES = ('minimax', 'pvs', 'core')  # Searches of the agent
+# Search used by get_move, 'pvs' is the principal variation search with iterative deepening and 'core' the bitboard
+# alpha-beta of the search core (companion choices still use minimax_right)
+SEARCH = 'minimax'
+ASPIRATION_WINDOW = 50  # Half width of the window around the score of the previous iteration
+
+# Plan the depth of every search from the time the game allows a move, the cards left and the branching learned from
+# the searches of the game. False keeps the fixed depths
+BUDGET = True
+FIXED_DEPTHS = {'minimax': 7, 'pvs': 7, 'core': CORE_DEPTH, 'companion': 4}  # Depths of the searches without the budget
+# Depth planner of each search, companion choices have their own since minimax_right searches many more moves a ply
+planners = {'minimax': BudgetPlanner(TIME_LIMIT, 3, 14), 'pvs': BudgetPlanner(TIME_LIMIT, 3, 14),
+            'core': BudgetPlanner(TIME_LIMIT, 3, 24), 'companion': BudgetPlanner(TIME_LIMIT, 1, 6)}
+
+# Number of searched nodes, deepest ply reached and depth limit of the current search, read by the benchmarks and
+# reported to the game while the agent thinks. Extensions counts the leaves searched past the depth limit and
+# extension_nodes the nodes spent on them (also counted in nodes). The principal variation search counts the null window
+# searches it had to repeat with the full window and the aspiration windows the score fell out of
+search_stats = {'nodes': 0, 'depth': 0, 'max_depth': 0, 'extensions': 0, 'extension_nodes': 0, 'researches': 0,
+                'aspiration_fails': 0}
 
 
 def select(selected_companion, companion_cards, cards):
@@ -52,7 +128,7 @@ def apply(move, companion_cards, turn, player1, player2, cards):
         remove_unusable_companion_cards(cards, companion_cards)
 
         # Set the banners for the players
-        set_banners(player1, player2, is_house, turn)
+        update_banners(player1, player2, is_house, turn)
 
         # Melisandre gives the player another turn
         if move[0] != 'Melisandre':
@@ -70,17 +146,13 @@ def find_varys(cards):
     This function finds the location of Varys on the board.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
 
     Returns:
         varys_location (int): location of Varys
     '''
 
-    varys = [card for card in cards if card.get_name() == 'Varys']
-
-    varys_location = varys[0].get_location()
-
-    return varys_location
+    return cards.get_varys_location()
 
 
 def get_valid_moves(cards):
@@ -88,29 +160,14 @@ def get_valid_moves(cards):
     This function gets the possible moves for the player.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
 
     Returns:
         moves (list): list of possible moves
     '''
 
-    # Get the location of Varys
-    varys_location = find_varys(cards)
-
-    varys_row, varys_col = varys_location // 6, varys_location % 6
-
-    moves = []
-
-    for card in cards:
-        if card.get_name() == 'Varys':
-            continue
-
-        row, col = card.get_location() // 6, card.get_location() % 6
-
-        if row == varys_row or col == varys_col:
-            moves.append(card.get_location())
-
-    return moves
+    # Get the cards in the same row or column as Varys
+    return cards.get_varys_moves()
 
 
 def get_valid_ramsay(cards):
@@ -118,7 +175,7 @@ def get_valid_ramsay(cards):
     This function gets the possible moves for Ramsay.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
     
     Returns:
         moves (list): list of possible moves
@@ -137,7 +194,7 @@ def get_valid_jon_sandor_jaqan(cards):
     This function gets the possible moves for Jon Snow, Sandor Clegane, and Jaqen H'ghar.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
     
     Returns:
         moves (list): list of possible moves
@@ -146,7 +203,7 @@ def get_valid_jon_sandor_jaqan(cards):
     moves = []
 
     for card in cards:
-        if card.get_name() != 'Varys':
+        if card.name_code != VARYS:
             moves.append(card.get_location())
     return moves
 
@@ -156,77 +213,141 @@ def get_move(cards, player1, player2, companion_cards, choose_companion,weight=N
     This function gets the move of the player.
 
     Parameters:
-        cards (list): list of Card objects
+        cards (Board): the cards on the board
         player1 (Player): the player
         player2 (Player): the opponent
         companion_cards (dict): dictionary of companion cards
         choose_companion (bool): flag to choose a companion card
+        weight (list): weights of the evaluation function, None for the trained weights
 
     Returns:
         move (int/list): the move of the player
     '''
-    weight = [240,10,297,165,282,172,316,127,356]
-    if choose_companion:
-        depth = 4
-        best_score, best_move = minimax_right(cards, True, -float("inf"), float("inf"), player1, player2, time.time(),
+    if weight is None:
+        weight = trained_weight
+
+    kind = 'companion' if choose_companion else SEARCH
+    mobility = cards.get_mobility()
+    # Companion choices search every companion with every card it can take, roughly
+    width = len(companion_cards) * len(cards) if choose_companion else mobility
+    depth = planners[kind].plan(len(cards), mobility, width) if BUDGET else FIXED_DEPTHS[kind]
+    start_time = time.time()
+
+    if SEARCH == 'pvs':
+        best_score, best_move = iterative_pvs(cards, 1, player1, player2, companion_cards, choose_companion, depth,
+                                              start_time, weight)
+    elif SEARCH == 'core' and not choose_companion and CORE == 'python' and HELPERS:
+        reset_search_stats(depth)
+        best_score, best_move, search_stats['nodes'], search_stats['depth'] = get_smp().search(
+            *state_from_board(cards, player1, player2), len(companion_cards) != 0, 1, depth, weight,
+            start_time + TIME_LIMIT)
+    elif SEARCH == 'core' and not choose_companion and CORE == 'python' and table is not None:
+        reset_search_stats(depth)
+        best_score, best_move, search_stats['nodes'], search_stats['depth'] = iterative_search(
+            *state_from_board(cards, player1, player2), len(companion_cards) != 0, 1, depth, weight,
+            start_time + TIME_LIMIT, table)
+    elif SEARCH == 'core' and not choose_companion:
+        reset_search_stats(depth)
+        best_score, best_move, search_stats['nodes'] = core_search(*state_from_board(cards, player1, player2),
+                                                                   len(companion_cards) != 0, 1, depth, weight,
+                                                                   start_time + TIME_LIMIT)
+    elif choose_companion:
+        reset_search_stats(depth)
+        best_score, best_move = minimax_right(cards, True, -float("inf"), float("inf"), player1, player2, start_time,
                                               depth, companion_cards, False,weight)
     else:
-        depth = 7
-        best_score, best_move = minimax(cards, True, -float("inf"), float("inf"), player1, player2, time.time(), depth,
+        reset_search_stats(depth)
+        best_score, best_move = minimax(cards, True, -float("inf"), float("inf"), player1, player2, start_time, depth,
                                         companion_cards, False,weight)
 
+    if BUDGET:
+        seconds = time.time() - start_time
+        planners[kind].record(depth, mobility, width, search_stats['nodes'], seconds, seconds <= TIME_LIMIT)
+
     return best_move
 
 
+def attach_table(name):
+    '''
+    This function attaches the agent to a transposition table shared with other processes.
+
+    Parameters:
+        name (str): name of the shared memory of the table
+    '''
+
+    global table
+
+    table = TranspositionTable(name=name)
+
+
+def uses_table():
+    '''
+    This function checks if the searches of the agent read and write a transposition table, which only the Python core
+    does.
+
+    Returns:
+        uses (bool): True if get_move searches with the table it is attached to
+    '''
+
+    return SEARCH == 'core' and CORE == 'python'
+
+
+def get_smp():
+    '''
+    This function gets the helpers of Lazy SMP, and starts them on the first search.
+
+    Returns:
+        smp (LazySMP): the helpers
+    '''
+
+    global table, smp
+
+    if smp is None:
+        if table is None:
+            table = TranspositionTable()
+
+        smp = LazySMP(HELPERS, table)
+
+    return smp
+
+
+@atexit.register
+def shutdown():
+    '''
+    This function stops the helpers of Lazy SMP and detaches from the transposition table, which is removed if the agent
+    created it. The agent worker calls it when the game stops it, since a worker process does not run the exit hooks.
+    '''
+
+    global table, smp
+
+    # The helpers first, so none is attached to the table when it is removed
+    if smp is not None:
+        smp.close()
+        smp = None
+
+    if table is not None:
+        table.close()
+        table = None
+
+
+def reset_search_stats(max_depth):
+    '''
+    This function resets the statistics before a search.
+
+    Parameters:
+        max_depth (int): depth limit of the search
+    '''
+
+    search_stats.update({'nodes': 0, 'depth': 0, 'max_depth': max_depth, 'extensions': 0, 'extension_nodes': 0,
+                         'researches': 0, 'aspiration_fails': 0})
+
+
 def evaluate_board(cards, player1, player2, companion_cards, choose_companion,weight):
-    score = 0
-    if choose_companion:
-        score += weight[0]
-    # Retrieve banners from both players
-    player1_banners = player1.get_banners()
-    player2_banners = player2.get_banners()
-
-    # Calculate the scores of the players
-    player1_score = sum(player1_banners.values())
-    player2_score = sum(player2_banners.values())
-
-    # Add the score difference to the total score, scaled by a weight
-    score += (player1_score - player2_score) * weight[0]
-
-    # Deduct the number of valid moves from the score
-    valid_moves = get_valid_moves(cards)
-    score -= len(valid_moves) * weight[1]
-
-    # Define weights for different houses
-    house_weights = {
-        'Stark': 8,
-        'Greyjoy': 7,
-        'Lannister': 6,
-        'Targaryen': 5,
-        'Baratheon': 4,
-        'Tyrell': 3,
-        'Tully': 2
-    }
-    house_weights_ = {
-        'Stark': weight[2],
-        'Greyjoy': weight[3],
-        'Lannister': weight[4],
-        'Targaryen': weight[5],
-        'Baratheon': weight[6],
-        'Tyrell': weight[7],
-        'Tully': weight[8]
-    }
-
-    # Adjust the score based on card counts for each house
-    for house, weight in house_weights.items():
-        if len(player1.cards[house]) > weight / 2:
-            score += house_weights_[house]
-        elif len(player2.cards[house]) > weight / 2:
-            score -= house_weights_[house]
-        elif len(player1.cards[house]) == len(player2.cards[house]) == weight / 2:
-            score -=  (player2_banners[house] - player1_banners[house])*house_weights_[house]
-
-    return score
+    if EVALUATION == 'model' and model is not None:
+        return model.evaluate(cards, player1, player2, companion_cards)
+
+    # The house and banner term only depends on the counts and banners, so it is remembered for each set of weights
+    return get_evaluator(weight).evaluate(cards, player1, player2, choose_companion)
 
 
 def minimax(cards, maxplayer, alpha, beta, player1, player2, start_time, depth, companion_cards, choose_companion,weight):
@@ -234,9 +355,19 @@ def minimax(cards, maxplayer, alpha, beta, player1, player2, start_time, depth,
     Minimax algorithm with alpha-beta pruning and move sorting for better pruning.
     returns best_score, best_move
     """
-    next_move = get_valid_moves(cards)
-    if time.time() - start_time > 9.91 or not next_move or depth == 0 or choose_companion:
+    search_stats['nodes'] += 1
+    if search_stats['max_depth'] - depth > search_stats['depth']:
+        search_stats['depth'] = search_stats['max_depth'] - depth
+    if time.time() - start_time > TIME_LIMIT:
         return evaluate_board(cards, player1, player2, companion_cards, choose_companion,weight), None
+    if depth == 0 or choose_companion:
+        # Keep searching a pending companion choice or a capture that swings a house past the depth limit
+        return quiescence(cards, maxplayer, alpha, beta, player1, player2, start_time, QUIESCENCE_DEPTH,
+                          companion_cards, choose_companion, weight, True)
+    # The board counts the moves of Varys, so the moves are only listed for the positions that are searched
+    if cards.get_mobility() == 0:
+        return evaluate_board(cards, player1, player2, companion_cards, choose_companion,weight), None
+    next_move = get_valid_moves(cards)
 
     best_move = None
     if maxplayer:
@@ -248,7 +379,7 @@ def minimax(cards, maxplayer, alpha, beta, player1, player2, start_time, depth,
             companion_cards_copy = copy.deepcopy(companion_cards)
 
             selected_house = make_move(cards_copy, move, player1_copy)
-            set_banners(player1_copy, player2_copy, selected_house, 1)
+            update_banners(player1_copy, player2_copy, selected_house, 1)
 
             choose_companion = False
             test = house_card_count(cards_copy, selected_house)
@@ -273,7 +404,7 @@ def minimax(cards, maxplayer, alpha, beta, player1, player2, start_time, depth,
             companion_cards_copy = copy.deepcopy(companion_cards)
 
             selected_house = make_move(cards_copy, move, player2_copy)
-            set_banners(player1_copy, player2_copy, selected_house, 2)
+            update_banners(player1_copy, player2_copy, selected_house, 2)
 
             choose_companion = False
             if house_card_count(cards_copy, selected_house) == 0 and len(companion_cards) != 0:
@@ -290,10 +421,217 @@ def minimax(cards, maxplayer, alpha, beta, player1, player2, start_time, depth,
         return best_val, best_move
 
 
+def is_swing_capture(cards, move, player):
+    '''
+    This function checks if a move takes the last cards of a house or the majority of a house.
+
+    Parameters:
+        cards (Board): the cards on the board
+        move (int): location of the card
+        player (Player): player making the move
+
+    Returns:
+        swing (bool): True if the move empties the house or gives the player its majority
+    '''
+
+    varys_location = cards.get_varys_location()
+    house_code = cards.get_card(move).house_code
+
+    # Count the cards of the house the move takes, as make_move does
+    step = 1 if varys_location // 6 == move // 6 else 6
+    captured = 1
+
+    for location in range(min(varys_location, move) + step, max(varys_location, move), step):
+        card = cards.get_card(location)
+
+        if card is not None and card.house_code == house_code:
+            captured += 1
+
+    if captured == cards.house_counts[house_code]:
+        return True
+
+    count = player.get_counts()[house_code]
+
+    return count <= HOUSE_SIZES[house_code] / 2 < count + captured
+
+
+def get_companion_moves(cards, companion_cards):
+    '''
+    This function generates the companion moves of a pending companion choice, the ones with fewer choices first.
+
+    Parameters:
+        cards (Board): the cards on the board
+        companion_cards (dict): dictionary of companion cards
+
+    Returns:
+        moves (generator): companion moves, made only as they are taken
+    '''
+
+    locations = get_valid_jon_sandor_jaqan(cards)
+
+    for companion in ('Gendry', 'Melisandre'):
+        if companion in companion_cards:
+            yield [companion]
+
+    if 'Jon' in companion_cards:
+        # Jon only depends on the house of the card
+        houses = set()
+
+        for location in locations:
+            house = cards.get_card(location).house_code
+
+            if house not in houses:
+                houses.add(house)
+                yield ['Jon', location]
+
+    if 'Sandor' in companion_cards:
+        for location in locations:
+            yield ['Sandor', location]
+
+    # Swapping or removing two cards does not depend on their order
+    if 'Ramsay' in companion_cards:
+        ramsay = get_valid_ramsay(cards)
+
+        for i, c1 in enumerate(ramsay):
+            for c2 in ramsay[i + 1:]:
+                yield ['Ramsay', c1, c2]
+
+    if 'Jaqen' in companion_cards:
+        for k in list(companion_cards):
+            if k != 'Jaqen':
+                for i, c1 in enumerate(locations):
+                    for c2 in locations[i + 1:]:
+                        yield ['Jaqen', c1, c2, k]
+
+
+def extension_budget_left():
+    '''
+    This function checks if the search may still spend nodes past the depth limit.
+
+    Returns:
+        left (bool): True if the extension is within its budget
+    '''
+
+    extension_nodes = search_stats['extension_nodes']
+    main_nodes = search_stats['nodes'] - extension_nodes
+
+    return extension_nodes < min(QUIESCENCE_BUDGET, QUIESCENCE_MIN + QUIESCENCE_SHARE * main_nodes)
+
+
+def quiescence(cards, maxplayer, alpha, beta, player1, player2, start_time, depth, companion_cards, choose_companion,
+               weight, leaf=False):
+    '''
+    This function searches the forcing moves of a position past the depth limit: every companion move of a pending
+    companion choice, and the captures that empty a house or take its majority. Other positions are evaluated as
+    they are, and the side to move may keep the evaluation instead of capturing.
+
+    Parameters:
+        cards (Board): the cards on the board
+        maxplayer (bool): True if player 1 makes the next card move
+        alpha (float): best score player 1 is sure of
+        beta (float): best score player 2 is sure of
+        player1 (Player): the player
+        player2 (Player): the opponent
+        start_time (float): start time of the search
+        depth (int): remaining plies of the extension
+        companion_cards (dict): dictionary of companion cards
+        choose_companion (bool): flag of a pending companion choice (of the player who moved last)
+        weight (list): weights of the evaluation function
+        leaf (bool): True for the leaf of the main search, which is not an extension node itself
+
+    Returns:
+        best_val (float): the score of the position
+        best_move (None): the extension never chooses the move of the agent
+    '''
+
+    if not leaf:
+        search_stats['extension_nodes'] += 1
+        search_stats['nodes'] += 1
+
+    stand_pat = evaluate_board(cards, player1, player2, companion_cards, choose_companion, weight)
+
+    if depth == 0 or not extension_budget_left() or time.time() - start_time > TIME_LIMIT:
+        return stand_pat, None
+
+    if choose_companion:
+        # The player who emptied the house must choose a companion
+        mover_max = not maxplayer
+        moves = list(itertools.islice(get_companion_moves(cards, companion_cards), QUIESCENCE_WIDTH))
+
+    else:
+        mover_max = maxplayer
+        player = player1 if maxplayer else player2
+        moves = [move for move in get_valid_moves(cards) if is_swing_capture(cards, move, player)]
+
+        # The side to move may make a quiet move instead
+        if mover_max:
+            if stand_pat >= beta:
+                return stand_pat, None
+            alpha = max(alpha, stand_pat)
+        else:
+            if stand_pat <= alpha:
+                return stand_pat, None
+            beta = min(beta, stand_pat)
+
+    if not moves:
+        return stand_pat, None
+
+    if leaf:
+        search_stats['extensions'] += 1
+
+    best_val = -float("inf") if mover_max else float("inf")
+    if not choose_companion:
+        best_val = stand_pat
+
+    for move in moves:
+        # Stop at the budget, a companion choice keeps the best move found
+        if not extension_budget_left():
+            break
+
+        cards_copy = copy.deepcopy(cards)
+        player1_copy = copy.deepcopy(player1)
+        player2_copy = copy.deepcopy(player2)
+
+        # Card moves never change the companion cards, the companion move of a child copies them itself
+        companion_cards_copy = copy.deepcopy(companion_cards) if choose_companion else companion_cards
+
+        if choose_companion:
+            next_choose, next_max, player1_copy, player2_copy = apply(move, companion_cards_copy,
+                                                                      1 if mover_max else 2, player1_copy,
+                                                                      player2_copy, cards_copy)
+        else:
+            selected_house = make_move(cards_copy, move, player1_copy if mover_max else player2_copy)
+            update_banners(player1_copy, player2_copy, selected_house, 1 if mover_max else 2)
+
+            next_choose = house_card_count(cards_copy, selected_house) == 0 and len(companion_cards) != 0
+            next_max = not mover_max
+
+        val, _ = quiescence(cards_copy, next_max, alpha, beta, player1_copy, player2_copy, start_time, depth - 1,
+                            companion_cards_copy, next_choose, weight)
+
+        if mover_max:
+            best_val = max(best_val, val)
+            alpha = max(alpha, best_val)
+        else:
+            best_val = min(best_val, val)
+            beta = min(beta, best_val)
+        if beta <= alpha:  # Alpha-Beta Pruning
+            break
+
+    # The budget ran out before any companion move was searched
+    if best_val in (-float("inf"), float("inf")):
+        return stand_pat, None
+
+    return best_val, None
+
+
 def minimax_right(cards, maxplayer, alpha, beta, player1, player2, start_time, depth, companion_cards,choose_companion,weight):
     print("********************************")
+    search_stats['nodes'] += 1
+    if search_stats['max_depth'] - depth > search_stats['depth']:
+        search_stats['depth'] = search_stats['max_depth'] - depth
     next_move = list(companion_cards.keys())
-    if time.time() - start_time > 9.91 or not next_move or depth == 0 or choose_companion:
+    if time.time() - start_time > TIME_LIMIT or not next_move or depth == 0 or choose_companion:
         return evaluate_board(cards, player1, player2, companion_cards, choose_companion,weight), None
 
     best_move = None
@@ -581,3 +919,199 @@ def minimax_right(cards, maxplayer, alpha, beta, player1, player2, start_time, d
                             best_val = score
                             best_move = ['Jaqen', i, j, k]
         return best_val, best_move
+
+
+def search_child(move, cards, turn, player1, player2, start_time, depth, companion_cards, choose_companion, weight,
+                 alpha, beta):
+    '''
+    This function makes a move on copies of the state and searches the position after it with the principal
+    variation search.
+
+    Parameters:
+        move (int/list): the card move, or the companion move if choose_companion is True
+        cards (Board): the cards on the board
+        turn (int): the player making the move
+        player1 (Player): the player
+        player2 (Player): the opponent
+        start_time (float): start time of the search
+        depth (int): remaining depth of the position after the move
+        companion_cards (dict): dictionary of companion cards
+        choose_companion (bool): True if the move is a companion move
+        weight (list): weights of the evaluation function
+        alpha (float): best score the player making the move is sure of
+        beta (float): best score the opponent is sure of
+
+    Returns:
+        val (float): the score of the position after the move, for the player making the move
+    '''
+
+    cards_copy = copy.deepcopy(cards)
+    player1_copy = copy.deepcopy(player1)
+    player2_copy = copy.deepcopy(player2)
+
+    # Card moves never change the companion cards, the companion move of a child copies them itself
+    companion_cards_copy = copy.deepcopy(companion_cards) if choose_companion else companion_cards
+
+    if choose_companion:
+        next_choose, next_max, player1_copy, player2_copy = apply(move, companion_cards_copy, turn, player1_copy,
+                                                                  player2_copy, cards_copy)
+        next_turn = 1 if next_max else 2
+
+    else:
+        selected_house = make_move(cards_copy, move, player1_copy if turn == 1 else player2_copy)
+        update_banners(player1_copy, player2_copy, selected_house, turn)
+
+        # The player who empties a house chooses a companion before the turn changes
+        next_choose = house_card_count(cards_copy, selected_house) == 0 and len(companion_cards) != 0
+        next_turn = turn if next_choose else 3 - turn
+
+    # Scores are for the player to move, so the window and the score flip when the turn changes
+    if next_turn == turn:
+        return pvs(cards_copy, next_turn, alpha, beta, player1_copy, player2_copy, start_time, depth,
+                   companion_cards_copy, next_choose, weight)[0]
+
+    return -pvs(cards_copy, next_turn, -beta, -alpha, player1_copy, player2_copy, start_time, depth,
+                companion_cards_copy, next_choose, weight)[0]
+
+
+def pvs(cards, turn, alpha, beta, player1, player2, start_time, depth, companion_cards, choose_companion, weight,
+        root=False, order=None, scores=None):
+    '''
+    This function is the principal variation search (NegaScout): the first move is searched with the full window and
+    the others with a null window that only tells if they are better, searching them again when they are. The max and
+    min players share one negamax formulation, scores are for the player to move.
+
+    Parameters:
+        cards (Board): the cards on the board
+        turn (int): the player to move (or to choose a companion if choose_companion is True)
+        alpha (float): best score the player to move is sure of
+        beta (float): best score the opponent is sure of
+        player1 (Player): the player
+        player2 (Player): the opponent
+        start_time (float): start time of the search
+        depth (int): remaining depth of the search
+        companion_cards (dict): dictionary of companion cards
+        choose_companion (bool): flag to choose a companion card
+        weight (list): weights of the evaluation function
+        root (bool): True for the position of the agent, the only one whose companion choices are searched fully
+        order (list): moves to search first, the best moves of the previous iteration
+        scores (list): list to add the (score, move) pairs of the searched moves to
+
+    Returns:
+        best_val (float): the score of the position for the player to move
+        best_move (int/list): the best move
+    '''
+
+    search_stats['nodes'] += 1
+    if search_stats['max_depth'] - depth > search_stats['depth']:
+        search_stats['depth'] = search_stats['max_depth'] - depth
+
+    sign = 1 if turn == 1 else -1
+
+    if time.time() - start_time > TIME_LIMIT:
+        return sign * evaluate_board(cards, player1, player2, companion_cards, choose_companion, weight), None
+
+    if depth == 0 or (choose_companion and not root):
+        # The extension scores for player 1, whose card move is next when maxplayer is True
+        maxplayer = turn == 2 if choose_companion else turn == 1
+        window = (alpha, beta) if sign == 1 else (-beta, -alpha)
+        val, _ = quiescence(cards, maxplayer, window[0], window[1], player1, player2, start_time, QUIESCENCE_DEPTH,
+                            companion_cards, choose_companion, weight, True)
+        return sign * val, None
+
+    if choose_companion:
+        moves = list(get_companion_moves(cards, companion_cards))
+    else:
+        moves = get_valid_moves(cards)
+
+    if not moves:
+        return sign * evaluate_board(cards, player1, player2, companion_cards, choose_companion, weight), None
+
+    if order:
+        moves = [move for move in order if move in moves] + [move for move in moves if move not in order]
+
+    best_val, best_move = -float("inf"), None
+
+    for i, move in enumerate(moves):
+        if i == 0:
+            val = search_child(move, cards, turn, player1, player2, start_time, depth - 1, companion_cards,
+                               choose_companion, weight, alpha, beta)
+        else:
+            # Check with a null window that the move is better than the best one
+            val = search_child(move, cards, turn, player1, player2, start_time, depth - 1, companion_cards,
+                               choose_companion, weight, alpha, alpha + 1)
+
+            if alpha < val < beta:
+                search_stats['researches'] += 1
+                val = search_child(move, cards, turn, player1, player2, start_time, depth - 1, companion_cards,
+                                   choose_companion, weight, val, beta)
+
+        if scores is not None:
+            scores.append((val, move))
+
+        if val > best_val:
+            best_val, best_move = val, move
+        alpha = max(alpha, val)
+        if alpha >= beta:  # Alpha-Beta Pruning
+            break
+
+    return best_val, best_move
+
+
+def iterative_pvs(cards, turn, player1, player2, companion_cards, choose_companion, max_depth, start_time, weight):
+    '''
+    This function searches deeper and deeper with the principal variation search, starting each iteration with the
+    best moves of the previous one and a narrow (aspiration) window around its score.
+
+    Parameters:
+        cards (Board): the cards on the board
+        turn (int): the player to move
+        player1 (Player): the player
+        player2 (Player): the opponent
+        companion_cards (dict): dictionary of companion cards
+        choose_companion (bool): flag to choose a companion card
+        max_depth (int): depth of the last iteration
+        start_time (float): start time of the search
+        weight (list): weights of the evaluation function
+
+    Returns:
+        best_score (float): the score of the best move for player 1
+        best_move (int/list): the best move
+    '''
+
+    reset_search_stats(max_depth)
+    best_score, best_move, order = None, None, None
+
+    for depth in range(1, max_depth + 1):
+        search_stats['max_depth'] = depth
+
+        if best_score is None:
+            alpha, beta = -float("inf"), float("inf")
+        else:
+            alpha, beta = best_score - ASPIRATION_WINDOW, best_score + ASPIRATION_WINDOW
+
+        scores = []
+        val, move = pvs(cards, turn, alpha, beta, player1, player2, start_time, depth, companion_cards,
+                        choose_companion, weight, True, order, scores)
+
+        # Search again with the full window when the score falls out of the aspiration window
+        if best_score is not None and not alpha < val < beta:
+            search_stats['aspiration_fails'] += 1
+            scores = []
+            val, move = pvs(cards, turn, -float("inf"), float("inf"), player1, player2, start_time, depth,
+                            companion_cards, choose_companion, weight, True, order, scores)
+
+        # An iteration cut by the time limit is only used if there is no complete one
+        if time.time() - start_time > TIME_LIMIT and best_move is not None:
+            break
+
+        best_score, best_move = val, move
+
+        # Search the best moves first in the next iteration, the moves cut off keep their order after them
+        searched = [move for _, move in sorted(scores, key=lambda score: -score[0])]
+        order = searched + [move for move in (order or []) if move not in searched]
+
+    search_stats['max_depth'] = max_depth
+    score = best_score if turn == 1 else -best_score
+
+    return score, best_move
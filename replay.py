@@ -0,0 +1,169 @@
+import argparse
+import concurrent.futures
+import multiprocessing
+import time
+
+import utils.pygraphics as pygraphics
+from main import apply_move, get_possible_moves, validate_agent_move, calculate_winner
+from utils.snapshot import pack_state, unpack_state
+from utils.record import read_games
+
+parser = argparse.ArgumentParser(description="Replay recorded games of A Game of Thrones: Hand of the King")
+parser.add_argument('file', type=str, help="record file")
+parser.add_argument('-i', '--index', type=int, nargs='+', help="games to render to video", default=None)
+parser.add_argument('-a', '--all', action='store_true', help="render every game to video")
+parser.add_argument('-v', '--video', type=str, help="name of the video files of the rendered games", default='replay')
+parser.add_argument('-j', '--jobs', type=int, help="number of worker processes rendering videos", default=1)
+
+
+def replay_game(game):
+    '''
+    This function re-simulates a recorded game.
+
+    Parameters:
+        game (dict): the record of the game
+
+    Returns:
+        state (dict): the final cards, companion_cards, player1, player2, turn, choose_companion and last_house
+        winner (int): 1 if player 1 wins, 2 if player 2 wins
+    '''
+
+    state = unpack_state(game['start'], game['player1'], game['player2'])
+    cards, companion_cards, player1, player2 = state['cards'], state['companion_cards'], state['player1'], \
+        state['player2']
+    turn, choose_companion, last_house = state['turn'], state['choose_companion'], state['last_house']
+
+    for i, (turn, move) in enumerate(game['moves']):
+        # The recorded turn differs from the simulated one after a timed out move, so only the move is checked
+        if choose_companion:
+            valid = isinstance(move, list) and validate_agent_move(cards, companion_cards, move)
+
+        else:
+            valid = move in get_possible_moves(cards)
+
+        if not valid:
+            raise ValueError(f"Move {i} ({move}) of player {turn} is not valid.")
+
+        turn, choose_companion, last_house = apply_move(cards, companion_cards, player1, player2, move, turn,
+                                                        choose_companion, last_house)
+
+    state.update({'turn': turn, 'choose_companion': choose_companion, 'last_house': last_house})
+
+    return state, calculate_winner(player1, player2)
+
+
+def verify_game(game):
+    '''
+    This function checks that a recorded game replays to the same result every time.
+
+    Parameters:
+        game (dict): the record of the game
+
+    Returns:
+        error (str/None): the problem of the record, or None if it replays correctly
+    '''
+
+    try:
+        first, winner = replay_game(game)
+        second, _ = replay_game(game)
+
+    except (ValueError, KeyError, IndexError) as error:
+        return str(error)
+
+    if game['winner'] is not None and winner != game['winner']:
+        return f"Player {winner} wins the replay, but player {game['winner']} won the game."
+
+    # Both replays must end in the same state
+    if pack_state(**first) != pack_state(**second):
+        return "The replays end in different states."
+
+    return None
+
+
+def render_game(game, file_name):
+    '''
+    This function renders a recorded game to a video without showing it.
+
+    Parameters:
+        game (dict): the record of the game
+        file_name (str): name of the video file
+    '''
+
+    # Draw without a window
+    pygraphics.set_pacing('record')
+    pygraphics.frames.clear()
+
+    state = unpack_state(game['start'], game['player1'], game['player2'])
+    cards, companion_cards, player1, player2 = state['cards'], state['companion_cards'], state['player1'], \
+        state['player2']
+    turn, choose_companion, last_house = state['turn'], state['choose_companion'], state['last_house']
+
+    board = pygraphics.init_board()
+
+    # Draw and keep the frames as the game does
+    pygraphics.draw_board(board, cards, companion_cards, '0', None)
+    pygraphics.show_board(2)
+    pygraphics.draw_board(board, cards, companion_cards, 'CC' if choose_companion else str(turn), choose_companion)
+
+    for turn, move in game['moves']:
+        turn, choose_companion, last_house = apply_move(cards, companion_cards, player1, player2, move, turn,
+                                                        choose_companion, last_house)
+
+        pygraphics.draw_board(board, cards, companion_cards, 'CC' if choose_companion else str(turn),
+                              choose_companion)
+        pygraphics.show_board(0.5)
+
+    winner = calculate_winner(player1, player2)
+    pygraphics.display_winner(board, winner, player1.get_agent() if winner == 1 else player2.get_agent())
+    pygraphics.show_board(5)
+
+    pygraphics.close_board()
+    pygraphics.save_video(file_name)
+
+
+def render_games(games, file_names, jobs):
+    '''
+    This function renders recorded games to videos in parallel worker processes.
+
+    Parameters:
+        games (list): the records of the games
+        file_names (list): names of the video files
+        jobs (int): number of worker processes
+    '''
+
+    if jobs <= 1:
+        for game, file_name in zip(games, file_names):
+            render_game(game, file_name)
+
+        return
+
+    # Fresh interpreters, so the workers never inherit the pygame state of this process
+    with concurrent.futures.ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context('spawn')) as executor:
+        for file_name, _ in zip(file_names, executor.map(render_game, games, file_names)):
+            print("Rendered " + file_name)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    games = read_games(args.file)
+
+    if args.index is not None or args.all:
+        indexes = range(len(games)) if args.all else args.index
+
+        render_games([games[i] for i in indexes], [f'{args.video}_{i}' for i in indexes], args.jobs)
+
+    else:
+        start = time.perf_counter()
+        errors = [(i, verify_game(game)) for i, game in enumerate(games)]
+        seconds = time.perf_counter() - start
+
+        for i, error in errors:
+            if error is not None:
+                print(f"Game {i}: {error}")
+
+        failed = sum(1 for _, error in errors if error is not None)
+
+        # Every game is replayed twice
+        print(f"Verified {len(games) - failed} of {len(games)} games ({2 * len(games) / max(seconds, 1e-9):.0f} "
+              f"replays per second)")
@@ -0,0 +1,15 @@
+'''
+This script builds the optional compiled search core (utils/_search_core.pyx) next to its source:
+
+    python setup.py build_ext --inplace
+
+rebel_agent uses the pure Python core (utils/search_core.py) when the compiled one is not built.
+'''
+
+from Cython.Build import cythonize
+from setuptools import setup, Extension
+
+setup(
+    name='hand-of-the-king-search-core',
+    ext_modules=cythonize([Extension('utils._search_core', ['utils/_search_core.pyx'], extra_compile_args=['-O3'])]),
+)
@@ -0,0 +1,41 @@
+import os
+import sys
+
+# Add the project folder to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.budget import BudgetPlanner, PRIOR_EXPONENT, PRIOR_RATE, PRIOR_CAPTURES
+
+
+def play_game(planner):
+    '''
+    This function plans the moves of a game whose searches teach the planner a narrow tree, as the endgame does.
+
+    Parameters:
+        planner (BudgetPlanner): the planner of the game
+
+    Returns:
+        depth (int): depth planned for the opening of the game
+    '''
+
+    opening = planner.plan(35, 10)
+    planner.record(opening, 10, 10, 2000, 0.1, True)
+
+    for cards_left, mobility in ((30, 9), (24, 8), (18, 6), (12, 5), (8, 4), (5, 3), (3, 2)):
+        depth = planner.plan(cards_left, mobility)
+        planner.record(depth, mobility, mobility, int(mobility ** (1 + 0.4 * (depth - 1))), 0.05, True)
+
+    return opening
+
+
+def test_opening_depth_of_second_game():
+    '''
+    This function checks that a second game in the same process opens at the depth of a fresh planner.
+    '''
+
+    planner = BudgetPlanner(9.91, 3, 24)
+    first = play_game(planner)
+
+    assert planner.plan(35, 10) == first == BudgetPlanner(9.91, 3, 24).plan(35, 10)
+    assert (planner.exponent, planner.rate, planner.captures) == (PRIOR_EXPONENT, PRIOR_RATE, PRIOR_CAPTURES)
+    assert planner.moves == 0 and planner.last_depth is None
@@ -0,0 +1,212 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+'''
+The compiled search core, the same search as utils/search_core.py on C bitboards. Build it with:
+
+    python setup.py build_ext --inplace
+'''
+
+import time
+
+from libc.stdint cimport uint64_t
+
+from utils.evaluator import HOUSE_SIZES
+from utils.search_core import LINE_MASKS, BETWEEN_MASKS, NO_HOUSE, EMPTY, TIME_CHECK
+
+cdef extern from *:
+    int popcount "__builtin_popcountll"(unsigned long long x)
+    int lowest_bit "__builtin_ctzll"(unsigned long long x)
+
+cdef enum:
+    LOCATIONS = 36  # Number of locations on the board
+    HOUSE_COUNT = 7  # Number of houses
+    VARYS_MASK = 7  # Index of the mask of Varys
+    WEIGHT_COUNT = 9  # Number of weights of the evaluation function
+
+cdef double INFINITY = float("inf")
+
+# Masks of the lines and of the locations between two locations, copied from the pure Python core
+cdef uint64_t line_masks[LOCATIONS]
+cdef uint64_t between_masks[LOCATIONS][LOCATIONS]
+cdef int house_sizes[HOUSE_COUNT]
+
+cdef int i, j
+
+for i in range(LOCATIONS):
+    line_masks[i] = LINE_MASKS[i]
+
+    for j in range(LOCATIONS):
+        between_masks[i][j] = BETWEEN_MASKS[i][j]
+
+for i in range(HOUSE_COUNT):
+    house_sizes[i] = HOUSE_SIZES[i]
+
+
+cdef class Searcher:
+    '''
+    This class is the compiled search core: alpha-beta over the card moves on bitboards, one mask of locations for
+    each house. A pending companion choice is scored as the evaluation function scores it, as minimax does.
+    '''
+
+    cdef uint64_t masks[HOUSE_COUNT + 1]
+    cdef int varys
+    cdef int counts[2][HOUSE_COUNT]
+    cdef int banners[2][HOUSE_COUNT]
+    cdef bint companions_left
+    cdef double weight[WEIGHT_COUNT]
+    cdef double deadline
+    cdef public long nodes
+    cdef bint timed_out
+
+    def __init__(self, houses, counts1, counts2, banners1, banners2, companions_left, weight, deadline):
+        cdef int location, house, i
+
+        for house in range(HOUSE_COUNT + 1):
+            self.masks[house] = 0
+
+        for location in range(LOCATIONS):
+            house = houses[location]
+
+            if house == NO_HOUSE:
+                self.masks[VARYS_MASK] |= (<uint64_t> 1) << location
+                self.varys = location
+
+            elif house != EMPTY:
+                self.masks[house] |= (<uint64_t> 1) << location
+
+        for house in range(HOUSE_COUNT):
+            self.counts[0][house], self.counts[1][house] = counts1[house], counts2[house]
+            self.banners[0][house], self.banners[1][house] = banners1[house], banners2[house]
+
+        for i in range(WEIGHT_COUNT):
+            self.weight[i] = weight[i]
+
+        self.companions_left = companions_left
+        self.deadline = deadline
+        self.nodes = 0
+        self.timed_out = False
+
+    cdef inline uint64_t get_occupied(self):
+        cdef uint64_t occupied = 0
+        cdef int house
+
+        for house in range(HOUSE_COUNT + 1):
+            occupied |= self.masks[house]
+
+        return occupied
+
+    cdef double evaluate(self, bint choose_companion):
+        cdef double score = self.weight[0] if choose_companion else 0
+        cdef int house, size, count1, count2, banners = 0
+
+        for house in range(HOUSE_COUNT):
+            banners += self.banners[0][house] - self.banners[1][house]
+
+        score += banners * self.weight[0]
+
+        for house in range(HOUSE_COUNT):
+            size, count1, count2 = house_sizes[house], self.counts[0][house], self.counts[1][house]
+
+            if 2 * count1 > size:
+                score += self.weight[2 + house]
+            elif 2 * count2 > size:
+                score -= self.weight[2 + house]
+            elif 2 * count1 == size and count1 == count2:
+                score -= (self.banners[1][house] - self.banners[0][house]) * self.weight[2 + house]
+
+        return score - popcount(self.get_occupied() & line_masks[self.varys]) * self.weight[1]
+
+    cdef double negamax(self, int turn, int depth, double alpha, double beta, bint choose_companion, int *best):
+        cdef int sign = 1 if turn == 1 else -1
+        cdef uint64_t moves, captured
+        cdef int move, house, varys, banner1, banner2, player = turn - 1, opponent = 2 - turn, child_best
+        cdef bint next_choose
+        cdef double val, best_val = -INFINITY
+
+        self.nodes += 1
+        best[0] = -1
+
+        if not self.timed_out and self.nodes % TIME_CHECK == 0 and time.time() > self.deadline:
+            self.timed_out = True
+
+        moves = self.get_occupied() & line_masks[self.varys]
+
+        if self.timed_out or moves == 0 or depth == 0 or choose_companion:
+            return sign * self.evaluate(choose_companion)
+
+        while moves:
+            move = lowest_bit(moves)
+            moves &= moves - 1
+
+            house = 0
+
+            while not (self.masks[house] >> move) & 1:
+                house += 1
+
+            # Make the move, capturing the cards of its house between Varys and the card
+            captured = (between_masks[self.varys][move] & self.masks[house]) | ((<uint64_t> 1) << move)
+            varys, banner1, banner2 = self.varys, self.banners[0][house], self.banners[1][house]
+
+            self.masks[house] &= ~captured
+            self.masks[VARYS_MASK] = (<uint64_t> 1) << move
+            self.varys = move
+            self.counts[player][house] += popcount(captured)
+
+            # The player with more cards of the house gets its banner, the player who moved wins a tie
+            if self.counts[opponent][house] > self.counts[player][house]:
+                self.banners[player][house], self.banners[opponent][house] = 0, 1
+            else:
+                self.banners[player][house], self.banners[opponent][house] = 1, 0
+
+            next_choose = self.masks[house] == 0 and self.companions_left
+
+            val = -self.negamax(3 - turn, depth - 1, -beta, -alpha, next_choose, &child_best)
+
+            # Take the move back
+            self.masks[house] |= captured
+            self.masks[VARYS_MASK] = (<uint64_t> 1) << varys
+            self.varys = varys
+            self.counts[player][house] -= popcount(captured)
+            self.banners[0][house], self.banners[1][house] = banner1, banner2
+
+            if val > best_val:
+                best_val, best[0] = val, move
+            if best_val > alpha:
+                alpha = best_val
+            if alpha >= beta:  # Alpha-Beta Pruning
+                break
+
+        return best_val
+
+    def search(self, int turn, int depth):
+        cdef int best
+        cdef double val = self.negamax(turn, depth, -INFINITY, INFINITY, False, &best)
+
+        return val, (best if best >= 0 else None)
+
+
+def search(houses, counts1, counts2, banners1, banners2, companions_left, turn, depth, weight, deadline):
+    '''
+    This function searches the card moves of a position, as utils.search_core.search does.
+
+    Parameters:
+        houses (list): house code of the card at each location (NO_HOUSE for Varys, EMPTY for no card)
+        counts1 (list): number of cards of each house of player 1
+        counts2 (list): number of cards of each house of player 2
+        banners1 (list): banner of each house of player 1 (0 or 1)
+        banners2 (list): banner of each house of player 2 (0 or 1)
+        companions_left (bool): True if there are companion cards left
+        turn (int): the player to move
+        depth (int): depth of the search
+        weight (list): weights of the evaluation function
+        deadline (float): time.time() after which the positions are only evaluated
+
+    Returns:
+        score (float): the score of the position for player 1
+        move (int/None): the best move
+        nodes (int): number of searched nodes
+    '''
+
+    searcher = Searcher(houses, counts1, counts2, banners1, banners2, companions_left, weight, deadline)
+    val, move = searcher.search(turn, depth)
+
+    return (val if turn == 1 else -val), move, searcher.nodes
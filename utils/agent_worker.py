@@ -0,0 +1,254 @@
+import atexit
+import copy
+import importlib
+import multiprocessing
+import threading
+import time
+
+# Use fresh interpreters for the workers so they never inherit the pygame window of the game
+context = multiprocessing.get_context('spawn')
+
+READY_TIMEOUT = 60  # Time limit for a worker to import its agent
+PROGRESS_INTERVAL = 0.1  # Seconds between the search progress reports of a worker
+
+running_workers = set()  # Workers with a running process
+
+
+@atexit.register
+def kill_workers():
+    '''
+    This function kills the running workers when the game exits, even after an error.
+    '''
+
+    # Multiprocessing would stop them with SIGTERM, which SDL catches, and wait forever
+    for worker in list(running_workers):
+        worker.cancel()
+
+
+def report_progress(conn, stats, stop):
+    '''
+    This function runs in a thread of the worker process and sends the search progress of the agent.
+
+    Parameters:
+        conn (Connection): the worker's end of the pipe
+        stats (dict): the search statistics of the agent
+        stop (Event): set when the search is over
+    '''
+
+    while not stop.wait(PROGRESS_INTERVAL):
+        conn.send(('progress', dict(stats)))
+
+
+def worker_loop(conn, agent_name, table_name=None):
+    '''
+    This function runs inside the worker process and serves the move requests of the game.
+
+    Parameters:
+        conn (Connection): the worker's end of the pipe
+        agent_name (str): name of the AI file
+        table_name (str): name of a shared transposition table for agents that can attach to one
+    '''
+
+    # Import the agent once, so its module level caches stay warm between moves
+    agent = importlib.import_module(agent_name)
+
+    if table_name is not None and hasattr(agent, 'attach_table'):
+        agent.attach_table(table_name)
+
+    # Import the rules here, the main module imports this one
+    from main import apply_move
+
+    conn.send(('ready',))
+
+    state = None  # The worker's own copy of the game state
+
+    while True:
+        message = conn.recv()
+        kind = message[0]
+
+        if kind == 'sync':  # Full game state
+            state = message[1]
+
+        elif kind == 'delta':  # Moves made since the last request
+            for turn, move in message[1]:
+                turn, state['choose_companion'], state['last_house'] = apply_move(
+                    state['cards'], state['companion_cards'], state['player1'], state['player2'], move, turn,
+                    state['choose_companion'], state['last_house'])
+
+        elif kind == 'move':  # Move request
+            choose_companion = message[1]
+
+            # Report the progress of agents that keep search statistics
+            stop = threading.Event()
+            reporter = None
+
+            if isinstance(getattr(agent, 'search_stats', None), dict):
+                reporter = threading.Thread(target=report_progress, args=(conn, agent.search_stats, stop), daemon=True)
+                reporter.start()
+
+            # The agent is free to modify what it gets, so hand it a copy of the state
+            move = agent.get_move(copy.deepcopy(state['cards']), copy.deepcopy(state['player1']),
+                                  copy.deepcopy(state['player2']), copy.deepcopy(state['companion_cards']),
+                                  choose_companion)
+
+            # Stop the reports before answering, so the move is the last message of the request
+            if reporter is not None:
+                stop.set()
+                reporter.join()
+
+            conn.send(('move', move))
+
+        elif kind == 'stop':
+            break
+
+    # Let the agent stop what it started, the exit hooks of the agent do not run in a worker process
+    if hasattr(agent, 'shutdown'):
+        agent.shutdown()
+
+    conn.close()
+
+
+class AgentWorker:
+    '''
+    This class represents a long-lived process that runs an AI agent.
+    '''
+
+    def __init__(self, agent_name, table_name=None):
+        '''
+        This function initializes the worker.
+
+        Parameters:
+            agent_name (str): name of the AI file
+            table_name (str): name of a shared transposition table for the agent to attach to
+        '''
+
+        self.agent_name = agent_name
+        self.table_name = table_name
+        self.process = None
+        self.conn = None
+        self.synced = 0  # Number of moves of the history the worker has seen
+
+    def start(self):
+        '''
+        This function starts the worker process and waits for the agent to be imported.
+        '''
+
+        self.conn, child_conn = context.Pipe()
+
+        # Not a daemon, so the agent can start processes of its own (the helpers of Lazy SMP), kill_workers still
+        # stops it when the game exits
+        self.process = context.Process(target=worker_loop, args=(child_conn, self.agent_name, self.table_name))
+        self.process.start()
+        running_workers.add(self)
+
+        child_conn.close()
+
+        # Wait for the worker to import the agent
+        if not self.conn.poll(READY_TIMEOUT):
+            self.cancel()
+
+            raise RuntimeError("Agent worker for " + self.agent_name + " did not start.")
+
+        self.conn.recv()
+
+    def is_alive(self):
+        '''
+        This function checks if the worker process is running.
+
+        Returns:
+            alive (bool): True if the worker is running, False otherwise
+        '''
+
+        return self.process is not None and self.process.is_alive()
+
+    def get_move(self, cards, player1, player2, companion_cards, choose_companion, last_house, history, timeout,
+                 progress=None):
+        '''
+        This function gets the move from the agent of the worker.
+
+        Parameters:
+            cards (list): list of Card objects
+            player1 (Player): player 1
+            player2 (Player): player 2
+            companion_cards (dict): dictionary of companion cards
+            choose_companion (bool): flag to choose a companion card
+            last_house (str): house of the last chosen card
+            history (list): list of (turn, move) pairs made in the game so far
+            timeout (float): time limit for the move in seconds
+            progress (function): called with the search statistics the agent reports while it thinks
+
+        Returns:
+            move (int/list): move from the agent (None if the time limit passed)
+        '''
+
+        if not self.is_alive():
+            self.start()
+
+            # Send the whole game state to the new worker
+            self.conn.send(('sync', {'cards': cards, 'companion_cards': companion_cards, 'player1': player1,
+                                     'player2': player2, 'choose_companion': choose_companion,
+                                     'last_house': last_house}))
+
+        elif self.synced < len(history):
+            # Only send the moves made since the last request
+            self.conn.send(('delta', history[self.synced:]))
+
+        self.synced = len(history)
+
+        self.conn.send(('move', choose_companion))
+
+        deadline = time.time() + timeout
+
+        while True:
+            if not self.conn.poll(max(0, deadline - time.time())):
+                # Stop the search, the worker is restarted on the next request
+                self.cancel()
+
+                return None
+
+            try:
+                message = self.conn.recv()
+
+            except EOFError:  # The agent crashed
+                self.cancel()
+
+                return None
+
+            if message[0] == 'move':
+                return message[1]
+
+            if progress is not None:
+                progress(message[1])
+
+    def cancel(self):
+        '''
+        This function kills the worker process.
+        '''
+
+        if self.process is not None:
+            # SDL catches SIGTERM once pygame is initialized, so the process has to be killed
+            self.process.kill()
+            self.process.join()
+
+        if self.conn is not None:
+            self.conn.close()
+
+        self.process = None
+        self.conn = None
+
+        running_workers.discard(self)
+
+    def close(self):
+        '''
+        This function stops the worker process.
+        '''
+
+        if self.is_alive():
+            try:
+                self.conn.send(('stop',))
+                self.process.join(1)
+
+            except (BrokenPipeError, OSError):
+                pass
+
+        self.cancel()
@@ -0,0 +1,208 @@
+from os.path import abspath, join, dirname
+
+import numpy as np
+
+from utils.classes import ROWS, COLS, HOUSES
+from utils.playout import LINES, BETWEEN, LOCATIONS, make_boards, make_cards
+from utils.search_core import NO_HOUSE
+
+POOL_VERSION = 1  # Version of the pool files
+POOL_FILE = join(dirname(dirname(abspath(__file__))), "boards", "pool.npz")  # Default pool file
+BATCH_SIZE = 10000  # Boards of a batch of the features, which take 36 x 36 bytes for each board
+
+# Locations of the board turned and mirrored: SYMMETRIES[s, location] is the location that moves to location under
+# symmetry s. Captures run along rows and columns, which the 8 symmetries of the square keep, so symmetric boards play
+# the same games
+GRID = np.arange(LOCATIONS).reshape(ROWS, COLS)
+SYMMETRIES = np.array([np.rot90(grid, turns).ravel() for grid in (GRID, GRID.T) for turns in range(4)])
+
+
+def canonical_keys(boards):
+    '''
+    This function finds the canonical form of boards: the smallest of their 8 symmetries, as two 64-bit integers of 3
+    bits for each location.
+
+    Parameters:
+        boards (np.ndarray): house code at each location, of shape (count, 36) (NO_HOUSE for Varys)
+
+    Returns:
+        keys (np.ndarray): canonical form of each board, of shape (count, 2)
+    '''
+
+    # Every symmetry of every board, as two halves of 18 locations in base 8, the first location the most significant
+    shifts = np.uint64(3) * np.arange(LOCATIONS // 2 - 1, -1, -1, dtype=np.uint64)
+    turned = boards[:, SYMMETRIES].astype(np.uint64).reshape(len(boards), len(SYMMETRIES), 2, LOCATIONS // 2)
+    halves = (turned << shifts).sum(3, dtype=np.uint64)
+
+    # The smallest first half, and the smallest second half among the symmetries that share it
+    first = halves[:, :, 0].min(1)
+    second = np.where(halves[:, :, 0] == first[:, None], halves[:, :, 1], np.iinfo(np.uint64).max).min(1)
+
+    return np.stack([first, second], 1)
+
+
+def line_features(boards):
+    '''
+    This function finds the lines of the houses around Varys on boards: the cards of each house in the row and column
+    of Varys, and the most cards of each house one move takes (the card and the cards of its house between it and
+    Varys).
+
+    Parameters:
+        boards (np.ndarray): house code at each location, of shape (count, 36) (NO_HOUSE for Varys)
+
+    Returns:
+        varys (np.ndarray): location of Varys on each board
+        line_houses (np.ndarray): cards of each house in line with Varys, of shape (count, 7)
+        captures (np.ndarray): most cards of each house a move takes, of shape (count, 7)
+    '''
+
+    varys = (boards == NO_HOUSE).argmax(1)
+    line_houses = np.empty((len(boards), len(HOUSES)), dtype=np.int8)
+    captures = np.empty((len(boards), len(HOUSES)), dtype=np.int8)
+
+    for start in range(0, len(boards), BATCH_SIZE):
+        batch, batch_varys = boards[start:start + BATCH_SIZE], varys[start:start + BATCH_SIZE]
+
+        houses = batch[:, :, None] == np.arange(len(HOUSES))
+        in_line = LINES[batch_varys]
+
+        # Cards taken by a move to each location: the card and the cards of its house between it and Varys
+        same = batch[:, :, None] == batch[:, None, :]
+        taken = np.where(in_line, 1 + (BETWEEN[batch_varys] & same).sum(2), 0)
+
+        line_houses[start:start + BATCH_SIZE] = (houses & in_line[:, :, None]).sum(1)
+        captures[start:start + BATCH_SIZE] = np.where(houses, taken[:, :, None], 0).max(1)
+
+    return varys.astype(np.int8), line_houses, captures
+
+
+def make_pool(count, seed):
+    '''
+    This function makes a pool of distinct random boards and their features.
+
+    Parameters:
+        count (int): number of boards made, less the duplicates
+        seed (int): seed of the boards
+
+    Returns:
+        pool (dict): the arrays of the pool (boards, keys, varys, line_houses and captures), and the seed
+    '''
+
+    boards = make_boards(count, np.random.default_rng(seed))
+    keys = canonical_keys(boards)
+
+    # Keep the first board of each canonical form, in the order they were made
+    _, first = np.unique(keys, axis=0, return_index=True)
+    first.sort()
+    boards, keys = boards[first], keys[first]
+
+    varys, line_houses, captures = line_features(boards)
+
+    return {'boards': boards, 'keys': keys, 'varys': varys, 'line_houses': line_houses, 'captures': captures,
+            'seed': seed}
+
+
+def save_pool(filename, pool):
+    '''
+    This function saves a pool of boards.
+
+    Parameters:
+        filename (str): the pool file
+        pool (dict): the arrays of the pool, as make_pool gives them
+    '''
+
+    np.savez_compressed(filename, version=POOL_VERSION, **pool)
+
+
+class BoardPool:
+    '''
+    This class serves the boards of a pool file, so games start without making boards. Workers drawing from the same
+    pool take every workers-th board from their own one on, so they never play the same board.
+    '''
+
+    def __init__(self, filename=POOL_FILE, worker=0, workers=1):
+        '''
+        This function loads a pool file.
+
+        Parameters:
+            filename (str): the pool file
+            worker (int): index of this worker
+            workers (int): number of workers drawing from the pool
+        '''
+
+        with np.load(filename) as data:
+            if int(data['version']) != POOL_VERSION:
+                raise ValueError(f"{filename} is a version {int(data['version'])} pool file, expected {POOL_VERSION}.")
+
+            self.boards = data['boards']
+            self.keys = data['keys']
+            self.varys = data['varys']
+            self.line_houses = data['line_houses']
+            self.captures = data['captures']
+            self.seed = int(data['seed'])
+
+        self.next = worker
+        self.step = workers
+
+    def __len__(self):
+        '''
+        This function returns the number of boards of the pool.
+
+        Returns:
+            count (int): number of boards
+        '''
+
+        return len(self.boards)
+
+    def draw_index(self):
+        '''
+        This function takes the index of the next board of this worker, starting over when the pool runs out.
+
+        Returns:
+            index (int): index of the board
+        '''
+
+        index = self.next % len(self.boards)
+        self.next += self.step
+
+        return index
+
+    def get_board(self, index):
+        '''
+        This function makes the cards of a board of the pool.
+
+        Parameters:
+            index (int): index of the board
+
+        Returns:
+            cards (Board): the cards on the board
+            companion_cards (dict): dictionary of companion cards
+        '''
+
+        return make_cards(self.boards[index])
+
+    def draw(self):
+        '''
+        This function draws the next board of this worker.
+
+        Returns:
+            cards (Board): the cards on the board
+            companion_cards (dict): dictionary of companion cards
+        '''
+
+        return self.get_board(self.draw_index())
+
+    def get_features(self, index):
+        '''
+        This function gets the features of a board of the pool.
+
+        Parameters:
+            index (int): index of the board
+
+        Returns:
+            features (dict): location of Varys, cards of each house in line with it and most cards of each house a move
+                takes
+        '''
+
+        return {'varys': int(self.varys[index]), 'line_houses': self.line_houses[index].tolist(),
+                'captures': self.captures[index].tolist()}
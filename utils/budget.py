@@ -0,0 +1,226 @@
+import math
+
+SAFETY = 0.5  # Share of the time limit a move plans to use, the rest covers the errors of the estimates
+LEARNING_RATE = 0.3  # Weight of a new observation in the running estimates
+PRIOR_EXPONENT = 0.7  # Effective branching factor of alpha-beta as a power of the mobility before any search
+PRIOR_RATE = 15000  # Nodes searched per second before any search
+PRIOR_CAPTURES = 1.15  # Cards taken off the board per ply before any move (random games take about 35 in 30 plies)
+MIN_BRANCHING = 1.5  # Smallest effective branching factor estimated
+MAX_CORRECTION = 4  # Largest correction of the predicted times by the time used in the game so far
+MAX_STEP = 1  # Most plies a search may go deeper than the last complete one, as the estimates can be far off
+
+
+class BudgetPlanner:
+    '''
+    This class plans the depth of the searches of a game from the time each move is allowed. It predicts the nodes of a
+    search from the branching of the position, and learns from every search how fast it searches and how the branching
+    of the positions grows its tree.
+    '''
+
+    def __init__(self, timeout, min_depth, max_depth):
+        '''
+        This function initializes the planner.
+
+        Parameters:
+            timeout (float): seconds the game allows a move
+            min_depth (int): smallest depth planned
+            max_depth (int): largest depth planned
+        '''
+
+        self.timeout = timeout
+        self.min_depth = min_depth
+        self.max_depth = max_depth
+        self.last_cards = None
+
+        self.new_game()
+
+    def new_game(self):
+        '''
+        This function forgets what the planner learned in the last game. The estimates learned in its endgame are far
+        off for the opening of the next one, and without a complete search of the game the depth has no step limit, so
+        every game starts from the priors, as in a fresh process.
+        '''
+
+        self.exponent = PRIOR_EXPONENT
+        self.rate = PRIOR_RATE
+        self.captures = PRIOR_CAPTURES
+        self.last_depth = None  # Depth of the last complete search of the game, None before the first one
+
+        # Time used and time predicted over the game, their ratio corrects the predictions of the next moves
+        self.time_used = 0
+        self.time_predicted = 0
+        self.moves = 0
+        self.timeouts = 0
+
+    def get_target(self):
+        '''
+        This function gets the seconds a move plans to use.
+
+        Returns:
+            target (float): seconds planned for a move
+        '''
+
+        return self.timeout * SAFETY
+
+    def estimate_plies(self, cards_left):
+        '''
+        This function estimates the plies left in the game from the cards left on the board. Every card move takes at
+        least one card, so the game cannot last more plies than the cards left other than Varys.
+
+        Parameters:
+            cards_left (int): number of cards on the board
+
+        Returns:
+            plies (int): estimated plies left
+        '''
+
+        return max(1, min(cards_left - 1, math.ceil((cards_left - 1) / self.captures)))
+
+    def get_branching(self, mobility):
+        '''
+        This function estimates the effective branching factor of the search of a position.
+
+        Parameters:
+            mobility (int): number of card moves of the position
+
+        Returns:
+            branching (float): estimated effective branching factor
+        '''
+
+        return max(MIN_BRANCHING, mobility ** self.exponent)
+
+    def get_correction(self):
+        '''
+        This function gets how much longer than predicted the searches of the game took. Searches faster than predicted
+        leave the plan as it is, the learned estimates already catch up with them.
+
+        Returns:
+            correction (float): ratio of the time used to the time predicted, at least 1
+        '''
+
+        if self.time_predicted <= 0:
+            return 1
+
+        return min(MAX_CORRECTION, max(1, self.time_used / self.time_predicted))
+
+    def predict_nodes(self, depth, mobility, width):
+        '''
+        This function predicts the nodes a search visits.
+
+        Parameters:
+            depth (int): depth of the search
+            mobility (int): number of card moves of the position
+            width (int): number of moves at the root of the search
+
+        Returns:
+            nodes (float): predicted nodes
+        '''
+
+        return width * self.get_branching(mobility) ** (depth - 1)
+
+    def predict_seconds(self, depth, mobility, width):
+        '''
+        This function predicts the seconds a search takes.
+
+        Parameters:
+            depth (int): depth of the search
+            mobility (int): number of card moves of the position
+            width (int): number of moves at the root of the search
+
+        Returns:
+            seconds (float): predicted seconds
+        '''
+
+        return self.predict_nodes(depth, mobility, width) / self.rate * self.get_correction()
+
+    def plan(self, cards_left, mobility, width=None):
+        '''
+        This function plans the depth of the search of a move: the deepest one predicted to take less than the target
+        time, no deeper than the plies left in the game and at most MAX_STEP plies deeper than the last complete
+        search. A search cut by the time limit is only used for its partial evaluations, so the depth grows one step
+        at a time instead of trusting estimates learned from a few small searches.
+
+        Parameters:
+            cards_left (int): number of cards on the board
+            mobility (int): number of card moves of the position
+            width (int): number of moves at the root of the search, the mobility if None
+
+        Returns:
+            depth (int): depth of the search
+        '''
+
+        if width is None:
+            width = mobility
+
+        # The cards taken since the last move teach how fast the board empties (the opponent moved in between), more
+        # cards than at the last move start a new game
+        if self.last_cards is not None and cards_left < self.last_cards:
+            self.captures += LEARNING_RATE * ((self.last_cards - cards_left) / 2 - self.captures)
+
+        elif self.last_cards is not None and cards_left > self.last_cards:
+            self.new_game()
+
+        self.last_cards = cards_left
+
+        target = self.get_target()
+        limit = max(self.min_depth, min(self.max_depth, self.estimate_plies(cards_left)))
+
+        if self.last_depth is not None:
+            limit = max(self.min_depth, min(limit, self.last_depth + MAX_STEP))
+        depth = self.min_depth
+
+        while depth < limit and self.predict_seconds(depth + 1, mobility, max(width, 1)) <= target:
+            depth += 1
+
+        return depth
+
+    def record(self, depth, mobility, width, nodes, seconds, completed):
+        '''
+        This function learns from a search of the game.
+
+        Parameters:
+            depth (int): depth of the search
+            mobility (int): number of card moves of the position
+            width (int): number of moves at the root of the search, the mobility if None
+            nodes (int): nodes the search visited
+            seconds (float): seconds the search took
+            completed (bool): False if the search was cut by the time limit
+        '''
+
+        if width is None:
+            width = mobility
+
+        # The prediction before the correction, so the correction measures the estimates alone
+        self.time_used += seconds
+        self.time_predicted += self.predict_nodes(depth, mobility, max(width, 1)) / self.rate
+        self.moves += 1
+
+        # Searches too small to time say little about the speed
+        if seconds > 0.01 and nodes > 0:
+            self.rate += LEARNING_RATE * (nodes / seconds - self.rate)
+
+        if not completed:
+            # The tree grew faster than predicted, and the nodes of a cut search understate it. The next search stays
+            # below this one
+            self.timeouts += 1
+            self.exponent *= 1 + LEARNING_RATE
+            self.last_depth = depth - 1 - MAX_STEP
+
+        else:
+            self.last_depth = depth
+
+        if completed and depth > 1 and mobility > 1 and nodes > width:
+            exponent = math.log(nodes / max(width, 1)) / ((depth - 1) * math.log(mobility))
+            self.exponent += LEARNING_RATE * (exponent - self.exponent)
+
+    def get_stats(self):
+        '''
+        This function gets the estimates of the planner and the time used in the game.
+
+        Returns:
+            stats (dict): the estimates and the time used
+        '''
+
+        return {'moves': self.moves, 'time_used': self.time_used, 'timeouts': self.timeouts,
+                'exponent': self.exponent, 'rate': self.rate, 'captures': self.captures,
+                'correction': self.get_correction()}
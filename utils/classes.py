@@ -1,8 +1,60 @@
+import json
+from os import pardir
+from os.path import abspath, join, dirname
+
+HOUSES = ('Stark', 'Greyjoy', 'Lannister', 'Targaryen', 'Baratheon', 'Tyrell', 'Tully')  # Houses of the game
+HOUSE_NAMES = HOUSES + ('No House',)  # Houses of the cards, indexed by their code
+HOUSE_CODES = {house: i for i, house in enumerate(HOUSE_NAMES)}  # Code of each house
+
+CARD_NAMES = []  # Names of the cards, indexed by their code
+NAME_CODES = {}  # Code of each name
+
+
+def intern_name(name):
+    '''
+    This function returns the code of a card name, giving a new code to names not seen before.
+
+    Parameters:
+        name (str): the name of the card
+
+    Returns:
+        code (int): the code of the name
+    '''
+
+    code = NAME_CODES.get(name)
+
+    if code is None:
+        code = len(CARD_NAMES)
+        CARD_NAMES.append(name)
+        NAME_CODES[name] = code
+
+    return code
+
+
+# Give codes to the characters once, in the order of the characters file
+with open(join(abspath(join(dirname(abspath(__file__)), pardir)), "assets", "characters.json")) as file:
+    for house, names in json.load(file).items():
+        if house != 'Companion':
+            for name in names:
+                intern_name(name)
+
+# Cards made by the companions
+intern_name('Jon Snow')
+intern_name('Gendry')
+
+VARYS = NAME_CODES['Varys']  # Code of Varys
+NO_HOUSE = HOUSE_CODES['No House']  # Code of the house of Varys
+
+
 class Card:
     '''
     This class represents a card in the game.
+
+    The house and the name are stored as small integer codes. get_house and get_name return the strings.
     '''
 
+    __slots__ = ('house_code', 'name_code', 'location')
+
     def __init__(self, house, name, location):
         '''
         This function initializes the card.
@@ -13,9 +65,55 @@ class Card:
             location (int): the location of the card
         '''
 
-        self.house = house
-        self.name = name
+        self.house_code = HOUSE_CODES[house]
+        self.name_code = intern_name(name)
         self.location = location
+
+    def __deepcopy__(self, memo):
+        '''
+        This function copies the card without looking up its codes again.
+
+        Parameters:
+            memo (dict): dictionary of already copied objects
+
+        Returns:
+            card (Card): the copy of the card
+        '''
+
+        card = Card.__new__(Card)
+        card.house_code = self.house_code
+        card.name_code = self.name_code
+        card.location = self.location
+
+        memo[id(self)] = card
+
+        return card
+
+    def __reduce__(self):
+        '''
+        This function pickles the card by its strings, since name codes are given per process.
+
+        Returns:
+            reduced (tuple): the class and the arguments to make the card again
+        '''
+
+        return Card, (self.get_house(), self.get_name(), self.location)
+
+    @property
+    def house(self):
+        '''
+        This function returns the house of the card, as the old attribute did.
+        '''
+
+        return HOUSE_NAMES[self.house_code]
+
+    @property
+    def name(self):
+        '''
+        This function returns the name of the card, as the old attribute did.
+        '''
+
+        return CARD_NAMES[self.name_code]
     
     def get_house(self):
         '''
@@ -25,7 +123,7 @@ class Card:
             house (str): the house of the card
         '''
 
-        return self.house
+        return HOUSE_NAMES[self.house_code]
     
     def get_name(self):
         '''
@@ -35,7 +133,27 @@ class Card:
             name (str): the name of the card
         '''
 
-        return self.name
+        return CARD_NAMES[self.name_code]
+
+    def get_house_code(self):
+        '''
+        This function returns the code of the house of the card.
+
+        Returns:
+            house_code (int): the code of the house of the card
+        '''
+
+        return self.house_code
+
+    def get_name_code(self):
+        '''
+        This function returns the code of the name of the card.
+
+        Returns:
+            name_code (int): the code of the name of the card
+        '''
+
+        return self.name_code
     
     def get_location(self):
         '''
@@ -56,9 +174,238 @@ class Card:
 
         self.location = location
 
+
+ROWS = 6  # Number of rows in the board
+COLS = 6  # Number of columns in the board
+
+# Locations in the same row or column as each location, in increasing order
+LINES = tuple(tuple(other for other in range(ROWS * COLS)
+                    if other != location and (other // COLS == location // COLS or other % COLS == location % COLS))
+              for location in range(ROWS * COLS))
+
+
+class Board:
+    '''
+    This class represents the cards on the board, indexed by their location.
+
+    Iterating over the board gives the cards in the order of their locations, like the list of cards it replaces.
+    '''
+
+    def __init__(self, cards=()):
+        '''
+        This function initializes the board.
+
+        Parameters:
+            cards (iterable): the cards to put on the board
+        '''
+
+        self.slots = [None] * (ROWS * COLS)  # Card at each location
+        self.varys = None  # The Varys card
+        self.size = 0  # Number of cards on the board
+        self.house_counts = [0] * len(HOUSE_NAMES)  # Number of cards of each house on the board
+        self.row_counts = [0] * ROWS  # Number of cards in each row
+        self.col_counts = [0] * COLS  # Number of cards in each column
+        self.mask = 0  # Locations of the cards as bits
+
+        for card in cards:
+            self.append(card)
+
+    def __deepcopy__(self, memo):
+        '''
+        This function copies the board and its cards.
+
+        Parameters:
+            memo (dict): dictionary of already copied objects
+
+        Returns:
+            board (Board): the copy of the board
+        '''
+
+        board = Board.__new__(Board)
+        board.slots = [None if card is None else card.__deepcopy__(memo) for card in self.slots]
+        board.varys = None if self.varys is None else board.slots[self.varys.location]
+        board.size = self.size
+        board.house_counts = self.house_counts[:]
+        board.row_counts = self.row_counts[:]
+        board.col_counts = self.col_counts[:]
+        board.mask = self.mask
+
+        memo[id(self)] = board
+
+        return board
+
+    def __iter__(self):
+        '''
+        This function iterates over the cards in the order of their locations.
+        '''
+
+        return (card for card in self.slots if card is not None)
+
+    def __len__(self):
+        '''
+        This function returns the number of cards on the board.
+        '''
+
+        return self.size
+
+    def append(self, card):
+        '''
+        This function puts a card on the board at its location.
+
+        Parameters:
+            card (Card): the card to put on the board
+        '''
+
+        self.slots[card.location] = card
+        self.size += 1
+        self.house_counts[card.house_code] += 1
+        self.occupy(card.location, 1)
+
+        if card.name_code == VARYS:
+            self.varys = card
+
+    def remove(self, card):
+        '''
+        This function removes a card from the board.
+
+        Parameters:
+            card (Card): the card to remove
+        '''
+
+        self.slots[card.location] = None
+        self.size -= 1
+        self.house_counts[card.house_code] -= 1
+        self.occupy(card.location, -1)
+
+        if card is self.varys:
+            self.varys = None
+
+    def occupy(self, location, change):
+        '''
+        This function updates the occupancy of the row, the column and the bit of a location.
+
+        Parameters:
+            location (int): the location
+            change (int): 1 if a card was put at the location, -1 if it was taken from it
+        '''
+
+        self.row_counts[location // COLS] += change
+        self.col_counts[location % COLS] += change
+        self.mask ^= 1 << location
+
+    def get_card(self, location):
+        '''
+        This function returns the card at a location.
+
+        Parameters:
+            location (int): the location of the card
+
+        Returns:
+            card (Card/None): the card at the location
+        '''
+
+        return self.slots[location]
+
+    def get_varys_location(self):
+        '''
+        This function returns the location of Varys.
+
+        Returns:
+            location (int): the location of Varys
+        '''
+
+        return self.varys.location
+
+    def get_varys_moves(self):
+        '''
+        This function returns the locations of the cards in the same row or column as Varys.
+
+        Returns:
+            moves (list): locations of the cards, in increasing order
+        '''
+
+        slots = self.slots
+
+        return [location for location in LINES[self.varys.location] if slots[location] is not None]
+
+    def get_mobility(self):
+        '''
+        This function returns the number of cards in the same row or column as Varys, without listing them.
+
+        Returns:
+            mobility (int): the number of possible moves
+        '''
+
+        if self.varys is None:
+            return 0
+
+        location = self.varys.location
+
+        # Varys is counted in both its row and its column
+        return self.row_counts[location // COLS] + self.col_counts[location % COLS] - 2
+
+    def get_mask(self):
+        '''
+        This function returns the locations of the cards on the board.
+
+        Returns:
+            mask (int): bit i is set if there is a card at location i
+        '''
+
+        return self.mask
+
+    def get_house_count(self, house):
+        '''
+        This function returns the number of cards of a house on the board.
+
+        Parameters:
+            house (str): the house of the cards
+
+        Returns:
+            count (int): the number of cards of the house
+        '''
+
+        return self.house_counts[HOUSE_CODES[house]]
+
+    def move_varys(self, location):
+        '''
+        This function moves Varys to an empty location.
+
+        Parameters:
+            location (int): the new location of Varys
+        '''
+
+        self.slots[self.varys.location] = None
+        self.occupy(self.varys.location, -1)
+        self.varys.location = location
+        self.slots[location] = self.varys
+        self.occupy(location, 1)
+
+    def swap(self, first_location, second_location):
+        '''
+        This function swaps the cards at two locations.
+
+        Parameters:
+            first_location (int): the location of the first card
+            second_location (int): the location of the second card
+        '''
+
+        first_card = self.slots[first_location]
+        second_card = self.slots[second_location]
+
+        first_card.location = second_location
+        second_card.location = first_location
+
+        self.slots[first_location] = second_card
+        self.slots[second_location] = first_card
+
+
 class Player:
     '''
     This class represents a player in the game.
+
+    The number of cards of each house is kept in a list of 7 counts. The cards themselves are only
+    kept as a history for the display, and are turned into per-house lists when they are asked for.
     '''
 
     def __init__(self, agent):
@@ -70,8 +417,34 @@ class Player:
         '''
 
         self.agent = agent
-        self.cards = {'Stark': [], 'Greyjoy': [], 'Lannister': [], 'Targaryen': [], 'Baratheon': [], 'Tyrell': [], 'Tully': []}
+        self.counts = [0] * len(HOUSES)  # Number of cards of each house
+        self.history = None  # Added cards as a linked list of (card, previous) pairs, shared between copies
+        self.materialized = None  # Cached result of get_cards
         self.banners = {'Stark': 0, 'Greyjoy': 0, 'Lannister': 0, 'Targaryen': 0, 'Baratheon': 0, 'Tyrell': 0, 'Tully': 0}
+        self.banner_mask = 0  # Banners of the player as bits, in the order of HOUSES
+
+    def __deepcopy__(self, memo):
+        '''
+        This function copies the player. The card history is never changed in place, so it is shared.
+
+        Parameters:
+            memo (dict): dictionary of already copied objects
+
+        Returns:
+            player (Player): the copy of the player
+        '''
+
+        player = Player.__new__(Player)
+        player.agent = self.agent
+        player.counts = self.counts[:]
+        player.history = self.history
+        player.materialized = None
+        player.banners = self.banners.copy()
+        player.banner_mask = self.banner_mask
+
+        memo[id(self)] = player
+
+        return player
 
     def get_agent(self):
         '''
@@ -91,8 +464,70 @@ class Player:
             cards (dict): the cards of the player
         '''
 
-        return self.cards
-    
+        if self.materialized is None:
+            cards = {house: [] for house in HOUSES}
+
+            # Walk the history from the last added card to the first one
+            node = self.history
+
+            while node is not None:
+                card, node = node
+                cards[HOUSE_NAMES[card.house_code]].append(card)
+
+            for house in HOUSES:
+                cards[house].reverse()
+
+            self.materialized = cards
+
+        return self.materialized
+
+    @property
+    def cards(self):
+        '''
+        This function returns the cards of the player, as the old attribute did.
+
+        Returns:
+            cards (dict): the cards of the player
+        '''
+
+        return self.get_cards()
+
+    def get_card_count(self, house):
+        '''
+        This function returns the number of cards of a house the player has.
+
+        Parameters:
+            house (str): the house of the cards
+
+        Returns:
+            count (int): the number of cards of the house
+        '''
+
+        return self.counts[HOUSE_CODES[house]]
+
+    def get_counts(self):
+        '''
+        This function returns the number of cards of every house the player has.
+
+        Returns:
+            counts (list): the number of cards of each house, in the order of HOUSES
+        '''
+
+        return self.counts
+
+    def set_counts(self, counts):
+        '''
+        This function sets the number of cards of every house, for players restored from a saved position.
+        Such players have no card history, so get_cards only returns the cards added afterwards.
+
+        Parameters:
+            counts (list): the number of cards of each house, in the order of HOUSES
+        '''
+
+        self.counts = list(counts)
+        self.history = None
+        self.materialized = None
+
     def get_banners(self):
         '''
         This function returns the banners of the player.
@@ -102,6 +537,16 @@ class Player:
         '''
 
         return self.banners
+
+    def get_banner_mask(self):
+        '''
+        This function returns the banners of the player as bits.
+
+        Returns:
+            mask (int): bit i is set if the player has the banner of HOUSES[i]
+        '''
+
+        return self.banner_mask
     
     def add_card(self, card):
         '''
@@ -111,7 +556,9 @@ class Player:
             card (Card): the card to add to the player
         '''
 
-        self.cards[card.get_house()].append(card)
+        self.counts[card.house_code] += 1
+        self.history = (card, self.history)
+        self.materialized = None
     
     def get_house_banner(self, house):
         '''
@@ -122,6 +569,7 @@ class Player:
         '''
 
         self.banners[house] = 1
+        self.banner_mask |= 1 << HOUSE_CODES[house]
     
     def remove_house_banner(self, house):
         '''
@@ -131,4 +579,5 @@ class Player:
             house (str): the house to remove the banner from the player
         '''
 
-        self.banners[house] = 0
\ No newline at end of file
+        self.banners[house] = 0
+        self.banner_mask &= ~(1 << HOUSE_CODES[house])
\ No newline at end of file
@@ -0,0 +1,149 @@
+import functools
+
+HOUSE_SIZES = (8, 7, 6, 5, 4, 3, 2)  # Number of cards of each house, in the order of HOUSES
+CACHE_SIZE = 1 << 16  # Default number of house/banner scores an evaluator keeps
+MAX_EVALUATORS = 4  # Number of sets of weights with a cached evaluator, training makes new weights every game
+
+
+def house_banner_score(player1_counts, player2_counts, player1_banners, player2_banners, banner_weight,
+                       house_weights):
+    '''
+    This function scores the banners and the house majorities of the players.
+
+    Parameters:
+        player1_counts (tuple): number of cards of each house of player 1
+        player2_counts (tuple): number of cards of each house of player 2
+        player1_banners (tuple): banner of each house of player 1 (0 or 1)
+        player2_banners (tuple): banner of each house of player 2 (0 or 1)
+        banner_weight (int): weight of the banner difference
+        house_weights (list): weight of each house, in the order of HOUSES
+
+    Returns:
+        score (int): the score, positive when player 1 is ahead
+    '''
+
+    # Add the banner difference to the score, scaled by a weight
+    score = (sum(player1_banners) - sum(player2_banners)) * banner_weight
+
+    # Adjust the score based on card counts for each house
+    for i, size in enumerate(HOUSE_SIZES):
+        if player1_counts[i] > size / 2:
+            score += house_weights[i]
+
+        elif player2_counts[i] > size / 2:
+            score -= house_weights[i]
+
+        elif player1_counts[i] == player2_counts[i] == size / 2:
+            score -= (player2_banners[i] - player1_banners[i]) * house_weights[i]
+
+    return score
+
+
+class CachedEvaluator:
+    '''
+    This class evaluates boards as a house/banner term, remembered for each signature of counts and banners, plus a
+    mobility term.
+    '''
+
+    def __init__(self, weight, size=CACHE_SIZE):
+        '''
+        This function initializes the evaluator.
+
+        Parameters:
+            weight (list): weights of the evaluation function (choose companion and banners, mobility, 7 houses)
+            size (int): number of house/banner scores to keep
+        '''
+
+        self.weight = tuple(weight)
+
+        # Least recently used scores are dropped once the cache is full
+        self.house_term = functools.lru_cache(maxsize=size)(self.compute_house_term)
+
+    def compute_house_term(self, player1_counts, player2_counts, player1_banners, player2_banners, choose_companion):
+        '''
+        This function computes the part of the score that only depends on the counts, banners and choose_companion.
+
+        Parameters:
+            player1_counts (tuple): number of cards of each house of player 1
+            player2_counts (tuple): number of cards of each house of player 2
+            player1_banners (tuple): banner of each house of player 1
+            player2_banners (tuple): banner of each house of player 2
+            choose_companion (bool): flag to choose a companion card
+
+        Returns:
+            score (int): the house/banner term
+        '''
+
+        score = self.weight[0] if choose_companion else 0
+
+        return score + house_banner_score(player1_counts, player2_counts, player1_banners, player2_banners,
+                                          self.weight[0], self.weight[2:])
+
+    def evaluate(self, cards, player1, player2, choose_companion):
+        '''
+        This function evaluates a board.
+
+        Parameters:
+            cards (Board): the cards on the board
+            player1 (Player): the player
+            player2 (Player): the opponent
+            choose_companion (bool): flag to choose a companion card
+
+        Returns:
+            score (int): the score of the board
+        '''
+
+        score = self.house_term(tuple(player1.get_counts()), tuple(player2.get_counts()),
+                                tuple(player1.get_banners().values()), tuple(player2.get_banners().values()),
+                                choose_companion)
+
+        # Deduct the number of valid moves from the score
+        return score - cards.get_mobility() * self.weight[1]
+
+    def get_stats(self):
+        '''
+        This function returns the statistics of the cache.
+
+        Returns:
+            stats (dict): hits, misses, hit rate and number of kept scores
+        '''
+
+        info = self.house_term.cache_info()
+        lookups = info.hits + info.misses
+
+        return {'hits': info.hits, 'misses': info.misses, 'hit_rate': info.hits / lookups if lookups else 0.0,
+                'size': info.currsize}
+
+    def clear(self):
+        '''
+        This function forgets the kept scores and the statistics.
+        '''
+
+        self.house_term.cache_clear()
+
+
+# One evaluator for each set of weights, so the scores of different weights never mix
+evaluators = {}
+
+
+def get_evaluator(weight):
+    '''
+    This function gets the cached evaluator of a set of weights.
+
+    Parameters:
+        weight (list): weights of the evaluation function
+
+    Returns:
+        evaluator (CachedEvaluator): the evaluator of the weights
+    '''
+
+    weight = tuple(weight)
+
+    if weight not in evaluators:
+        # Drop the evaluator of the oldest weights
+        if len(evaluators) >= MAX_EVALUATORS:
+            del evaluators[next(iter(evaluators))]
+
+        evaluators[weight] = CachedEvaluator(weight)
+
+    return evaluators[weight]
@@ -0,0 +1,212 @@
+import bisect
+import hashlib
+import zlib
+
+import numpy as np
+from moviepy.editor import VideoClip
+from PIL import Image
+
+FRAME_STORAGES = ('raw', 'palette', 'delta')  # Ways to keep the frames of a recording
+
+# Number of previous frames a delta can be taken against. Choosing a companion grays the cards out and back, so the
+# frame two back is often closer than the last one
+DELTA_BASES = 2
+
+
+class FrameRecorder:
+    '''
+    This class keeps the unique frames of a recording with the number of video frames each one lasts.
+    '''
+
+    def __init__(self, storage='delta'):
+        '''
+        This function initializes the recorder.
+
+        Parameters:
+            storage (str): 'raw' keeps the frames as they are, 'palette' quantizes them to 256 colors (lossy) and
+                'delta' compresses their difference with the previous frame (lossless)
+        '''
+
+        if storage not in FRAME_STORAGES:
+            raise ValueError("Unknown frame storage " + str(storage) + ".")
+
+        self.storage = storage
+        self.frames = []  # Stored unique frames
+        self.counts = []  # Number of video frames of each unique frame
+        self.last_hash = None  # Hash of the last frame
+        self.bases = []  # Last frames as (index, frame) pairs, the bases of the next delta
+
+        # Last expanded frames by index, the encoder reads the frames in order
+        self.expanded = {}
+
+    def __len__(self):
+        '''
+        This function returns the number of video frames of the recording.
+        '''
+
+        return sum(self.counts)
+
+    def add(self, frame, count=1):
+        '''
+        This function adds a frame to the recording.
+
+        Parameters:
+            frame (numpy.ndarray): the frame (height, width, 3)
+            count (int): number of video frames it lasts
+        '''
+
+        frame = np.ascontiguousarray(frame)
+        frame_hash = hashlib.blake2b(frame, digest_size=16).digest()
+
+        # A frame the same as the last one only makes it last longer
+        if frame_hash == self.last_hash:
+            self.counts[-1] += count
+
+            return
+
+        if self.storage == 'delta':
+            # Take the difference with the closest previous frame
+            base = min((base for base in self.bases if base[1].shape == frame.shape),
+                       key=lambda base: np.count_nonzero(base[1] != frame), default=None)
+
+            if base is None:
+                self.frames.append(('key', frame.shape, zlib.compress(frame, 1)))
+
+            else:
+                # Keep which pixels changed and their new colors, removed cards become white and compress to nothing
+                changed = np.any(frame != base[1], axis=2)
+                self.frames.append(('delta', base[0], zlib.compress(np.packbits(changed)),
+                                    zlib.compress(frame[changed])))
+
+            self.bases = (self.bases + [(len(self.frames) - 1, frame)])[-DELTA_BASES:]
+
+        elif self.storage == 'palette':
+            # Keep the frame as 256 color indexes and its palette
+            image = Image.fromarray(frame).quantize(256)
+            self.frames.append(('palette', frame.shape, np.asarray(image), np.array(image.getpalette()[:768],
+                                                                                  dtype=np.uint8).reshape(-1, 3)))
+
+        else:
+            self.frames.append(('raw', frame))
+
+        self.counts.append(count)
+        self.last_hash = frame_hash
+
+    def repeat(self, count):
+        '''
+        This function makes the last frame last longer.
+
+        Parameters:
+            count (int): number of video frames to add
+        '''
+
+        if self.counts:
+            self.counts[-1] += count
+
+    def clear(self):
+        '''
+        This function removes every frame of the recording.
+        '''
+
+        self.frames, self.counts = [], []
+        self.last_hash, self.bases = None, []
+        self.expanded = {}
+
+    def expand(self, index):
+        '''
+        This function expands a stored unique frame.
+
+        Parameters:
+            index (int): index of the unique frame
+
+        Returns:
+            frame (numpy.ndarray): the frame (height, width, 3)
+        '''
+
+        if index in self.expanded:
+            return self.expanded[index]
+
+        stored = self.frames[index]
+
+        if stored[0] == 'raw':
+            frame = stored[1]
+
+        elif stored[0] == 'palette':
+            frame = stored[3][stored[2]]
+
+        elif stored[0] == 'key':
+            frame = np.frombuffer(zlib.decompress(stored[2]), dtype=np.uint8).reshape(stored[1])
+
+        else:
+            # Deltas need their base, so expand the frames before them when they are not read in order
+            if stored[1] not in self.expanded:
+                self.expanded = {}
+
+                for previous in range(index):
+                    self.expand(previous)
+
+            base = self.expanded[stored[1]]
+            changed = np.unpackbits(np.frombuffer(zlib.decompress(stored[2]), dtype=np.uint8),
+                                    count=base.shape[0] * base.shape[1]).reshape(base.shape[:2]).astype(bool)
+
+            frame = base.copy()
+            frame[changed] = np.frombuffer(zlib.decompress(stored[3]), dtype=np.uint8).reshape(-1, 3)
+
+        # Keep the frames later deltas can be taken against
+        self.expanded[index] = frame
+
+        for old in [old for old in self.expanded if old <= index - DELTA_BASES - 1]:
+            del self.expanded[old]
+
+        return frame
+
+    def get_frame(self, number):
+        '''
+        This function gets a video frame of the recording.
+
+        Parameters:
+            number (int): number of the video frame
+
+        Returns:
+            frame (numpy.ndarray): the frame (height, width, 3)
+        '''
+
+        # Find the unique frame that covers the video frame
+        ends = np.cumsum(self.counts)
+        index = min(bisect.bisect_right(ends, number), len(self.frames) - 1)
+
+        return self.expand(index)
+
+    def get_size(self):
+        '''
+        This function gets the memory the stored frames take.
+
+        Returns:
+            size (int): number of bytes
+        '''
+
+        size = 0
+
+        for stored in self.frames:
+            for part in stored[1:]:
+                if isinstance(part, (bytes, np.ndarray)):
+                    size += part.nbytes if isinstance(part, np.ndarray) else len(part)
+
+        return size
+
+    def make_clip(self, fps):
+        '''
+        This function makes a video clip of the recording that expands the frames only while it is encoded.
+
+        Parameters:
+            fps (int): frames per second of the video
+
+        Returns:
+            clip (VideoClip): the video clip
+        '''
+
+        def make_frame(t):
+            # The encoder asks for the frames in order, so the deltas are expanded one at a time
+            return self.get_frame(int(round(t * fps)))
+
+        return VideoClip(make_frame, duration=len(self) / fps)
@@ -0,0 +1,196 @@
+import json
+from os.path import abspath, join, dirname
+
+import numpy as np
+
+from utils.classes import HOUSES
+
+WEIGHTS_VERSION = 1  # Version of the layout of the weights file
+WEIGHTS_FILE = join(dirname(dirname(abspath(__file__))), 'weights.json')  # Default weights file, in the project folder
+SCORE_SCALE = 100  # Points of the evaluation for each unit of log-odds, so the model scores like evaluate_board
+
+# Names of the features, in the order of the feature vector: the cards and banners of each house of both players, the
+# moves of Varys, whether companion cards are left and the cards of each house still on the board
+FEATURES = tuple([f'player1_{house}' for house in HOUSES] + [f'player2_{house}' for house in HOUSES] +
+                 [f'player1_banner_{house}' for house in HOUSES] + [f'player2_banner_{house}' for house in HOUSES] +
+                 ['mobility', 'companions_left'] + [f'board_{house}' for house in HOUSES])
+
+
+def make_features(player1_counts, player2_counts, player1_banners, player2_banners, mobility, companions_left,
+                  board_counts):
+    '''
+    This function makes the feature vector of a position from its parts.
+
+    Parameters:
+        player1_counts (list): number of cards of each house of player 1
+        player2_counts (list): number of cards of each house of player 2
+        player1_banners (list): banner of each house of player 1 (0 or 1)
+        player2_banners (list): banner of each house of player 2 (0 or 1)
+        mobility (int): number of moves of Varys
+        companions_left (bool): True if there are companion cards left
+        board_counts (list): number of cards of each house on the board
+
+    Returns:
+        features (np.ndarray): the feature vector, of length len(FEATURES)
+    '''
+
+    features = np.empty(len(FEATURES))
+
+    features[0:7] = player1_counts
+    features[7:14] = player2_counts
+    features[14:21] = player1_banners
+    features[21:28] = player2_banners
+    features[28] = mobility
+    features[29] = companions_left
+    features[30:37] = board_counts
+
+    return features
+
+
+def extract_features(cards, player1, player2, companion_cards):
+    '''
+    This function makes the feature vector of a board.
+
+    Parameters:
+        cards (Board): the cards on the board
+        player1 (Player): the player
+        player2 (Player): the opponent
+        companion_cards (dict): dictionary of companion cards
+
+    Returns:
+        features (np.ndarray): the feature vector, of length len(FEATURES)
+    '''
+
+    return make_features(player1.get_counts(), player2.get_counts(), list(player1.get_banners().values()),
+                         list(player2.get_banners().values()), cards.get_mobility(), len(companion_cards) != 0,
+                         cards.house_counts[:len(HOUSES)])
+
+
+class LinearModel:
+    '''
+    This class is a learned evaluation: a linear model of the log-odds that player 1 wins, scored as
+    SCORE_SCALE points for each unit of log-odds.
+    '''
+
+    def __init__(self, coefficients, bias=0.0):
+        '''
+        This function initializes the model.
+
+        Parameters:
+            coefficients (list): coefficient of each feature, in the order of FEATURES
+            bias (float): the log-odds of a position with all features 0
+        '''
+
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.bias = float(bias)
+
+        if self.coefficients.shape != (len(FEATURES),):
+            raise ValueError(f"The model has {self.coefficients.size} coefficients, expected {len(FEATURES)}.")
+
+    def score_batch(self, features):
+        '''
+        This function scores many positions with one matrix product.
+
+        Parameters:
+            features (np.ndarray): feature vectors of the positions, one row each
+
+        Returns:
+            scores (np.ndarray): the score of each position, positive when player 1 is ahead
+        '''
+
+        return (np.asarray(features) @ self.coefficients + self.bias) * SCORE_SCALE
+
+    def score(self, features):
+        '''
+        This function scores one position.
+
+        Parameters:
+            features (np.ndarray): the feature vector of the position
+
+        Returns:
+            score (float): the score, positive when player 1 is ahead
+        '''
+
+        return float(features @ self.coefficients + self.bias) * SCORE_SCALE
+
+    def evaluate(self, cards, player1, player2, companion_cards):
+        '''
+        This function evaluates a board, as evaluate_board does.
+
+        Parameters:
+            cards (Board): the cards on the board
+            player1 (Player): the player
+            player2 (Player): the opponent
+            companion_cards (dict): dictionary of companion cards
+
+        Returns:
+            score (float): the score of the board
+        '''
+
+        return self.score(extract_features(cards, player1, player2, companion_cards))
+
+    def win_probability(self, features):
+        '''
+        This function gives the probability that player 1 wins each position.
+
+        Parameters:
+            features (np.ndarray): feature vectors of the positions, one row each
+
+        Returns:
+            probabilities (np.ndarray): the probability of each position
+        '''
+
+        return 1 / (1 + np.exp(-self.score_batch(features) / SCORE_SCALE))
+
+
+def save_weights(filename, weight, model=None, info=None):
+    '''
+    This function saves the weights of the evaluation function and a learned model to a weights file.
+
+    Parameters:
+        filename (str): the weights file
+        weight (list): weights of the evaluation function (choose companion and banners, mobility, 7 houses)
+        model (LinearModel): the learned model, None for none
+        info (dict): notes about the fit, kept in the file
+    '''
+
+    data = {'version': WEIGHTS_VERSION, 'weight': list(weight)}
+
+    if model is not None:
+        data['model'] = {'features': list(FEATURES), 'coefficients': model.coefficients.tolist(), 'bias': model.bias}
+
+    if info is not None:
+        data['info'] = info
+
+    with open(filename, 'w') as file:
+        json.dump(data, file, indent=4)
+
+
+def load_weights(filename):
+    '''
+    This function loads a weights file.
+
+    Parameters:
+        filename (str): the weights file
+
+    Returns:
+        weight (list): weights of the evaluation function
+        model (LinearModel/None): the learned model, None if the file has none
+    '''
+
+    with open(filename) as file:
+        data = json.load(file)
+
+    if data.get('version') != WEIGHTS_VERSION:
+        raise ValueError(f"{filename} is a version {data.get('version')} weights file, expected {WEIGHTS_VERSION}.")
+
+    model = None
+
+    if 'model' in data:
+        # A model of other features can not score these feature vectors
+        if tuple(data['model']['features']) != FEATURES:
+            raise ValueError(f"The model in {filename} was fitted to other features.")
+
+        model = LinearModel(data['model']['coefficients'], data['model']['bias'])
+
+    return data['weight'], model
@@ -0,0 +1,482 @@
+import numpy as np
+
+from utils.classes import Board, Card, ROWS, COLS, HOUSES, HOUSE_NAMES, HOUSE_CODES, VARYS
+from utils.evaluator import HOUSE_SIZES
+from utils.search_core import LINE_MASKS, BETWEEN_MASKS, NO_HOUSE, EMPTY
+from utils.snapshot import COMPANIONS as COMPANION_CARDS, COMPANION_NAMES, CHARACTER_HOUSES
+
+LOCATIONS = ROWS * COLS  # Number of locations on the board
+
+# Companion cards, indexed by their code as in snapshots, and the number of locations each one chooses (Jaqen also
+# chooses a companion card)
+COMPANIONS = COMPANION_NAMES
+CHOICES = np.array([COMPANION_CARDS[companion]['Choice'] for companion in COMPANIONS])
+JON, GENDRY, RAMSAY, SANDOR, JAQEN, MELISANDRE = (COMPANIONS.index(companion) for companion in
+                                                  ('Jon', 'Gendry', 'Ramsay', 'Sandor', 'Jaqen', 'Melisandre'))
+BARATHEON = HOUSE_CODES['Baratheon']
+
+# Characters of each house, in the order of the characters file, to name the cards of array boards
+HOUSE_CHARACTERS = tuple([name for name, house in CHARACTER_HOUSES.items() if house == house_name]
+                         for house_name in HOUSE_NAMES)
+
+NO_MOVE = -2  # Companion column of the last move of a game that did not move
+CARD_MOVE = -1  # Companion column of the last move of a card move
+
+# LINES[a, b] is True if b is in the same row or column as a, BETWEEN[a, b, c] if c is strictly between a and b
+LINES = np.array([[(LINE_MASKS[first] >> second) & 1 for second in range(LOCATIONS)] for first in range(LOCATIONS)],
+                 dtype=bool)
+BETWEEN = np.array([[[(BETWEEN_MASKS[first][second] >> location) & 1 for location in range(LOCATIONS)]
+                     for second in range(LOCATIONS)] for first in range(LOCATIONS)], dtype=bool)
+
+
+def pick(rng, mask, count=1):
+    '''
+    This function picks distinct random True columns of every row of a mask, each with the same chance.
+
+    Parameters:
+        rng (np.random.Generator): the random generator
+        mask (np.ndarray): the mask, one row for each game
+        count (int): number of columns to pick in every row
+
+    Returns:
+        columns (np.ndarray): the picked columns, of shape (rows,) for one and (rows, count) for more
+    '''
+
+    # The columns with the largest random keys are a uniform random choice among the True columns
+    keys = rng.random(mask.shape)
+    keys[~mask] = -1
+
+    if count == 1:
+        return keys.argmax(1)
+
+    return np.argsort(-keys, 1)[:, :count]
+
+
+def make_boards(count, rng):
+    '''
+    This function makes random boards the way make_board does, picking a house with cards left and then one of its
+    cards for each location.
+
+    Parameters:
+        count (int): number of boards
+        rng (np.random.Generator): the random generator
+
+    Returns:
+        boards (np.ndarray): house code of the card at each location, of shape (count, 36) (NO_HOUSE for Varys)
+    '''
+
+    left = np.tile(np.array(HOUSE_SIZES + (1,)), (count, 1))
+    boards = np.empty((count, LOCATIONS), dtype=np.int8)
+    games = np.arange(count)
+
+    for location in range(LOCATIONS):
+        houses = pick(rng, left > 0)
+        boards[:, location] = houses
+        left[games, houses] -= 1
+
+    return boards
+
+
+class Playouts:
+    '''
+    This class plays many games of random moves at once, as random_agent plays them, on arrays with one row for each
+    game: the house code at each location, the location of Varys, the cards and banners of both players, the companion
+    cards left, the player to move and whether that player has to choose a companion card.
+    '''
+
+    def __init__(self, boards, rng, counts=None, banners=None, companions=None, turn=None, choose_companion=None):
+        '''
+        This function sets up the games.
+
+        Parameters:
+            boards (np.ndarray): house code at each location, of shape (games, 36) (NO_HOUSE for Varys, EMPTY for none)
+            rng (np.random.Generator): the random generator of the moves
+            counts (np.ndarray): cards of each house of both players, of shape (games, 2, 7), None for none
+            banners (np.ndarray): banners of both players, of shape (games, 2, 7), None for none
+            companions (np.ndarray): companion cards left, of shape (games, 6), None for all of them
+            turn (np.ndarray): player to move (0 for player 1, 1 for player 2), None for player 1
+            choose_companion (np.ndarray): True for the games where the player to move chooses a companion card
+        '''
+
+        games = len(boards)
+
+        self.rng = rng
+        self.boards = np.array(boards, dtype=np.int8)
+        self.varys = (self.boards == NO_HOUSE).argmax(1)
+        self.counts = np.zeros((games, 2, len(HOUSES)), dtype=np.int16) if counts is None else np.array(counts, np.int16)
+        self.banners = np.zeros((games, 2, len(HOUSES)), dtype=bool) if banners is None else np.array(banners, bool)
+        self.companions = np.ones((games, len(COMPANIONS)), dtype=bool) if companions is None else \
+            np.array(companions, bool)
+        self.turn = np.zeros(games, dtype=np.int8) if turn is None else np.array(turn, np.int8)
+        self.choose_companion = np.zeros(games, dtype=bool) if choose_companion is None else \
+            np.array(choose_companion, bool)
+        self.done = np.zeros(games, dtype=bool)
+
+        # Last move of every game: the companion code (CARD_MOVE for a card move, NO_MOVE for none) and the chosen
+        # locations, then Jaqen's companion (-1 for none)
+        self.last_move = np.full((games, 4), -1, dtype=np.int8)
+        self.last_move[:, 0] = NO_MOVE
+
+        self.moves = 0  # Number of moves made in all games
+
+    def get_legal_moves(self, games=slice(None)):
+        '''
+        This function finds the card moves of the games.
+
+        Parameters:
+            games (np.ndarray/slice): the games
+
+        Returns:
+            moves (np.ndarray): True for the locations Varys can move to, of shape (games, 36)
+        '''
+
+        return LINES[self.varys[games]] & (self.boards[games] >= 0)
+
+    def get_captures(self, games, moves):
+        '''
+        This function finds the cards that card moves capture.
+
+        Parameters:
+            games (np.ndarray): the games
+            moves (np.ndarray): the location Varys moves to in each game
+
+        Returns:
+            captures (np.ndarray): True for the captured locations, of shape (games, 36)
+        '''
+
+        houses = self.boards[games, moves]
+        captures = BETWEEN[self.varys[games], moves] & (self.boards[games] == houses[:, None])
+        captures[np.arange(len(games)), moves] = True
+
+        return captures
+
+    def step(self):
+        '''
+        This function makes one move in every game that is not over, and ends the games whose player has no moves.
+
+        Returns:
+            playing (bool): True if some games are not over
+        '''
+
+        has_moves = self.get_legal_moves().any(1)
+
+        self.done |= ~self.choose_companion & ~has_moves
+        self.last_move[:, 0] = NO_MOVE
+
+        card_games = np.flatnonzero(~self.done & ~self.choose_companion)
+        companion_games = np.flatnonzero(~self.done & self.choose_companion)
+
+        if len(card_games):
+            self.make_moves(card_games)
+
+        if len(companion_games):
+            self.make_companion_moves(companion_games)
+
+        self.moves += len(card_games) + len(companion_games)
+
+        return not self.done.all()
+
+    def run(self):
+        '''
+        This function plays every game to its end.
+
+        Returns:
+            winners (np.ndarray): the winner of each game
+        '''
+
+        while self.step():
+            pass
+
+        return self.get_winners()
+
+    def make_moves(self, games, moves=None):
+        '''
+        This function moves Varys to a card in each game, as make_move does.
+
+        Parameters:
+            games (np.ndarray): the games, each with a card move
+            moves (np.ndarray): the location Varys moves to in each game, None for random moves
+        '''
+
+        if moves is None:
+            moves = pick(self.rng, self.get_legal_moves(games))
+
+        houses = self.boards[games, moves].astype(np.intp)
+        captures = self.get_captures(games, moves)
+        players = self.turn[games].astype(np.intp)
+
+        boards = self.boards[games]
+        boards[captures] = EMPTY
+        boards[np.arange(len(games)), self.varys[games]] = EMPTY
+        boards[np.arange(len(games)), moves] = NO_HOUSE
+        self.boards[games] = boards
+        self.varys[games] = moves
+
+        self.counts[games, players, houses] += captures.sum(1, dtype=np.int16)
+
+        self.remove_unusable_companions(games)
+        self.update_banners(games, houses, players)
+
+        # Emptying a house with companion cards left makes the player choose one, otherwise the turn changes
+        choose = ~(self.boards[games] == houses[:, None]).any(1) & self.companions[games].any(1)
+        self.choose_companion[games] = choose
+        self.turn[games] = np.where(choose, players, 1 - players)
+
+        self.last_move[games] = -1
+        self.last_move[games, 0] = CARD_MOVE
+        self.last_move[games, 1] = moves
+
+    def pick_companion_moves(self, games):
+        '''
+        This function picks a random companion card and random choices for it in each game, as random_agent does.
+
+        Parameters:
+            games (np.ndarray): the games, each with a companion card to choose
+
+        Returns:
+            moves (np.ndarray): the companion code, the chosen locations and Jaqen's companion (-1 for none) of each game
+        '''
+
+        moves = np.full((len(games), 4), -1, dtype=np.intp)
+        moves[:, 0] = companions = pick(self.rng, self.companions[games])
+
+        cards = (self.boards[games] >= 0) & (self.boards[games] != NO_HOUSE)
+
+        # Jon and Sandor choose a card, Ramsay two cards or Varys and Jaqen two cards and another companion card
+        selected = (companions == JON) | (companions == SANDOR)
+        moves[selected, 1] = pick(self.rng, cards[selected])
+
+        selected = companions == RAMSAY
+        moves[selected, 1:3] = pick(self.rng, self.boards[games[selected]] >= 0, 2)
+
+        selected = companions == JAQEN
+        if selected.any():
+            others = self.companions[games[selected]].copy()
+            others[:, JAQEN] = False
+
+            moves[selected, 1:3] = pick(self.rng, cards[selected], 2)
+            moves[selected, 3] = pick(self.rng, others)
+
+        return moves
+
+    def make_companion_moves(self, games, moves=None):
+        '''
+        This function plays a companion card in each game, as make_companion_move does.
+
+        Parameters:
+            games (np.ndarray): the games, each with a companion card to choose
+            moves (np.ndarray): the companion code, the chosen locations and Jaqen's companion of each game, in the
+                format of last_move, None for random moves
+        '''
+
+        if moves is None:
+            moves = self.pick_companion_moves(games)
+
+        companions = moves[:, 0]
+        players = self.turn[games].astype(np.intp)
+        self.companions[games, companions] = False
+
+        houses = np.full(len(games), -1)
+
+        # Jon adds two cards of the house of a card, Gendry a card of Baratheon
+        selected = companions == JON
+        if selected.any():
+            subset = games[selected]
+            houses[selected] = self.boards[subset, moves[selected, 1]]
+            self.counts[subset, players[selected], houses[selected]] += 2
+
+        selected = companions == GENDRY
+        if selected.any():
+            houses[selected] = BARATHEON
+            self.counts[games[selected], players[selected], BARATHEON] += 1
+
+        # Ramsay swaps two cards, Varys too
+        selected = companions == RAMSAY
+        if selected.any():
+            subset = games[selected]
+            rows = np.arange(len(subset))
+            first, second = moves[selected, 1], moves[selected, 2]
+
+            boards = self.boards[subset]
+            boards[rows, first], boards[rows, second] = boards[rows, second], boards[rows, first]
+            self.boards[subset] = boards
+            self.varys[subset] = (boards == NO_HOUSE).argmax(1)
+
+        # Sandor removes a card, Jaqen two cards and a companion card
+        selected = companions == SANDOR
+        if selected.any():
+            self.boards[games[selected], moves[selected, 1]] = EMPTY
+
+        selected = companions == JAQEN
+        if selected.any():
+            subset = games[selected]
+            self.boards[subset[:, None], moves[selected, 1:3]] = EMPTY
+            self.companions[subset, moves[selected, 3]] = False
+
+        self.remove_unusable_companions(games)
+
+        # Only Jon and Gendry change the cards of the players. The others would update the banner of the house the
+        # player just emptied, which the player already has
+        changed = houses >= 0
+        if changed.any():
+            self.update_banners(games[changed], houses[changed], players[changed])
+
+        # Melisandre gives the player another turn
+        self.turn[games] = np.where(companions == MELISANDRE, players, 1 - players)
+        self.choose_companion[games] = False
+
+        self.last_move[games] = moves
+
+    def remove_unusable_companions(self, games):
+        '''
+        This function removes the companion cards that cannot be used, as remove_unusable_companion_cards does.
+
+        Parameters:
+            games (np.ndarray): the games
+        '''
+
+        cards = (self.boards[games] >= 0).sum(1)
+        companions = self.companions[games]
+
+        companions[:, RAMSAY] &= cards >= 2
+        companions[:, MELISANDRE] &= self.get_legal_moves(games).any(1)
+        companions &= CHOICES <= cards[:, None] - 1
+        companions[:, JAQEN] &= companions.sum(1) > 1
+
+        self.companions[games] = companions
+
+    def update_banners(self, games, houses, players):
+        '''
+        This function gives the banner of a house to the player with more of its cards, as update_banners does.
+
+        Parameters:
+            games (np.ndarray): the games
+            houses (np.ndarray): the house of each game
+            players (np.ndarray): the player who moved in each game, who wins a tie
+        '''
+
+        mine = self.counts[games, players, houses]
+        theirs = self.counts[games, 1 - players, houses]
+        winners = np.where(theirs > mine, 1 - players, players)
+
+        self.banners[games, :, houses] = False
+        self.banners[games, winners, houses] = True
+
+    def get_winners(self):
+        '''
+        This function finds the winners of the games, as calculate_winner does.
+
+        Returns:
+            winners (np.ndarray): 1 if player 1 wins, 2 if player 2 wins, 0 for neither
+        '''
+
+        banners = self.banners[:, 0].astype(np.int8) - self.banners[:, 1]
+        difference = banners.sum(1)
+
+        # A tie goes to the player with the banner of the first house, in the order of HOUSES, the players differ on
+        first = (banners != 0).argmax(1)
+        tie_break = banners[np.arange(len(banners)), first]
+
+        winners = np.where(difference != 0, np.sign(difference), tie_break)
+
+        return np.select([winners > 0, winners < 0], [1, 2], 0).astype(np.int8)
+
+    def get_move(self, game):
+        '''
+        This function gives the last move of a game in the format of the agents.
+
+        Parameters:
+            game (int): the game
+
+        Returns:
+            move (int/list/None): the location, or the companion card and its choices, None if the game did not move
+        '''
+
+        companion, first, second, third = (int(value) for value in self.last_move[game])
+
+        if companion == NO_MOVE:
+            return None
+
+        if companion == CARD_MOVE:
+            return first
+
+        choices = [first, second, COMPANIONS[third]][:CHOICES[companion]]
+
+        return [COMPANIONS[companion]] + choices
+
+
+def encode_move(move):
+    '''
+    This function converts a move in the format of the agents to the format of last_move.
+
+    Parameters:
+        move (int/list): the location, or the companion card and its choices
+
+    Returns:
+        encoded (list): the companion code (CARD_MOVE for a card move), the chosen locations and Jaqen's companion
+    '''
+
+    if not isinstance(move, list):
+        return [CARD_MOVE, move, -1, -1]
+
+    encoded = [COMPANIONS.index(move[0])] + [-1] * 3
+
+    for i, choice in enumerate(move[1:]):
+        encoded[1 + i] = COMPANIONS.index(choice) if isinstance(choice, str) else choice
+
+    return encoded
+
+
+def playouts_from_position(cards, companion_cards, player1, player2, turn, choose_companion, count, rng):
+    '''
+    This function sets up copies of a position to play out.
+
+    Parameters:
+        cards (Board): the cards on the board
+        companion_cards (dict): dictionary of companion cards
+        player1 (Player): player 1
+        player2 (Player): player 2
+        turn (int): the player to move
+        choose_companion (bool): whether the player to move chooses a companion card
+        count (int): number of games
+        rng (np.random.Generator): the random generator of the moves
+
+    Returns:
+        playouts (Playouts): the games
+    '''
+
+    board = np.full(LOCATIONS, EMPTY, dtype=np.int8)
+
+    for card in cards:
+        board[card.get_location()] = NO_HOUSE if card.name_code == VARYS else card.house_code
+
+    counts = [player1.get_counts(), player2.get_counts()]
+    banners = [list(player1.get_banners().values()), list(player2.get_banners().values())]
+    companions = [companion in companion_cards for companion in COMPANIONS]
+
+    return Playouts(np.tile(board, (count, 1)), rng, np.tile(counts, (count, 1, 1)), np.tile(banners, (count, 1, 1)),
+                    np.tile(companions, (count, 1)), np.full(count, turn - 1), np.full(count, choose_companion))
+
+
+def make_cards(board):
+    '''
+    This function makes the cards of an array board, naming the cards of each house in the order of the characters
+    file.
+
+    Parameters:
+        board (np.ndarray): house code at each location (NO_HOUSE for Varys, EMPTY for none)
+
+    Returns:
+        cards (Board): the cards on the board
+        companion_cards (dict): dictionary of all companion cards
+    '''
+
+    cards = Board()
+    placed = [0] * len(HOUSE_NAMES)
+
+    for location, house in enumerate(board.tolist()):
+        if house != EMPTY:
+            cards.append(Card(HOUSE_NAMES[house], HOUSE_CHARACTERS[house][placed[house]], location))
+            placed[house] += 1
+
+    return cards, {companion: dict(COMPANION_CARDS[companion]) for companion in COMPANIONS}
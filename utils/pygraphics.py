@@ -1,10 +1,11 @@
 import pygame
+import asyncio
 import json
 import time
-from moviepy.editor import ImageSequenceClip
 from numpy import rot90, flipud
-from os import pardir, environ
+from os import pardir, environ, makedirs
 from os.path import abspath, join, dirname
+from utils.frames import FrameRecorder
 
 # Get the path of the assets and videos folder
 assets_path = join((abspath(join(dirname(abspath(__file__)), pardir))), "assets")
@@ -20,7 +21,15 @@ BOARD_WIDTH = (COLS + 3) * CARD_SIZE + (COLS + 3 - 1) * MARGIN  # Width of the b
 WIN_WIDTH = COLS * CARD_SIZE + (COLS - 1) * MARGIN  # Width of the win screen
 WINNER_HEIGHT_OFFSET = 36  # Height offset of the winner text
 assets = {}  # Dictionary to store every asset
-frames = []  # List to store the frames of the video
+frames = FrameRecorder()  # Unique frames of the video and how long each one lasts
+VIDEO_FPS = 30  # Frames per second of the video
+PACING_MODES = ('realtime', 'fast', 'record')  # Show the game at viewing speed, without waiting, or without a window
+pacing = 'realtime'  # Pacing mode of the game
+offscreen = False  # Whether the board is drawn on a surface of its own instead of a window
+FRAME_RATE = 30  # Frames per second of the display in the asynchronous game loop
+clicks = None  # Queue of the mouse clicks, while the asynchronous game loop runs
+frame_queue = None  # Queue of the frames to record, while the asynchronous game loop runs
+thinking = None  # Agent and search progress of the AI that is thinking
 
 
 def load_assets():
@@ -105,6 +114,10 @@ def init_board():
         screen (pygame.Surface): the screen for the game
     '''
 
+    # Only the video is needed when recording
+    if pacing == 'record':
+        return init_offscreen()
+
     # Initialize Pygame
     pygame.init()
 
@@ -156,12 +169,42 @@ def init_board():
     return board
 
 
+def init_offscreen():
+    '''
+    This function initializes a board that is drawn without a window, for making videos.
+
+    Returns:
+        board (pygame.Surface): the surface to draw the game on
+    '''
+
+    global offscreen
+
+    offscreen = True
+
+    # No display is needed, the dummy driver lets Pygame start on machines without one
+    environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.init()
+
+    # Load the assets of the game, at the full size
+    load_assets()
+
+    # Make the surface of the board
+    board = pygame.Surface([BOARD_WIDTH, BOARD_HEIGHT])
+
+    # Set the background color of the board to white
+    board.fill([255, 255, 255])
+
+    return board
+
+
 def update():
     '''
     This function updates the display.
     '''
 
-    pygame.display.update()
+    # There is no window to update when drawing offscreen
+    if not offscreen:
+        pygame.display.update()
 
 
 def store_frame(board, needs_resize=False, FPS=30):
@@ -174,6 +217,24 @@ def store_frame(board, needs_resize=False, FPS=30):
         FPS (int): frames per second
     '''
 
+    # Let the recording task convert the frame, while the asynchronous game loop runs
+    if frame_queue is not None:
+        frame_queue.put_nowait((board.copy(), needs_resize, FPS))
+
+    else:
+        add_frame(board, needs_resize, FPS)
+
+
+def add_frame(board, needs_resize=False, FPS=30):
+    '''
+    This function converts the board into a video frame and adds it to the frames.
+
+    Parameters:
+        board (pygame.Surface): the screen for the game
+        needs_resize (bool): whether the frame needs to be resized
+        FPS (int): frames per second
+    '''
+
     frame = pygame.surfarray.array3d(board)  # Get the frame
 
     if needs_resize:  # For the win screen
@@ -184,8 +245,66 @@ def store_frame(board, needs_resize=False, FPS=30):
     frame = rot90(frame)  # Rotate the frame
     frame = flipud(frame)  # Flip the frame
 
-    for _ in range(FPS):
-        frames.append(frame)  # Store the frame
+    frames.add(frame, FPS)  # Store the frame, or make the last one last longer if it is the same
+
+
+def hold_frame(seconds):
+    '''
+    This function keeps the last frame in the video for a while longer.
+
+    Parameters:
+        seconds (float): number of seconds to keep the frame
+    '''
+
+    count = round(seconds * VIDEO_FPS)  # Number of video frames
+
+    # Keep the order of the frames, while the asynchronous game loop runs
+    if frame_queue is not None:
+        frame_queue.put_nowait((None, False, count))
+
+    else:
+        repeat_frame(count)
+
+
+def repeat_frame(count):
+    '''
+    This function repeats the last frame of the video.
+
+    Parameters:
+        count (int): number of times to repeat the frame
+    '''
+
+    frames.repeat(count)
+
+
+def set_frame_storage(storage):
+    '''
+    This function sets how the frames of the video are kept.
+
+    Parameters:
+        storage (str): 'raw', 'palette' (256 colors) or 'delta' (compressed changes, the default)
+    '''
+
+    global frames
+
+    frames = FrameRecorder(storage)
+
+
+def set_pacing(mode):
+    '''
+    This function sets the pacing mode of the game.
+
+    Parameters:
+        mode (str): 'realtime' waits to show the board, 'fast' draws without waiting and 'record' draws without a
+            window, only for the video
+    '''
+
+    global pacing
+
+    if mode not in PACING_MODES:
+        raise ValueError("Unknown pacing mode " + str(mode) + ".")
+
+    pacing = mode
 
 
 def save_video(file_name):
@@ -196,11 +315,12 @@ def save_video(file_name):
         file_name (str): name of the video file
     '''
 
-    # Create a video of the game
-    clip = ImageSequenceClip(frames, fps=30)
+    # Create a video of the game, the frames are expanded while it is encoded
+    clip = frames.make_clip(VIDEO_FPS)
 
     # Save the video
-    clip.write_videofile(join(videos_path, file_name + '.mp4'), codec='libx264')
+    makedirs(videos_path, exist_ok=True)
+    clip.write_videofile(join(videos_path, file_name + '.mp4'), fps=VIDEO_FPS, codec='libx264')
 
 
 def draw_footer(board, text):
@@ -250,9 +370,9 @@ def draw_companions(board, companions):
         board.blit(companion_img, (x, y))
 
 
-def draw_board(board, cards, companions, banner_footer, is_cards_gray=False):
+def paint_board(board, cards, companions, banner_footer, is_cards_gray=False):
     '''
-    This function draws the cards on the board.
+    This function paints the cards, the footer and the companions on a surface.
 
     Parameters:
         board (pygame.Surface): the screen for the game
@@ -319,24 +439,37 @@ def draw_board(board, cards, companions, banner_footer, is_cards_gray=False):
         # Draw the gray surface on the board
         board.blit(gray_surface, (line_x, 0))
 
+
+def draw_board(board, cards, companions, banner_footer, is_cards_gray=False):
+    '''
+    This function draws the cards on the board.
+
+    Parameters:
+        board (pygame.Surface): the screen for the game
+        cards (list): list of Card objects
+        companions (dict): dictionary of companions
+        banner_footer (str): text to display in the footer
+        is_cards_gray (bool): whether the cards should be grayed out
+    '''
+
+    paint_board(board, cards, companions, banner_footer, is_cards_gray)
+
     # Update the display
     update()
 
     store_frame(board)  # Store the frame
 
 
-def display_winner(board, winner, winner_agent):
+def paint_winner(board, winner, winner_agent):
     '''
-    This function displays the winner of the game.
+    This function paints the win screen on a surface.
 
     Parameters:
-        board (pygame.Surface): the screen for the game
+        board (pygame.Surface): the surface of the win screen
         winner (int): the number of the winner
         winner_agent (str): the agent of the winner
     '''
 
-    board = pygame.display.set_mode([WIN_WIDTH, BOARD_HEIGHT])
-
     # Clear the board
     board.fill([255, 255, 255])
 
@@ -368,6 +501,26 @@ def display_winner(board, winner, winner_agent):
     # Draw the text on the board
     board.blit(text, text_rect)
 
+
+def display_winner(board, winner, winner_agent):
+    '''
+    This function displays the winner of the game.
+
+    Parameters:
+        board (pygame.Surface): the screen for the game
+        winner (int): the number of the winner
+        winner_agent (str): the agent of the winner
+    '''
+
+    # The win screen is narrower than the board
+    if offscreen:
+        board = pygame.Surface([WIN_WIDTH, BOARD_HEIGHT])
+
+    else:
+        board = pygame.display.set_mode([WIN_WIDTH, BOARD_HEIGHT])
+
+    paint_winner(board, winner, winner_agent)
+
     # Update the display
     update()
 
@@ -382,6 +535,12 @@ def show_board(seconds):
         seconds (int): number of seconds to show the board
     '''
 
+    # The video keeps the board for the same time in every pacing mode
+    hold_frame(seconds)
+
+    if pacing != 'realtime':
+        return
+
     # Get the initial time
     initial_time = time.time()
 
@@ -397,23 +556,22 @@ def show_board(seconds):
                 exit()
 
 
-def get_player_move(card_moves, companions=None):
+def find_player_move(x, y, card_moves, companions=None):
     '''
-    This function gets the move of the player.
+    This function finds the move the player clicked on.
 
     Parameters:
+        x (int): x position of the click
+        y (int): y position of the click
         card_moves (list): list of possible card moves
         companions (dict): dictionary of companions (If the player can choose a companion)
 
     Returns:
-        location (int): location of the card
+        location (int/list/None): location of the card, the companion in a list, or None if the click is not a move
     '''
 
     # Check if the player can choose a companion
     if companions is not None:
-        # Store the possible areas where the player can click
-        possible_moves = []
-
         for companion in companions:
             # Get the row and column of the companion
             row = companions[companion]['Row']
@@ -423,46 +581,80 @@ def get_player_move(card_moves, companions=None):
             start_x = col * CARD_SIZE + col * MARGIN
             start_y = row * CARD_SIZE + row * MARGIN + 5 * (row // 2)
 
-            # Store the possible area where the player can click
-            possible_moves.append([companion,
-                                   (start_x, start_y),
-                                   (start_x + CARD_SIZE * 1.5, start_y + CARD_SIZE * 2.3)])
+            # Check if the player clicked on the companion
+            if start_x <= x <= start_x + CARD_SIZE * 1.5 and start_y <= y <= start_y + CARD_SIZE * 2.3:
+                return [companion]  # Get the name of the companion
 
-    # Check if the player has made a move
-    move_made = False
+        return None  # Should select a companion
 
-    while not move_made:
-        # Get the event
-        for event in pygame.event.get():
-            # Check if the event is a mouse click
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                # Get the position of the mouse
-                x, y = pygame.mouse.get_pos()
+    # Calculate the row and column of the card
+    col = x // (CARD_SIZE + MARGIN)
+    row = y // (CARD_SIZE + MARGIN)
 
-                # Check if the player clicked on a companion
-                if companions is not None:
-                    for companion in possible_moves:
-                        if companion[1][0] <= x <= companion[2][0] and companion[1][1] <= y <= companion[2][1]:
-                            location = [companion[0]]  # Get the name of the companion
-                            move_made = True
-                            break
+    # Calculate the location of the card
+    location = row * COLS + col
 
-                    if move_made:  # Exit the loop if the player clicked on a companion
-                        break
+    # Check if the location is valid
+    if location < ROWS * COLS and location in card_moves:
+        return location
 
-                    else:
-                        continue  # Should select a companion
+    return None
 
-                # Calculate the row and column of the card
-                col = x // (CARD_SIZE + MARGIN)
-                row = y // (CARD_SIZE + MARGIN)
 
-                # Calculate the location of the card
-                location = row * COLS + col
+def draw_thinking(board, agent, stats):
+    '''
+    This function draws the thinking indicator of an AI in the footer under the companions.
+
+    Parameters:
+        board (pygame.Surface): the screen for the game
+        agent (str): the agent that is thinking
+        stats (dict): search progress of the agent (depth and nodes, if it reports them)
+    '''
+
+    # Set the font of the text (Arial, 16pt)
+    font = pygame.font.SysFont('Arial', 16)
+
+    text = agent[max(0, agent.find('/') + 1, agent.find('\\') + 1):] + ' is thinking' + '.' * (
+            int(time.time() * 2) % 3 + 1)
 
-                # Check if the location is valid
-                if location < ROWS * COLS and location in card_moves:
-                    move_made = True
+    if 'depth' in stats:
+        text += f" depth {stats['depth']}"
+
+    if 'nodes' in stats:
+        text += f" ({stats['nodes']:,} nodes)"
+
+    # Render the text
+    text = font.render(text, True, [0, 0, 0])
+
+    # Set the position of the text in the center of the footer under the companions
+    text_rect = text.get_rect()
+    text_rect.center = ((WIN_WIDTH + BOARD_WIDTH) // 2, BOARD_HEIGHT - FOOTER_SIZE // 2)
+
+    # Draw the text on the board
+    board.blit(text, text_rect)
+
+
+def thinking_area():
+    '''
+    This function gets the area of the thinking indicator.
+
+    Returns:
+        area (pygame.Rect): the footer under the companions
+    '''
+
+    return pygame.Rect(WIN_WIDTH + MARGIN, BOARD_HEIGHT - FOOTER_SIZE, BOARD_WIDTH - WIN_WIDTH - MARGIN, FOOTER_SIZE)
+
+
+async def pump_events():
+    '''
+    This task handles the window events and queues the mouse clicks, so the window never freezes.
+    '''
+
+    while True:
+        for event in pygame.event.get():
+            # Check if the event is a mouse click
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                clicks.put_nowait(event.pos)
 
             # Check if the event is the close button
             elif event.type == pygame.QUIT:
@@ -472,7 +664,159 @@ def get_player_move(card_moves, companions=None):
                 # Exit the program
                 exit()
 
-    return location
+        await asyncio.sleep(1 / FRAME_RATE)
+
+
+async def render():
+    '''
+    This task updates the display at a fixed frame rate and draws the thinking indicator of the AI.
+    '''
+
+    background = None  # What the thinking indicator covers
+
+    while True:
+        board = pygame.display.get_surface()
+
+        # There is no window to refresh when only recording
+        if pacing != 'record' and board is not None and board.get_width() == BOARD_WIDTH:
+            area = thinking_area()
+
+            if thinking is not None:
+                # Keep what is under the indicator, to clean it when the AI is done
+                if background is None:
+                    background = board.subsurface(area).copy()
+
+                board.blit(background, area)
+                draw_thinking(board, thinking['agent'], thinking['stats'])
+
+            elif background is not None:
+                board.blit(background, area)
+                background = None
+
+            update()
+
+        await asyncio.sleep(1 / FRAME_RATE)
+
+
+async def record_frames():
+    '''
+    This task converts the frames drawn by the game into video frames.
+    '''
+
+    while True:
+        board, needs_resize, FPS = await frame_queue.get()
+
+        if board is None:  # Kept frame
+            repeat_frame(FPS)
+
+        else:
+            add_frame(board, needs_resize, FPS)
+
+        frame_queue.task_done()
+
+
+def start_tasks():
+    '''
+    This function starts the tasks of the asynchronous game loop.
+
+    Returns:
+        tasks (list): the event, render and recording tasks
+    '''
+
+    global clicks, frame_queue
+
+    clicks = asyncio.Queue()
+    frame_queue = asyncio.Queue()
+
+    return [asyncio.create_task(pump_events()), asyncio.create_task(render()), asyncio.create_task(record_frames())]
+
+
+async def stop_tasks(tasks):
+    '''
+    This function records the remaining frames and stops the tasks of the asynchronous game loop.
+
+    Parameters:
+        tasks (list): the event, render and recording tasks
+    '''
+
+    global clicks, frame_queue
+
+    await frame_queue.join()
+
+    for task in tasks:
+        task.cancel()
+
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    clicks = None
+    frame_queue = None
+
+
+async def show_board_async(seconds):
+    '''
+    This function shows the board for a certain amount of time without blocking the other tasks.
+
+    Parameters:
+        seconds (float): number of seconds to show the board
+    '''
+
+    # The video keeps the board for the same time in every pacing mode
+    hold_frame(seconds)
+
+    # Only wait when someone is watching, but let the other tasks run either way
+    await asyncio.sleep(seconds if pacing == 'realtime' else 0)
+
+
+async def wait_player_move(card_moves, companions=None):
+    '''
+    This function waits for the player to click on a move.
+
+    Parameters:
+        card_moves (list): list of possible card moves
+        companions (dict): dictionary of companions (If the player can choose a companion)
+
+    Returns:
+        location (int/list): location of the card, or the companion in a list
+    '''
+
+    # Ignore the clicks made before the player's turn
+    while not clicks.empty():
+        clicks.get_nowait()
+
+    while True:
+        x, y = await clicks.get()
+
+        location = find_player_move(x, y, card_moves, companions)
+
+        if location is not None:
+            return location
+
+
+async def think(agent, get_move):
+    '''
+    This function waits for the move of an AI, showing the thinking indicator meanwhile.
+
+    Parameters:
+        agent (str): the agent that is thinking
+        get_move (function): function that takes a progress callback and returns the move of the AI
+
+    Returns:
+        move (int/list/None): the move of the AI
+    '''
+
+    global thinking
+
+    thinking = {'agent': agent, 'stats': {}}
+
+    def progress(stats):
+        # Called from the executor thread with the latest search progress
+        thinking['stats'] = stats
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, get_move, progress)
+
+    finally:
+        thinking = None
 
 
 def close_board():
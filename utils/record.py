@@ -0,0 +1,228 @@
+import struct
+
+from utils.snapshot import RECORD as STATE, COMPANION_NAMES
+
+MAGIC = b'HOTR'  # First bytes of every record file
+VERSION = 1  # Version of the record layout
+
+# Header: magic, version, number of games
+HEADER = struct.Struct('<4sHI')
+
+# Game: seed of the board (-1 for None), winner (0 if unknown), number of moves
+GAME = struct.Struct('<iBH')
+
+NO_SEED = -1  # Seed of a board that was not made from a seed
+PLAYER2_FLAG = 0x80  # Flag of the moves made by player 2
+COMPANION_FLAG = 0x40  # Flag of the companion moves, the rest of the byte is the index of the companion
+
+
+def encode_move(turn, move):
+    '''
+    This function encodes a move.
+
+    Parameters:
+        turn (int): the player who made the move
+        move (int/list): the location of the chosen card, or the companion move
+
+    Returns:
+        data (bytes): the encoded move
+    '''
+
+    flag = PLAYER2_FLAG if turn == 2 else 0
+
+    if isinstance(move, int):
+        return bytes((flag | move,))
+
+    # Companion moves are the companion, the number of choices and the choices
+    choices = [COMPANION_NAMES.index(choice) if isinstance(choice, str) else choice for choice in move[1:]]
+
+    return bytes((flag | COMPANION_FLAG | COMPANION_NAMES.index(move[0]), len(choices), *choices))
+
+
+def decode_move(data, offset):
+    '''
+    This function decodes a move.
+
+    Parameters:
+        data (bytes): the encoded moves
+        offset (int): position of the move in the data
+
+    Returns:
+        turn (int): the player who made the move
+        move (int/list): the location of the chosen card, or the companion move
+        offset (int): position of the next move
+    '''
+
+    code = data[offset]
+    turn = 2 if code & PLAYER2_FLAG else 1
+    code &= ~PLAYER2_FLAG
+
+    if not code & COMPANION_FLAG:
+        return turn, code, offset + 1
+
+    name = COMPANION_NAMES[code & ~COMPANION_FLAG]
+    choices = list(data[offset + 2:offset + 2 + data[offset + 1]])
+
+    # The last choice of Jaqen is a companion card
+    if name == 'Jaqen':
+        choices[-1] = COMPANION_NAMES[choices[-1]]
+
+    return turn, [name] + choices, offset + 2 + len(choices)
+
+
+def encode_name(name):
+    '''
+    This function encodes the name of an agent.
+
+    Parameters:
+        name (str): name of the agent
+
+    Returns:
+        data (bytes): the length and the characters of the name
+    '''
+
+    name = name.encode('utf-8')[:255]
+
+    return bytes((len(name),)) + name
+
+
+def encode_game(game):
+    '''
+    This function encodes a game record.
+
+    Parameters:
+        game (dict): start (packed state), player1, player2, seed, moves as (turn, move) pairs and winner
+
+    Returns:
+        data (bytes): the encoded game
+    '''
+
+    seed = NO_SEED if game['seed'] is None else game['seed']
+
+    return b''.join([GAME.pack(seed, game['winner'] or 0, len(game['moves'])), game['start'],
+                     encode_name(game['player1']), encode_name(game['player2'])] +
+                    [encode_move(turn, move) for turn, move in game['moves']])
+
+
+def decode_game(data, offset=0):
+    '''
+    This function decodes a game record.
+
+    Parameters:
+        data (bytes): the encoded games
+        offset (int): position of the game in the data
+
+    Returns:
+        game (dict): start (packed state), player1, player2, seed, moves as (turn, move) pairs and winner
+        offset (int): position of the next game
+    '''
+
+    seed, winner, count = GAME.unpack_from(data, offset)
+    offset += GAME.size
+
+    start = bytes(data[offset:offset + STATE.size])
+    offset += STATE.size
+
+    names = []
+
+    for _ in range(2):
+        length = data[offset]
+        names.append(bytes(data[offset + 1:offset + 1 + length]).decode('utf-8'))
+        offset += 1 + length
+
+    moves = []
+
+    for _ in range(count):
+        turn, move, offset = decode_move(data, offset)
+        moves.append((turn, move))
+
+    game = {
+        'start': start,
+        'player1': names[0],
+        'player2': names[1],
+        'seed': None if seed == NO_SEED else seed,
+        'moves': moves,
+        'winner': winner or None
+    }
+
+    return game, offset
+
+
+def write_games(filename, games):
+    '''
+    This function writes game records to a file.
+
+    Parameters:
+        filename (str): the record file
+        games (iterable): game records
+    '''
+
+    games = list(games)
+
+    with open(filename, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(games)))
+
+        for game in games:
+            file.write(encode_game(game))
+
+
+def append_game(filename, game):
+    '''
+    This function adds a game record to a file, creating the file if needed.
+
+    Parameters:
+        filename (str): the record file
+        game (dict): the game record
+    '''
+
+    try:
+        file = open(filename, 'r+b')
+
+    except FileNotFoundError:
+        write_games(filename, [game])
+
+        return
+
+    with file:
+        magic, version, count = HEADER.unpack(file.read(HEADER.size))
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(filename + " is not a record file of version " + str(VERSION) + ".")
+
+        # Add the game to the end and update the number of games
+        file.seek(0, 2)
+        file.write(encode_game(game))
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, count + 1))
+
+
+def read_games(filename):
+    '''
+    This function reads the game records of a file.
+
+    Parameters:
+        filename (str): the record file
+
+    Returns:
+        games (list): game records
+    '''
+
+    with open(filename, 'rb') as file:
+        data = file.read()
+
+    magic, version, count = HEADER.unpack_from(data, 0)
+
+    if magic != MAGIC:
+        raise ValueError(filename + " is not a record file.")
+
+    if version != VERSION:
+        raise ValueError(f"{filename} has record version {version}, only version {VERSION} is supported.")
+
+    games = []
+    offset = HEADER.size
+
+    for _ in range(count):
+        game, offset = decode_game(data, offset)
+        games.append(game)
+
+    return games
@@ -0,0 +1,428 @@
+import random
+import time
+
+from utils.classes import ROWS, COLS, HOUSES, VARYS
+from utils.evaluator import HOUSE_SIZES
+from utils.transposition import EXACT, LOWER, UPPER
+
+NO_HOUSE = len(HOUSES)  # House code of Varys
+EMPTY = -1  # House code of an empty location
+TIME_CHECK = 1024  # Number of nodes between two looks at the clock
+
+# Locations in the same row or column as each location, as bits
+LINE_MASKS = tuple(sum(1 << other for other in range(ROWS * COLS)
+                       if other != location and (other // COLS == location // COLS or
+                                                 other % COLS == location % COLS))
+                   for location in range(ROWS * COLS))
+
+
+def make_between_masks():
+    '''
+    This function makes the masks of the locations strictly between two locations of the same row or column.
+
+    Returns:
+        masks (tuple): masks[first][second] is the mask of the locations between them (0 if they are not in a line)
+    '''
+
+    masks = []
+
+    for first in range(ROWS * COLS):
+        row = []
+
+        for second in range(ROWS * COLS):
+            mask = 0
+
+            if first != second and (first // COLS == second // COLS or first % COLS == second % COLS):
+                step = 1 if first // COLS == second // COLS else COLS
+
+                for location in range(min(first, second) + step, max(first, second), step):
+                    mask |= 1 << location
+
+            row.append(mask)
+
+        masks.append(tuple(row))
+
+    return tuple(masks)
+
+
+BETWEEN_MASKS = make_between_masks()
+
+# Random keys of the parts of a position (Zobrist hashing), made from a fixed seed so every process gets the same keys
+# for the same position
+ZOBRIST = random.Random(20250208)
+PIECE_KEYS = tuple(tuple(ZOBRIST.getrandbits(64) for _ in range(NO_HOUSE + 1)) for _ in range(ROWS * COLS))
+COUNT_KEYS = tuple(tuple(tuple(ZOBRIST.getrandbits(64) for _ in range(32)) for _ in HOUSES) for _ in range(2))
+BANNER_KEYS = tuple(tuple(ZOBRIST.getrandbits(64) for _ in HOUSES) for _ in range(2))
+TURN_KEY, COMPANIONS_KEY = ZOBRIST.getrandbits(64), ZOBRIST.getrandbits(64)
+
+
+def state_from_board(cards, player1, player2):
+    '''
+    This function gets the arguments of the search core from the game state.
+
+    Parameters:
+        cards (Board): the cards on the board
+        player1 (Player): the player
+        player2 (Player): the opponent
+
+    Returns:
+        houses (list): house code of the card at each location (NO_HOUSE for Varys, EMPTY for no card)
+        counts1 (list): number of cards of each house of player 1
+        counts2 (list): number of cards of each house of player 2
+        banners1 (list): banner of each house of player 1 (0 or 1)
+        banners2 (list): banner of each house of player 2 (0 or 1)
+    '''
+
+    houses = [EMPTY] * (ROWS * COLS)
+
+    for card in cards:
+        houses[card.location] = NO_HOUSE if card.name_code == VARYS else card.house_code
+
+    return (houses, list(player1.get_counts()), list(player2.get_counts()),
+            [player1.get_banners()[house] for house in HOUSES], [player2.get_banners()[house] for house in HOUSES])
+
+
+class Searcher:
+    '''
+    This class is the pure Python search core: alpha-beta over the card moves on bitboards, one mask of locations
+    for each house. A pending companion choice is scored as the evaluation function scores it, as minimax does.
+    '''
+
+    def __init__(self, houses, counts1, counts2, banners1, banners2, companions_left, weight, deadline, table=None,
+                 stop=None, rotation=0):
+        '''
+        This function initializes the search from a position.
+
+        Parameters:
+            houses (list): house code of the card at each location (NO_HOUSE for Varys, EMPTY for no card)
+            counts1 (list): number of cards of each house of player 1
+            counts2 (list): number of cards of each house of player 2
+            banners1 (list): banner of each house of player 1 (0 or 1)
+            banners2 (list): banner of each house of player 2 (0 or 1)
+            companions_left (bool): True if there are companion cards left
+            weight (list): weights of the evaluation function
+            deadline (float): time.time() after which the positions are only evaluated
+            table (TranspositionTable): table of the searched positions, None to search without one
+            stop (Event): set by another search to stop this one as if the time ran out, None for none
+            rotation (int): location the moves are searched from, wrapping around, so helper searches of Lazy SMP
+                order them differently
+        '''
+
+        self.masks = [0] * (NO_HOUSE + 1)  # Locations of the cards of each house, Varys last
+        self.varys = houses.index(NO_HOUSE)
+
+        for location, house in enumerate(houses):
+            if house != EMPTY:
+                self.masks[house] |= 1 << location
+
+        self.counts = [list(counts1), list(counts2)]
+        self.banners = [list(banners1), list(banners2)]
+        self.companions_left = companions_left
+        self.weight = list(weight)
+        self.deadline = deadline
+        self.nodes = 0
+        self.timed_out = False
+        self.table = table
+        self.stop = stop
+        # Locations searched first, from the rotation on
+        self.first = ~((1 << rotation) - 1) & ((1 << ROWS * COLS) - 1)
+        self.key = self.make_key()
+
+    def make_key(self):
+        '''
+        This function computes the key of the position from scratch, the moves update it.
+
+        Returns:
+            key (int): the 64-bit key, without the player to move
+        '''
+
+        key = COMPANIONS_KEY if self.companions_left else 0
+
+        for house, mask in enumerate(self.masks):
+            while mask:
+                bit = mask & -mask
+                mask ^= bit
+                key ^= PIECE_KEYS[bit.bit_length() - 1][house]
+
+        for player in range(2):
+            for house in range(NO_HOUSE):
+                key ^= COUNT_KEYS[player][house][self.counts[player][house]]
+
+                if self.banners[player][house]:
+                    key ^= BANNER_KEYS[player][house]
+
+        return key
+
+    def get_occupied(self):
+        '''
+        This function returns the locations of all the cards, Varys included.
+        '''
+
+        occupied = 0
+
+        for mask in self.masks:
+            occupied |= mask
+
+        return occupied
+
+    def evaluate(self, choose_companion):
+        '''
+        This function scores the position for player 1, as evaluate_board does.
+
+        Parameters:
+            choose_companion (bool): flag of a pending companion choice
+
+        Returns:
+            score (int): the score of the position
+        '''
+
+        weight = self.weight
+        counts1, counts2 = self.counts
+        banners1, banners2 = self.banners
+
+        score = weight[0] if choose_companion else 0
+        score += (sum(banners1) - sum(banners2)) * weight[0]
+
+        for i, size in enumerate(HOUSE_SIZES):
+            if counts1[i] > size / 2:
+                score += weight[2 + i]
+            elif counts2[i] > size / 2:
+                score -= weight[2 + i]
+            elif counts1[i] == counts2[i] == size / 2:
+                score -= (banners2[i] - banners1[i]) * weight[2 + i]
+
+        return score - (self.get_occupied() & LINE_MASKS[self.varys]).bit_count() * weight[1]
+
+    def make_move(self, move, turn):
+        '''
+        This function makes a card move, capturing the cards of its house between Varys and the card.
+
+        Parameters:
+            move (int): location of the card
+            turn (int): the player making the move
+
+        Returns:
+            undo (tuple): what unmake_move needs to take the move back
+            choose_companion (bool): True if the move took the last card of its house and companions are left
+        '''
+
+        house = 0
+
+        while not self.masks[house] >> move & 1:
+            house += 1
+
+        captured = (BETWEEN_MASKS[self.varys][move] & self.masks[house]) | 1 << move
+        player, opponent = turn - 1, 2 - turn
+        undo = (house, captured, self.varys, self.banners[0][house], self.banners[1][house], self.key)
+
+        self.masks[house] &= ~captured
+        self.masks[NO_HOUSE] = 1 << move
+        count = self.counts[player][house]
+        self.counts[player][house] += captured.bit_count()
+
+        # The player with more cards of the house gets its banner, the player who moved wins a tie
+        winner = opponent if self.counts[opponent][house] > self.counts[player][house] else player
+        banners = (1, 0) if winner == 0 else (0, 1)
+
+        if self.table is not None:
+            key = self.key ^ PIECE_KEYS[self.varys][NO_HOUSE] ^ PIECE_KEYS[move][NO_HOUSE]
+            key ^= COUNT_KEYS[player][house][count] ^ COUNT_KEYS[player][house][self.counts[player][house]]
+
+            while captured:
+                bit = captured & -captured
+                captured ^= bit
+                key ^= PIECE_KEYS[bit.bit_length() - 1][house]
+
+            for side in range(2):
+                if self.banners[side][house] != banners[side]:
+                    key ^= BANNER_KEYS[side][house]
+
+            self.key = key
+
+        self.varys = move
+        self.banners[0][house], self.banners[1][house] = banners
+
+        return undo, self.masks[house] == 0 and self.companions_left
+
+    def unmake_move(self, undo, turn):
+        '''
+        This function takes a card move back.
+
+        Parameters:
+            undo (tuple): what make_move returned
+            turn (int): the player who made the move
+        '''
+
+        house, captured, varys, banner1, banner2, self.key = undo
+
+        self.masks[house] |= captured
+        self.masks[NO_HOUSE] = 1 << varys
+        self.varys = varys
+        self.counts[turn - 1][house] -= captured.bit_count()
+        self.banners[0][house], self.banners[1][house] = banner1, banner2
+
+    def negamax(self, turn, depth, alpha, beta, choose_companion):
+        '''
+        This function searches the card moves with alpha-beta pruning, in the order of their locations from the
+        rotation on.
+
+        Parameters:
+            turn (int): the player to move
+            depth (int): remaining depth of the search
+            alpha (float): best score the player to move is sure of
+            beta (float): best score the opponent is sure of
+            choose_companion (bool): flag of a pending companion choice
+
+        Returns:
+            best_val (float): the score of the position for the player to move
+            best_move (int/None): the best move
+        '''
+
+        self.nodes += 1
+
+        if not self.timed_out and self.nodes % TIME_CHECK == 0 and (
+                time.time() > self.deadline or self.stop is not None and self.stop.is_set()):
+            self.timed_out = True
+
+        sign = 1 if turn == 1 else -1
+        moves = self.get_occupied() & LINE_MASKS[self.varys]
+
+        if self.timed_out or not moves or depth == 0 or choose_companion:
+            return sign * self.evaluate(choose_companion), None
+
+        table_move = -1
+
+        if self.table is not None:
+            key = self.key ^ (TURN_KEY if turn == 2 else 0)
+            entry = self.table.probe(key)
+            alpha_start = alpha
+
+            if entry is not None:
+                entry_depth, bound, score, table_move = entry
+
+                # A search as deep as this one decides the position, or narrows its window
+                if entry_depth >= depth:
+                    if bound == EXACT:
+                        return score, table_move
+                    if bound == LOWER:
+                        alpha = max(alpha, score)
+                    else:
+                        beta = min(beta, score)
+                    if alpha >= beta:
+                        return score, table_move
+
+                # Search the best move of the stored search first
+                if table_move >= 0 and moves >> table_move & 1:
+                    moves ^= 1 << table_move
+                else:
+                    table_move = -1
+
+        best_val, best_move = -float("inf"), None
+
+        while moves or table_move >= 0:
+            if table_move >= 0:
+                move, table_move = table_move, -1
+            else:
+                bit = moves & self.first or moves
+                bit &= -bit
+                moves ^= bit
+                move = bit.bit_length() - 1
+
+            undo, next_choose = self.make_move(move, turn)
+            val = -self.negamax(3 - turn, depth - 1, -beta, -alpha, next_choose)[0]
+            self.unmake_move(undo, turn)
+
+            if val > best_val:
+                best_val, best_move = val, move
+            alpha = max(alpha, best_val)
+            if alpha >= beta:  # Alpha-Beta Pruning
+                break
+
+        # Scores found after the time ran out are only evaluations
+        if self.table is not None and not self.timed_out:
+            bound = UPPER if best_val <= alpha_start else LOWER if best_val >= beta else EXACT
+            self.table.store(key, depth, bound, best_val, best_move)
+
+        return best_val, best_move
+
+
+def search(houses, counts1, counts2, banners1, banners2, companions_left, turn, depth, weight, deadline, table=None):
+    '''
+    This function searches the card moves of a position.
+
+    Parameters:
+        houses (list): house code of the card at each location (NO_HOUSE for Varys, EMPTY for no card)
+        counts1 (list): number of cards of each house of player 1
+        counts2 (list): number of cards of each house of player 2
+        banners1 (list): banner of each house of player 1 (0 or 1)
+        banners2 (list): banner of each house of player 2 (0 or 1)
+        companions_left (bool): True if there are companion cards left
+        turn (int): the player to move
+        depth (int): depth of the search
+        weight (list): weights of the evaluation function
+        deadline (float): time.time() after which the positions are only evaluated
+        table (TranspositionTable): table shared with other searches, None to search without one (the compiled core
+            has no table)
+
+    Returns:
+        score (float): the score of the position for player 1
+        move (int/None): the best move
+        nodes (int): number of searched nodes
+    '''
+
+    searcher = Searcher(houses, counts1, counts2, banners1, banners2, companions_left, weight, deadline, table)
+    val, move = searcher.negamax(turn, depth, -float("inf"), float("inf"), False)
+
+    return (val if turn == 1 else -val), move, searcher.nodes
+
+
+def iterative_search(houses, counts1, counts2, banners1, banners2, companions_left, turn, depth, weight, deadline,
+                     table, start_depth=1, stop=None, rotation=0, new_search=True):
+    '''
+    This function searches deeper and deeper with a transposition table, so each iteration starts with the best
+    moves the previous ones stored.
+
+    Parameters:
+        houses (list): house code of the card at each location (NO_HOUSE for Varys, EMPTY for no card)
+        counts1 (list): number of cards of each house of player 1
+        counts2 (list): number of cards of each house of player 2
+        banners1 (list): banner of each house of player 1 (0 or 1)
+        banners2 (list): banner of each house of player 2 (0 or 1)
+        companions_left (bool): True if there are companion cards left
+        turn (int): the player to move
+        depth (int): depth of the last iteration
+        weight (list): weights of the evaluation function
+        deadline (float): time.time() after which the search stops
+        table (TranspositionTable): table shared with other searches
+        start_depth (int): depth of the first iteration
+        stop (Event): set by another search to stop this one, None for none
+        rotation (int): location the moves are searched from, wrapping around
+        new_search (bool): False for a search that helps another one, so the age of the table stays that of the
+            other search
+
+    Returns:
+        score (float): the score of the position for player 1, from the deepest complete iteration
+        move (int/None): the best move
+        nodes (int): number of searched nodes
+        completed (int): depth of the deepest complete iteration (0 if none)
+    '''
+
+    searcher = Searcher(houses, counts1, counts2, banners1, banners2, companions_left, weight, deadline, table, stop,
+                        rotation)
+    if new_search:
+        table.new_search()
+    val, move, completed = None, None, 0
+
+    for iteration in range(start_depth, depth + 1):
+        result = searcher.negamax(turn, iteration, -float("inf"), float("inf"), False)
+
+        # An iteration cut by the time limit is only used if there is no complete one
+        if searcher.timed_out and completed:
+            break
+
+        (val, move), completed = result, iteration
+
+        if searcher.timed_out:
+            break
+
+    return (val if turn == 1 else -val), move, searcher.nodes, completed
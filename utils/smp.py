@@ -0,0 +1,161 @@
+import concurrent.futures
+import multiprocessing
+import os
+import sys
+import threading
+
+from utils.classes import ROWS, COLS
+from utils.search_core import iterative_search
+from utils.transposition import TranspositionTable
+
+# Fresh interpreters for the helper processes, so they never inherit the pygame window of the game
+context = multiprocessing.get_context('spawn')
+
+EXECUTORS = ('process', 'thread')  # Ways to run the helpers
+
+helper_state = threading.local()  # Table and stop event of the helper running in this thread
+
+
+def is_free_threaded():
+    '''
+    This function checks if Python runs without the GIL, so threads search in parallel.
+
+    Returns:
+        free_threaded (bool): True on a free-threaded build with the GIL off
+    '''
+
+    return hasattr(sys, '_is_gil_enabled') and not sys._is_gil_enabled()
+
+
+def init_helper(table_name, stop):
+    '''
+    This function runs once in each helper thread or process and attaches it to the shared table.
+
+    Parameters:
+        table_name (str): name of the shared memory of the table
+        stop (Event): set when the main search is over
+    '''
+
+    helper_state.table = TranspositionTable(name=table_name)
+    helper_state.stop = stop
+
+    # A helper process exits with the process of the agent, even when the game kills it in the middle of a search
+    parent = multiprocessing.parent_process()
+
+    if parent is not None:
+        threading.Thread(target=exit_with_parent, args=(parent,), daemon=True).start()
+
+
+def exit_with_parent(parent):
+    '''
+    This function runs in a thread of a helper process and ends the process when its parent ends.
+
+    Parameters:
+        parent (BaseProcess): the process that started the helper
+    '''
+
+    parent.join()
+    os._exit(0)
+
+
+def run_helper(arguments, depth, deadline, start_depth, rotation):
+    '''
+    This function runs a helper search of Lazy SMP: the same position as the main search, starting deeper and with
+    another move order, so it fills the table with what the main search needs next.
+
+    Parameters:
+        arguments (tuple): the position, as state_from_board gives it, companions_left, turn and weight
+        depth (int): depth of the last iteration
+        deadline (float): time.time() after which the search stops
+        start_depth (int): depth of the first iteration
+        rotation (int): location the moves are searched from
+
+    Returns:
+        result (tuple): score, move, nodes and the depth of the deepest complete iteration
+    '''
+
+    *position, weight = arguments
+
+    return iterative_search(*position, depth, weight, deadline, helper_state.table, start_depth, helper_state.stop,
+                            rotation, False)
+
+
+class LazySMP:
+    '''
+    This class searches with Lazy SMP: helpers search the same position as the main search at staggered depths and
+    with other move orders, and share nothing but the transposition table. The helpers are processes, or threads when
+    Python runs without the GIL.
+    '''
+
+    def __init__(self, helpers, table, executor=None):
+        '''
+        This function starts the helpers.
+
+        Parameters:
+            helpers (int): number of helper searches beside the main one
+            table (TranspositionTable): the table of the main search, the helpers attach to it by name
+            executor (str): 'process' or 'thread', None to choose from the build of Python
+        '''
+
+        self.helpers = helpers
+        self.table = table
+        self.executor = executor or ('thread' if is_free_threaded() else 'process')
+
+        if self.executor == 'thread':
+            self.stop = threading.Event()
+            self.pool = concurrent.futures.ThreadPoolExecutor(helpers, initializer=init_helper,
+                                                              initargs=(table.get_name(), self.stop))
+        else:
+            self.stop = context.Event()
+            self.pool = concurrent.futures.ProcessPoolExecutor(helpers, mp_context=context, initializer=init_helper,
+                                                               initargs=(table.get_name(), self.stop))
+
+    def search(self, houses, counts1, counts2, banners1, banners2, companions_left, turn, depth, weight, deadline):
+        '''
+        This function searches a position with the main search in this thread and the helpers beside it.
+
+        Parameters:
+            houses (list): house code of the card at each location (NO_HOUSE for Varys, EMPTY for no card)
+            counts1 (list): number of cards of each house of player 1
+            counts2 (list): number of cards of each house of player 2
+            banners1 (list): banner of each house of player 1 (0 or 1)
+            banners2 (list): banner of each house of player 2 (0 or 1)
+            companions_left (bool): True if there are companion cards left
+            turn (int): the player to move
+            depth (int): depth of the last iteration
+            weight (list): weights of the evaluation function
+            deadline (float): time.time() after which the search stops
+
+        Returns:
+            score (float): the score of the position for player 1
+            move (int/None): the best move
+            nodes (int): number of searched nodes of all the searches
+            completed (int): depth of the deepest complete iteration (0 if none)
+        '''
+
+        position = (houses, counts1, counts2, banners1, banners2, companions_left, turn)
+        self.stop.clear()
+
+        # Half the helpers start one ply deeper than the main search and half two, each from another location
+        futures = [self.pool.submit(run_helper, (*position, weight), depth, deadline, min(depth, 2 + helper % 2),
+                                    (helper + 1) * ROWS * COLS // (self.helpers + 1))
+                   for helper in range(self.helpers)]
+
+        score, move, nodes, completed = iterative_search(*position, depth, weight, deadline, self.table)
+
+        # The main search decides the move, the helpers only speed it up through the table and stop as soon as it is
+        # done (the first iteration of a stopped helper may be cut, so its move is not used)
+        self.stop.set()
+
+        for future in futures:
+            nodes += future.result()[2]
+
+        return score, move, nodes, completed
+
+    def close(self):
+        '''
+        This function stops the helpers.
+        '''
+
+        self.stop.set()
+        self.pool.shutdown(cancel_futures=True)
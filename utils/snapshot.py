@@ -0,0 +1,239 @@
+import json
+import mmap
+import struct
+from os import pardir
+from os.path import abspath, join, dirname
+
+from utils.classes import Card, Player, Board, HOUSES, HOUSE_NAMES, HOUSE_CODES, CARD_NAMES
+
+assets_path = join((abspath(join(dirname(abspath(__file__)), pardir))), "assets")
+
+MAGIC = b'HOTK'  # First bytes of every snapshot file
+VERSION = 1  # Version of the record layout
+
+# Header: magic, version, size of a record, number of records
+HEADER = struct.Struct('<4sHHI')
+
+# Record: card code of each location (0 for empty), counts of both players, banner masks of both players,
+# mask of the remaining companions, flags (turn 2, choose companion), code of the last chosen house (255 for None)
+RECORD = struct.Struct('<36s7s7sBBBBB')
+
+TURN_FLAG = 1  # Flag set when it is player 2's turn
+COMPANION_FLAG = 2  # Flag set when the player must choose a companion card
+NO_LAST_HOUSE = 255  # Code of a missing last house
+
+# Load the companion cards once
+with open(join(assets_path, 'characters.json')) as file:
+    characters = json.load(file)
+
+COMPANIONS = characters['Companion']  # Dictionary of companion cards
+COMPANION_NAMES = tuple(COMPANIONS.keys())  # Companion cards, in the order of their bits
+
+# House of each character. The characters of the file are registered first, so their codes are the same in every
+# process and can be saved
+CHARACTER_HOUSES = {name: house for house, names in characters.items() if house != 'Companion' for name in names}
+
+del characters
+
+
+def pack_state(cards, companion_cards, player1, player2, turn, choose_companion, last_house):
+    '''
+    This function packs a game state into a record.
+
+    Parameters:
+        cards (Board): the cards on the board
+        companion_cards (dict): dictionary of companion cards
+        player1 (Player): player 1
+        player2 (Player): player 2
+        turn (int): the player to move
+        choose_companion (bool): whether the player to move must choose a companion card
+        last_house (str/None): house of the last chosen card
+
+    Returns:
+        record (bytes): the packed state
+    '''
+
+    locations = bytearray(36)
+
+    for card in cards:
+        locations[card.location] = card.name_code + 1
+
+    # The players keep their banners as bits in the order of HOUSES, as they are saved
+    banners = [player1.get_banner_mask(), player2.get_banner_mask()]
+
+    companions = sum(1 << i for i, name in enumerate(COMPANION_NAMES) if name in companion_cards)
+
+    flags = (TURN_FLAG if turn == 2 else 0) | (COMPANION_FLAG if choose_companion else 0)
+
+    return RECORD.pack(bytes(locations), bytes(player1.get_counts()), bytes(player2.get_counts()), banners[0],
+                       banners[1], companions, flags, NO_LAST_HOUSE if last_house is None else HOUSE_CODES[last_house])
+
+
+def unpack_state(record, player1_agent='player1', player2_agent='player2'):
+    '''
+    This function unpacks a record into a game state.
+
+    Parameters:
+        record (bytes): the packed state
+        player1_agent (str): agent of player 1
+        player2_agent (str): agent of player 2
+
+    Returns:
+        state (dict): cards, companion_cards, player1, player2, turn, choose_companion and last_house
+    '''
+
+    locations, player1_counts, player2_counts, player1_banners, player2_banners, companions, flags, last_house = \
+        RECORD.unpack(record)
+
+    cards = Board()
+
+    for location, code in enumerate(locations):
+        if code:
+            name = CARD_NAMES[code - 1]
+            cards.append(Card(CHARACTER_HOUSES[name], name, location))
+
+    players = []
+
+    for agent, counts, banners in ((player1_agent, player1_counts, player1_banners),
+                                   (player2_agent, player2_counts, player2_banners)):
+        player = Player(agent)
+        player.set_counts(counts)
+
+        for i, house in enumerate(HOUSES):
+            if banners & (1 << i):
+                player.get_house_banner(house)
+
+        players.append(player)
+
+    companion_cards = {name: dict(COMPANIONS[name]) for i, name in enumerate(COMPANION_NAMES) if companions & (1 << i)}
+
+    return {
+        'cards': cards,
+        'companion_cards': companion_cards,
+        'player1': players[0],
+        'player2': players[1],
+        'turn': 2 if flags & TURN_FLAG else 1,
+        'choose_companion': bool(flags & COMPANION_FLAG),
+        'last_house': None if last_house == NO_LAST_HOUSE else HOUSE_NAMES[last_house]
+    }
+
+
+def write_snapshots(filename, records):
+    '''
+    This function writes records to a snapshot file.
+
+    Parameters:
+        filename (str): the snapshot file
+        records (iterable): packed states
+    '''
+
+    records = list(records)
+
+    with open(filename, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, len(records)))
+
+        for record in records:
+            file.write(record)
+
+
+def save_snapshot(filename, cards, companion_cards, player1, player2, turn, choose_companion, last_house):
+    '''
+    This function saves a single game state to a snapshot file.
+
+    Parameters:
+        filename (str): the snapshot file
+        cards (Board): the cards on the board
+        companion_cards (dict): dictionary of companion cards
+        player1 (Player): player 1
+        player2 (Player): player 2
+        turn (int): the player to move
+        choose_companion (bool): whether the player to move must choose a companion card
+        last_house (str/None): house of the last chosen card
+    '''
+
+    write_snapshots(filename, [pack_state(cards, companion_cards, player1, player2, turn, choose_companion,
+                                          last_house)])
+
+
+class SnapshotFile:
+    '''
+    This class gives random access to the records of a snapshot file through a memory map.
+    '''
+
+    def __init__(self, filename):
+        '''
+        This function opens the snapshot file.
+
+        Parameters:
+            filename (str): the snapshot file
+        '''
+
+        self.file = open(filename, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, record_size, self.count = HEADER.unpack_from(self.map, 0)
+
+        if magic != MAGIC:
+            self.close()
+
+            raise ValueError(filename + " is not a snapshot file.")
+
+        if version != VERSION or record_size != RECORD.size:
+            self.close()
+
+            raise ValueError(f"{filename} has snapshot version {version}, only version {VERSION} is supported.")
+
+    def __len__(self):
+        '''
+        This function returns the number of records in the file.
+        '''
+
+        return self.count
+
+    def __getitem__(self, index):
+        '''
+        This function unpacks a record of the file.
+
+        Parameters:
+            index (int): index of the record
+
+        Returns:
+            state (dict): the game state
+        '''
+
+        return unpack_state(self.get_record(index))
+
+    def get_record(self, index):
+        '''
+        This function returns a packed record of the file.
+
+        Parameters:
+            index (int): index of the record
+
+        Returns:
+            record (bytes): the packed state
+        '''
+
+        if index < 0:
+            index += self.count
+
+        if not 0 <= index < self.count:
+            raise IndexError("snapshot index out of range")
+
+        start = HEADER.size + index * RECORD.size
+
+        return self.map[start:start + RECORD.size]
+
+    def close(self):
+        '''
+        This function closes the file.
+        '''
+
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,58 @@
+def winner_from_masks(player1_mask, player2_mask):
+    '''
+    This function finds the winner from the banners of the players as bits, in constant time.
+
+    Parameters:
+        player1_mask (int): banners of player 1, bit i for HOUSES[i]
+        player2_mask (int): banners of player 2, bit i for HOUSES[i]
+
+    Returns:
+        winner (int/None): 1 if player 1 wins, 2 if player 2 wins, None if they have the same banners
+    '''
+
+    player1_score, player2_score = player1_mask.bit_count(), player2_mask.bit_count()
+
+    if player1_score != player2_score:
+        return 1 if player1_score > player2_score else 2
+
+    # A tie goes to the player with the banner of the first house, in the order of HOUSES (the house with the most
+    # cards first), that only one of them has
+    different = player1_mask ^ player2_mask
+
+    if not different:
+        return None
+
+    return 1 if player1_mask & different & -different else 2
+
+
+def get_winner(player1, player2):
+    '''
+    This function determines the winner of the game from the banner masks the players keep.
+
+    Parameters:
+        player1 (Player): player 1
+        player2 (Player): player 2
+
+    Returns:
+        winner (int/None): 1 if player 1 wins, 2 if player 2 wins, None if they have the same banners
+    '''
+
+    return winner_from_masks(player1.get_banner_mask(), player2.get_banner_mask())
+
+
+def is_terminal(cards, companion_cards, choose_companion):
+    '''
+    This function checks if the game is over: the player to move has no card move and no companion card to choose.
+    The board keeps the number of cards of every row and column, so this takes constant time.
+
+    Parameters:
+        cards (Board): the cards on the board
+        companion_cards (dict): dictionary of companion cards
+        choose_companion (bool): whether the player to move must choose a companion card
+
+    Returns:
+        terminal (bool): True if the game is over
+    '''
+
+    return cards.get_mobility() == 0 and not (choose_companion and companion_cards)
+
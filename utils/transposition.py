@@ -0,0 +1,194 @@
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+
+EXACT, LOWER, UPPER = 0, 1, 2  # Bounds of a stored score
+BUCKET_SIZE = 2  # Entries of a bucket, the first one keeps the deepest search and the second one the latest
+DEFAULT_SIZE_MB = 16  # Default memory of a table
+# Bytes before the entries, one bucket so the entries stay aligned. The first word is the age of the current search,
+# kept in the shared memory so every process attached to the table ages the entries the same way
+HEADER_SIZE = 32
+
+# One entry of the table, 16 bytes. The lock is the key XOR the other 8 bytes, so an entry torn by two processes
+# writing it at the same time does not match its key and is read as empty
+ENTRY = np.dtype([('lock', '<u8'), ('score', '<f4'), ('depth', 'i1'), ('bound', 'u1'), ('move', 'i1'), ('age', 'u1')])
+
+
+class TranspositionTable:
+    '''
+    This class is a fixed-size transposition table in shared memory that search processes attach to by name.
+    Entries are read and written without locks, and the lock field of each entry detects torn ones.
+    '''
+
+    def __init__(self, size_mb=DEFAULT_SIZE_MB, name=None):
+        '''
+        This function creates a table, or attaches to the table of another process.
+
+        Parameters:
+            size_mb (float): memory of the table in MB, when it is created
+            name (str): name of the shared memory of an existing table, None to create one
+        '''
+
+        self.owner = name is None
+
+        if self.owner:
+            buckets = max(1, int(size_mb * 2 ** 20) // (ENTRY.itemsize * BUCKET_SIZE))
+            self.memory = shared_memory.SharedMemory(create=True,
+                                                     size=HEADER_SIZE + buckets * BUCKET_SIZE * ENTRY.itemsize)
+
+        else:
+            # Only the process that created the table removes it. Before Python 3.13 the attaching processes register
+            # it too, which is harmless for workers started by the creator, as they share its resource tracker
+            if sys.version_info >= (3, 13):
+                self.memory = shared_memory.SharedMemory(name=name, track=False)
+            else:
+                self.memory = shared_memory.SharedMemory(name=name)
+
+        self.header = np.ndarray(1, dtype='<u8', buffer=self.memory.buf)
+        self.entries = np.ndarray(((self.memory.size - HEADER_SIZE) // (ENTRY.itemsize * BUCKET_SIZE), BUCKET_SIZE),
+                                  dtype=ENTRY, buffer=self.memory.buf, offset=HEADER_SIZE)
+
+        # The same entries as pairs of words, for checking the locks
+        self.words = self.entries.view('<u8').reshape(len(self.entries), BUCKET_SIZE, 2)
+
+        if self.owner:
+            self.header[0] = 0
+            self.entries[:] = np.zeros(1, dtype=ENTRY)
+
+        self.stats = {'probes': 0, 'hits': 0, 'collisions': 0, 'stores': 0, 'replacements': 0}
+
+    def get_name(self):
+        '''
+        This function returns the name of the shared memory, for other processes to attach to.
+
+        Returns:
+            name (str): the name of the shared memory
+        '''
+
+        return self.memory.name
+
+    def get_age(self):
+        '''
+        This function returns the age of the current search, shared by every process attached to the table.
+
+        Returns:
+            age (int): the age, entries of older searches are replaced first
+        '''
+
+        return int(self.header[0])
+
+    def new_search(self):
+        '''
+        This function starts a new search for every process attached to the table, so the entries of the previous
+        ones are replaced first. Searches that help another one (the helpers of Lazy SMP) keep its age.
+        '''
+
+        self.header[0] = (self.get_age() + 1) % 256
+
+    def probe(self, key):
+        '''
+        This function looks up a position.
+
+        Parameters:
+            key (int): the 64-bit key of the position
+
+        Returns:
+            entry (tuple/None): depth, bound, score and best move (-1 for none) of the position, or None
+        '''
+
+        self.stats['probes'] += 1
+        bucket = key % len(self.entries)
+        words = self.words[bucket]
+
+        for slot in range(BUCKET_SIZE):
+            if int(words[slot, 0]) ^ int(words[slot, 1]) == key:
+                self.stats['hits'] += 1
+                entry = self.entries[bucket, slot]
+
+                return int(entry['depth']), int(entry['bound']), float(entry['score']), int(entry['move'])
+
+        # The bucket is full of other positions
+        if words[0, 0] != 0 and words[1, 0] != 0:
+            self.stats['collisions'] += 1
+
+        return None
+
+    def store(self, key, depth, bound, score, move):
+        '''
+        This function stores the result of a search. The first entry of the bucket keeps the deepest search of the
+        current age and the second one takes everything else.
+
+        Parameters:
+            key (int): the 64-bit key of the position
+            depth (int): depth of the search
+            bound (int): EXACT, LOWER or UPPER
+            score (float): the score
+            move (int/None): the best move
+        '''
+
+        self.stats['stores'] += 1
+        bucket = key % len(self.entries)
+        entries, words = self.entries[bucket], self.words[bucket]
+
+        age = self.get_age()
+        first = entries[0]
+        first_key = int(words[0, 0]) ^ int(words[0, 1])
+
+        if first_key == key or words[0, 0] == 0 or depth >= first['depth'] or first['age'] != age:
+            slot = 0
+        else:
+            slot = 1
+
+        if words[slot, 0] != 0 and int(words[slot, 0]) ^ int(words[slot, 1]) != key:
+            self.stats['replacements'] += 1
+
+        # Write the data, then the lock that matches it
+        entries[slot] = (0, score, depth, bound, -1 if move is None else move, age)
+        words[slot, 0] = np.uint64(key ^ int(words[slot, 1]))
+
+    def get_occupancy(self):
+        '''
+        This function returns the share of entries in use.
+
+        Returns:
+            occupancy (float): used entries over all entries
+        '''
+
+        return float(np.count_nonzero(self.words[:, :, 0]) / self.entries.size)
+
+    def get_stats(self):
+        '''
+        This function returns the statistics of this process and the occupancy of the table.
+
+        Returns:
+            stats (dict): probes, hits, collisions (probes of full buckets without the position), stores,
+                replacements (stores over another position), hit rate, occupancy and size in MB
+        '''
+
+        stats = dict(self.stats)
+        stats['hit_rate'] = stats['hits'] / stats['probes'] if stats['probes'] else 0.0
+        stats['occupancy'] = self.get_occupancy()
+        stats['size_mb'] = self.memory.size / 2 ** 20
+
+        return stats
+
+    def clear(self):
+        '''
+        This function removes every entry and resets the statistics.
+        '''
+
+        self.header[0] = 0
+        self.entries[:] = np.zeros(1, dtype=ENTRY)
+        self.stats = dict.fromkeys(self.stats, 0)
+
+    def close(self):
+        '''
+        This function detaches from the table, and removes it if this process created it.
+        '''
+
+        del self.header, self.entries, self.words
+        self.memory.close()
+
+        if self.owner:
+            self.memory.unlink()